@@ -1,5 +1,6 @@
 """API functionality for the CMS app"""
 
+import json
 import logging
 from datetime import timedelta
 from typing import Tuple, Union  # noqa: UP035
@@ -9,17 +10,41 @@ from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
 from django.core.cache import caches
 from django.core.exceptions import ValidationError
+from django.db.models import Prefetch, Q
+from django.templatetags.static import static
 from django.utils.text import slugify
+from django_redis import get_redis_connection
 from mitol.common.utils import now_in_utc
+from redis.exceptions import WatchError
 from wagtail.models import Site
 from wagtail.rich_text import RichText
 
 from cms import models as cms_models
-from cms.constants import CERTIFICATE_INDEX_SLUG, INSTRUCTOR_INDEX_SLUG
+from cms.constants import (
+    CERTIFICATE_INDEX_SLUG,
+    CERTIFICATE_PAGE_CACHE_KEY,
+    FEATURED_PRODUCTS_CACHE_KEY,
+    FEATURED_PRODUCTS_ENROLLABILITY_CACHE_KEY,
+    FINANCIAL_ASSISTANCE_FORM_URLS_CACHE_AGE,
+    FINANCIAL_ASSISTANCE_FORM_URLS_CACHE_KEY,
+    INSTRUCTOR_INDEX_SLUG,
+    PRODUCT_PAGE_CACHE_VERSION_KEY,
+    SURROGATE_KEY_CATALOG,
+    SURROGATE_KEY_COURSE,
+    SURROGATE_KEY_PAGE,
+    SURROGATE_KEY_PROGRAM,
+)
 from cms.exceptions import WagtailSpecificPageError
 from cms.models import Page
-from courses.constants import HOMEPAGE_CACHE_AGE
-from courses.models import Course, Program
+from courses.constants import DEFAULT_COURSE_IMG_PATH, HOMEPAGE_CACHE_AGE
+from courses.models import (
+    Course,
+    CourseRun,
+    Program,
+    ProgramRequirement,
+    ProgramRequirementNodeType,
+    RelatedProgram,
+)
 from courses.utils import (
     get_enrollable_courseruns_qs,
 )
@@ -316,17 +341,70 @@ def create_default_courseware_page(
     return page
 
 
+def get_featured_product_enrollability(course_ids):
+    """
+    Returns the enrollment windows of the live runs of courses with live pages,
+    as timestamps, so that the featured products can be checked for
+    enrollability without querying.
+
+    Args:
+        course_ids (iterable of int): the ids of the courses
+    Returns:
+        dict: lists of [enrollment start, enrollment end or None] keyed by course id
+    """
+    enrollability = {course_id: [] for course_id in course_ids}
+    for course_id, enrollment_start, enrollment_end in CourseRun.objects.filter(
+        Q(enrollment_end__isnull=True) | Q(enrollment_end__gte=now_in_utc()),
+        course_id__in=enrollability,
+        course__page__live=True,
+        live=True,
+        enrollment_start__isnull=False,
+    ).values_list("course_id", "enrollment_start", "enrollment_end"):
+        enrollability[course_id].append(
+            [
+                enrollment_start.timestamp(),
+                enrollment_end.timestamp() if enrollment_end else None,
+            ]
+        )
+    return enrollability
+
+
+def get_featured_product_data(course):
+    """
+    Returns the data that the home page shows for a featured course, in a form that
+    can be serialized as JSON
+
+    Args:
+        course (Course): the course, with its page and runs loaded
+    Returns:
+        dict: the featured product data
+    """
+    page = course.page
+    run = course.first_unexpired_run
+    return {
+        "course_id": course.id,
+        "title": page.title,
+        "description": page.description,
+        "feature_image_src": get_wagtail_img_src(page.feature_image)
+        if page.feature_image
+        else static(DEFAULT_COURSE_IMG_PATH),
+        "start_date": run.start_date.isoformat()
+        if run is not None and run.start_date
+        else None,
+        "url_path": page.get_url(),
+        "is_program": False,
+        "is_self_paced": run.is_self_paced if run is not None else None,
+        "program_type": None,
+    }
+
+
 def create_featured_items():
     """
-    Pulls a new set of featured items for the CMS home page
+    Pulls a new set of featured items for the CMS home page, and stores the data
+    that the home page shows for them along with their enrollment windows
 
     This will only be used by cron task or management command.
     """
-    redis_cache = caches["redis"]
-    featured_courses = redis_cache.get("CMS_homepage_featured_courses")
-    if featured_courses is not None:
-        redis_cache.delete("CMS_homepage_featured_courses")
-
     now = now_in_utc()
     end_of_day = now + timedelta(days=1)
 
@@ -344,8 +422,8 @@ def create_featured_items():
     # Figure out which courses are self-paced and select 2 at random
     enrollable_self_paced_courseruns = enrollable_courseruns.filter(is_self_paced=True)
     self_paced_featured_courseruns = enrollable_self_paced_courseruns.order_by("?")[:2]
-    self_paced_featured_courses = Course.objects.filter(
-        id__in=self_paced_featured_courseruns.values_list("course_id", flat=True)
+    self_paced_featured_course_ids = list(
+        self_paced_featured_courseruns.values_list("course_id", flat=True)
     )
 
     # Select 20 random courses that are not self-paced
@@ -361,25 +439,382 @@ def create_featured_items():
     ]
     future_featured_courseruns.sort(key=lambda courserun: courserun.start_date)
     future_featured_course_ids = [
-        courserun.course.id for courserun in future_featured_courseruns
+        courserun.course_id for courserun in future_featured_courseruns
     ]
-    future_featured_courses = Course.objects.filter(id__in=future_featured_course_ids)
 
     started_featured_course_ids = [
-        courserun.course.id
+        courserun.course_id
         for courserun in random_featured_courseruns
         if courserun.start_date < now
     ]
-    started_featured_courses = Course.objects.filter(id__in=started_featured_course_ids)
-
-    # Union all the featured courses together
-    featured_courses = []
-    featured_courses.extend(list(self_paced_featured_courses))
-    featured_courses.extend(list(future_featured_courses))
-    featured_courses.extend(list(started_featured_courses))
 
-    # Set the value in cache for 24 hours
-    redis_cache.set(
-        "CMS_homepage_featured_courses", featured_courses, HOMEPAGE_CACHE_AGE
+    # Union all the featured courses together, keeping the order above
+    featured_course_ids = list(
+        dict.fromkeys(
+            self_paced_featured_course_ids
+            + future_featured_course_ids
+            + started_featured_course_ids
+        )
     )
+    courses = (
+        Course.objects.filter(id__in=featured_course_ids)
+        .select_related("page__feature_image")
+        .prefetch_related(
+            Prefetch("courseruns", queryset=CourseRun.objects.select_related("course"))
+        )
+        .in_bulk()
+    )
+    featured_courses = [courses[course_id] for course_id in featured_course_ids]
+
+    # Replace both hashes together, for 24 hours
+    products_key, enrollability_key = _get_featured_product_cache_keys()
+    with get_redis_connection("redis").pipeline() as pipe:
+        pipe.delete(products_key, enrollability_key)
+        if featured_courses:
+            pipe.hset(
+                products_key,
+                mapping={
+                    course.id: json.dumps(
+                        {**get_featured_product_data(course), "position": position}
+                    )
+                    for position, course in enumerate(featured_courses)
+                },
+            )
+            pipe.hset(
+                enrollability_key,
+                mapping={
+                    course_id: json.dumps(windows)
+                    for course_id, windows in get_featured_product_enrollability(
+                        featured_course_ids
+                    ).items()
+                },
+            )
+            pipe.expire(products_key, HOMEPAGE_CACHE_AGE)
+            pipe.expire(enrollability_key, HOMEPAGE_CACHE_AGE)
+        pipe.execute()
     return featured_courses
+
+
+def _get_featured_product_cache_keys():
+    """Returns the redis keys of the featured product data and enrollment window hashes"""
+    redis_cache = caches["redis"]
+    return (
+        redis_cache.make_key(FEATURED_PRODUCTS_CACHE_KEY),
+        redis_cache.make_key(FEATURED_PRODUCTS_ENROLLABILITY_CACHE_KEY),
+    )
+
+
+def get_cached_featured_products():
+    """
+    Returns the cached data of the featured courses and their enrollment windows
+
+    Returns:
+        tuple of (list, dict): the featured product data in order, and lists of
+            [enrollment start, enrollment end or None] keyed by course id
+    """
+    products_key, enrollability_key = _get_featured_product_cache_keys()
+    with get_redis_connection("redis").pipeline(transaction=False) as pipe:
+        pipe.hgetall(products_key)
+        pipe.hgetall(enrollability_key)
+        products, enrollability = pipe.execute()
+    products = sorted(
+        (json.loads(product) for product in products.values()),
+        key=lambda product: product.pop("position"),
+    )
+    return products, {
+        int(course_id): json.loads(windows)
+        for course_id, windows in enrollability.items()
+    }
+
+
+def update_featured_products(course_ids):
+    """
+    Updates the data and enrollment windows of any of the courses that are
+    currently featured on the home page. Only the hash fields of those courses are
+    written, and the write is retried if the featured items are regenerated
+    in the meantime.
+
+    Args:
+        course_ids (iterable of int): the ids of courses whose runs or pages changed
+    """
+    course_ids = sorted(set(course_ids) - {None})
+    if not course_ids:
+        return
+    products_key, enrollability_key = _get_featured_product_cache_keys()
+    with get_redis_connection("redis").pipeline() as pipe:
+        while True:
+            try:
+                pipe.watch(products_key)
+                featured = {
+                    course_id: json.loads(product)
+                    for course_id, product in zip(
+                        course_ids, pipe.hmget(products_key, course_ids)
+                    )
+                    if product is not None
+                }
+                if not featured:
+                    return
+                courses = (
+                    Course.objects.filter(id__in=featured, page__isnull=False)
+                    .select_related("page__feature_image")
+                    .prefetch_related(
+                        Prefetch(
+                            "courseruns",
+                            queryset=CourseRun.objects.select_related("course"),
+                        )
+                    )
+                )
+                products = {
+                    course.id: json.dumps(
+                        {
+                            **get_featured_product_data(course),
+                            "position": featured[course.id]["position"],
+                        }
+                    )
+                    for course in courses
+                }
+                enrollability = get_featured_product_enrollability(featured)
+
+                pipe.multi()
+                if products:
+                    pipe.hset(products_key, mapping=products)
+                pipe.hset(
+                    enrollability_key,
+                    mapping={
+                        course_id: json.dumps(windows)
+                        for course_id, windows in enrollability.items()
+                    },
+                )
+                pipe.execute()
+            except WatchError:
+                # the featured items were regenerated while this was updating them
+                continue
+            return
+
+
+def clear_product_page_cache():
+    """Expires the cached data of every course and program page"""
+    redis_cache = caches["redis"]
+    try:
+        redis_cache.incr(PRODUCT_PAGE_CACHE_VERSION_KEY)
+    except ValueError:
+        redis_cache.set(PRODUCT_PAGE_CACHE_VERSION_KEY, 1, None)
+
+
+def _build_financial_assistance_form_urls():  # noqa: C901
+    """
+    Resolves the financial assistance form URL of every course and program page.
+
+    A course page uses the live form under the first page of a program that
+    requires the course (or one of those programs' related programs), then a form
+    for any of those programs, then a form for the course, then a live form under
+    the course page. A program page uses a live form for the program, then a live
+    form under the program page, then a live form for a related program.
+    """
+    forms = list(
+        cms_models.FlexiblePricingRequestForm.objects.order_by("path").values(
+            "path", "slug", "live", "selected_course_id", "selected_program_id"
+        )
+    )
+    live_forms = [form for form in forms if form["live"]]
+    live_child_forms = {}
+    for form in live_forms:
+        live_child_forms.setdefault(form["path"][: -Page.steplen], form)
+
+    program_pages = list(
+        cms_models.ProgramPage.objects.select_related("program").order_by("path")
+    )
+    program_pages_by_program = {page.program_id: page for page in program_pages}
+
+    course_program_ids = {}
+    for course_id, program_id in (
+        ProgramRequirement.objects.filter(
+            node_type=ProgramRequirementNodeType.COURSE, course__isnull=False
+        )
+        .order_by("program_id")
+        .values_list("course_id", "program_id")
+        .distinct()
+    ):
+        course_program_ids.setdefault(course_id, []).append(program_id)
+
+    related_program_ids = {}
+    for first_program_id, second_program_id in RelatedProgram.objects.order_by(
+        "id"
+    ).values_list("first_program_id", "second_program_id"):
+        related_program_ids.setdefault(first_program_id, []).append(second_program_id)
+        related_program_ids.setdefault(second_program_id, []).append(first_program_id)
+
+    course_page_urls = {}
+    for course_page in cms_models.CoursePage.objects.select_related("course"):
+        program_ids = course_program_ids.get(course_page.course_id, [])
+        form = None
+        if program_ids:
+            valid_program_ids = set(program_ids)
+            for program_id in program_ids:
+                valid_program_ids.update(related_program_ids.get(program_id, []))
+
+            # for courses in program, financial assistance form from program should take precedence if exist
+            program_page = next(
+                (
+                    page
+                    for page in program_pages
+                    if page.program_id in valid_program_ids
+                ),
+                None,
+            )
+            if program_page and program_page.path in live_child_forms:
+                course_page_urls[course_page.id] = (
+                    f"{program_page.get_url()}"
+                    f"{live_child_forms[program_page.path]['slug']}/"
+                )
+                continue
+
+            form = next(
+                (
+                    form
+                    for form in forms
+                    if form["selected_program_id"] in valid_program_ids
+                ),
+                None,
+            )
+
+        if form is None:
+            form = next(
+                (
+                    form
+                    for form in forms
+                    if form["selected_course_id"] == course_page.course_id
+                ),
+                None,
+            )
+        if form is None:
+            form = live_child_forms.get(course_page.path)
+        if form is not None:
+            course_page_urls[course_page.id] = f"{course_page.get_url()}{form['slug']}/"
+
+    program_page_urls = {}
+    for program_page in program_pages:
+        form = next(
+            (
+                form
+                for form in live_forms
+                if form["selected_program_id"] == program_page.program_id
+            ),
+            live_child_forms.get(program_page.path),
+        )
+        if form is not None:
+            program_page_urls[program_page.id] = (
+                f"{program_page.get_url()}{form['slug']}/"
+            )
+            continue
+
+        related_ids = related_program_ids.get(program_page.program_id, [])
+        form = next(
+            (form for form in live_forms if form["selected_program_id"] in related_ids),
+            None,
+        )
+        related_program_page = (
+            program_pages_by_program.get(form["selected_program_id"]) if form else None
+        )
+        if related_program_page is not None:
+            program_page_urls[program_page.id] = (
+                f"{related_program_page.get_url()}{form['slug']}/"
+            )
+
+    return {"course_pages": course_page_urls, "program_pages": program_page_urls}
+
+
+def get_financial_assistance_form_urls():
+    """
+    Returns the financial assistance form URLs of course and program pages, keyed by
+    page id. These are resolved for every page at once and cached until a page or
+    program relationship changes.
+
+    Returns:
+        dict: maps "course_pages" and "program_pages" to dicts of page id to form URL
+    """
+    redis_cache = caches["redis"]
+    form_urls = redis_cache.get(FINANCIAL_ASSISTANCE_FORM_URLS_CACHE_KEY)
+    if form_urls is None:
+        form_urls = _build_financial_assistance_form_urls()
+        redis_cache.set(
+            FINANCIAL_ASSISTANCE_FORM_URLS_CACHE_KEY,
+            form_urls,
+            FINANCIAL_ASSISTANCE_FORM_URLS_CACHE_AGE,
+        )
+    return form_urls
+
+
+def clear_financial_assistance_form_urls():
+    """Expires the cached financial assistance form URLs"""
+    caches["redis"].delete(FINANCIAL_ASSISTANCE_FORM_URLS_CACHE_KEY)
+
+
+def get_page_surrogate_keys(page):
+    """
+    Returns the surrogate keys that a served page is tagged with in the Fastly cache:
+    its own key, the key of the course or program it describes, and the catalog key
+    for the home page, which lists the featured products.
+
+    Args:
+        page (Page): the specific page that is being served
+
+    Returns:
+        set of str: the surrogate keys
+    """
+    surrogate_keys = {SURROGATE_KEY_PAGE.format(page_id=page.id)}
+    if isinstance(page, cms_models.CoursePage) and page.course_id:
+        surrogate_keys.add(SURROGATE_KEY_COURSE.format(course_id=page.course_id))
+    elif isinstance(page, cms_models.ProgramPage) and page.program_id:
+        surrogate_keys.add(SURROGATE_KEY_PROGRAM.format(program_id=page.program_id))
+    elif isinstance(page, cms_models.HomePage):
+        surrogate_keys.add(SURROGATE_KEY_CATALOG)
+    return surrogate_keys
+
+
+def get_courseware_surrogate_keys(course_ids=(), program_ids=()):
+    """
+    Returns the surrogate keys of the pages that show the given courses or programs:
+    their own pages, the pages of the programs that require the courses, and the
+    catalog.
+
+    Args:
+        course_ids (iterable of int): ids of courses that changed
+        program_ids (iterable of int): ids of programs that changed
+
+    Returns:
+        set of str: the surrogate keys
+    """
+    program_ids = set(program_ids)
+    if course_ids:
+        program_ids.update(
+            ProgramRequirement.objects.filter(course_id__in=course_ids).values_list(
+                "program_id", flat=True
+            )
+        )
+    return {
+        SURROGATE_KEY_CATALOG,
+        *(SURROGATE_KEY_COURSE.format(course_id=course_id) for course_id in course_ids),
+        *(
+            SURROGATE_KEY_PROGRAM.format(program_id=program_id)
+            for program_id in program_ids
+        ),
+    }
+
+
+def clear_certificate_page_cache(certificate):
+    """
+    Expires the cached page of a certificate, which is otherwise kept for as long
+    as the certificate uses the same certificate page revision
+
+    Args:
+        certificate (CourseRunCertificate or ProgramCertificate): the certificate
+    """
+    if certificate.certificate_page_revision_id:
+        caches["redis"].delete(
+            CERTIFICATE_PAGE_CACHE_KEY.format(
+                uuid=certificate.uuid,
+                revision_id=certificate.certificate_page_revision_id,
+                version=settings.VERSION,
+            )
+        )
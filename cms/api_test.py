@@ -4,7 +4,6 @@ from datetime import timedelta
 
 import pytest
 from django.contrib.contenttypes.models import ContentType
-from django.core.cache import caches
 from django.core.exceptions import ValidationError
 from mitol.common.utils.datetime import now_in_utc
 from wagtail.models import Page
@@ -18,8 +17,12 @@ from cms.api import (
     ensure_product_index,
     ensure_program_product_index,
     ensure_resource_pages,
+    get_cached_featured_products,
+    get_courseware_surrogate_keys,
     get_home_page,
+    get_page_surrogate_keys,
     get_wagtail_img_src,
+    update_featured_products,
 )
 from cms.exceptions import WagtailSpecificPageError
 from cms.factories import CoursePageFactory, HomePageFactory, ProgramPageFactory
@@ -291,13 +294,6 @@ def test_create_courseware_page():
 
 @pytest.mark.django_db
 def test_create_featured_items():
-    # pytest does not clear cache thus if we have a cache value set, it will persist between tests and test runs
-    # thus we need to clear the cache before running the test
-    redis_cache = caches["redis"]
-    featured_courses = redis_cache.get("CMS_homepage_featured_courses")
-    if featured_courses is not None:
-        redis_cache.delete("CMS_homepage_featured_courses")
-
     now = now_in_utc()
     future_date = now + timedelta(days=1)
     past_date = now - timedelta(days=1)
@@ -356,20 +352,97 @@ def test_create_featured_items():
         course=unenrollable_course, live=False, past_enrollment_end=True
     )
 
-    create_featured_items()
-    cache_value = redis_cache.get("CMS_homepage_featured_courses")
-
-    assert len(cache_value) == 4
-    assert set(cache_value) == {
+    featured_courses = create_featured_items()
+    assert featured_courses == [
+        enrollable_self_paced_course,
         enrollable_future_course,
         enrollable_other_future_course,
-        enrollable_self_paced_course,
         in_progress_course,
+    ]
+    assert unenrollable_course not in featured_courses
+
+    cache_value, enrollability = get_cached_featured_products()
+    assert [item["course_id"] for item in cache_value] == [
+        course.id for course in featured_courses
+    ]
+    assert cache_value[1] == {
+        "course_id": enrollable_future_course.id,
+        "title": enrollable_future_course.page.title,
+        "description": enrollable_future_course.page.description,
+        "feature_image_src": get_wagtail_img_src(
+            enrollable_future_course.page.feature_image
+        ),
+        "start_date": future_date.isoformat(),
+        "url_path": enrollable_future_course.page.get_url(),
+        "is_program": False,
+        "is_self_paced": False,
+        "program_type": None,
+    }
+    assert enrollability == {
+        course.id: [
+            [
+                run.enrollment_start.timestamp(),
+                run.enrollment_end.timestamp() if run.enrollment_end else None,
+            ]
+            for run in course.courseruns.all()
+        ]
+        for course in featured_courses
     }
 
-    assert cache_value[0] == enrollable_self_paced_course
-    assert cache_value[1] == enrollable_future_course
-    assert cache_value[2] == enrollable_other_future_course
-    assert cache_value[3] == in_progress_course
 
-    assert unenrollable_course not in cache_value
+@pytest.mark.django_db
+def test_update_featured_products():
+    """
+    The data of a featured course should be refreshed when its page is
+    republished, keeping the order of the featured courses, and courses that
+    aren't featured shouldn't be added
+    """
+    now = now_in_utc()
+    courses = []
+    for _ in range(2):
+        course = CourseFactory.create(page=None, live=True)
+        CoursePageFactory.create(course=course, live=True)
+        CourseRunFactory.create(
+            course=course,
+            live=True,
+            start_date=now + timedelta(days=1),
+            enrollment_start=now - timedelta(days=1),
+            enrollment_end=None,
+        )
+        courses.append(course)
+    featured_courses = create_featured_items()
+    other_course = CourseFactory.create()
+
+    page = featured_courses[1].page
+    page.title = "New title"
+    page.save_revision().publish()
+    update_featured_products([other_course.id])
+
+    products, enrollability = get_cached_featured_products()
+    assert [product["course_id"] for product in products] == [
+        course.id for course in featured_courses
+    ]
+    assert products[1]["title"] == "New title"
+    assert set(enrollability) == {course.id for course in featured_courses}
+
+
+@pytest.mark.django_db
+def test_surrogate_keys():
+    """The surrogate keys of a course should cover its page, its programs' pages and the catalog"""
+    course_page = CoursePageFactory.create()
+    program = ProgramFactory.create()
+    program.add_requirement(course_page.course)
+
+    assert get_page_surrogate_keys(course_page) == {
+        f"page-{course_page.id}",
+        f"course-{course_page.course_id}",
+    }
+    assert get_page_surrogate_keys(program.page) == {
+        f"page-{program.page.id}",
+        f"program-{program.id}",
+    }
+    assert get_courseware_surrogate_keys(course_ids=[course_page.course_id]) == {
+        "catalog",
+        f"course-{course_page.course_id}",
+        f"program-{program.id}",
+    }
@@ -5,4 +5,5 @@ class CmsConfig(AppConfig):
     name = "cms"
 
     def ready(self):
-        pass
+        """Application is ready"""
+        import cms.signalreceivers  # noqa: F401
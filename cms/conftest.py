@@ -1,5 +1,7 @@
 """Fixtures for CMS test suite"""
 
+import gc
+import warnings
 from types import SimpleNamespace
 
 import pytest
@@ -23,3 +25,16 @@ def fully_configured_wagtail(configured_wagtail_home):
         site=configured_wagtail_home.site,
         course_index_page=course_index_page,
     )
+
+
+@pytest.fixture
+def generates_renditions():
+    """
+    Fixture for tests that generate image renditions. Wagtail leaves the temporary
+    file of a new rendition open until it is garbage collected, so the resulting
+    warnings are ignored and the files are collected before the next test.
+    """
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", ResourceWarning)
+        yield
+        gc.collect()
@@ -9,3 +9,30 @@ SIGNATORY_INDEX_SLUG = "signatories"
 INSTRUCTOR_INDEX_SLUG = "instructors"
 
 ONE_MINUTE = 60
+
+PRODUCT_PAGE_CACHE_KEY = "CMS_product_page_{page_id}_{revision_id}_{version}"
+PRODUCT_PAGE_CACHE_VERSION_KEY = "CMS_product_page_version"
+PRODUCT_PAGE_CACHE_AGE = 5 * ONE_MINUTE
+
+FINANCIAL_ASSISTANCE_FORM_URLS_CACHE_KEY = "CMS_financial_assistance_form_urls"
+FINANCIAL_ASSISTANCE_FORM_URLS_CACHE_AGE = 60 * ONE_MINUTE
+
+FEATURED_PRODUCTS_CACHE_KEY = "CMS_homepage_featured_products"
+FEATURED_PRODUCTS_ENROLLABILITY_CACHE_KEY = "CMS_homepage_featured_enrollability"
+
+# The image renditions used by the site's templates, generated ahead of time
+IMAGE_RENDITION_FILTER_SPECS = ["max-150x50"]
+
+# Surrogate keys that tag responses cached by Fastly, so they can be purged by key
+SURROGATE_KEY_PAGE = "page-{page_id}"
+SURROGATE_KEY_COURSE = "course-{course_id}"
+SURROGATE_KEY_PROGRAM = "program-{program_id}"
+SURROGATE_KEY_CATALOG = "catalog"
+
+FASTLY_PURGE_KEYS_SET = "CMS_fastly_purge_keys"
+FASTLY_PURGE_SCHEDULED_KEY = "CMS_fastly_purge_scheduled"
+# Fastly accepts up to 256 surrogate keys in one bulk purge request
+FASTLY_PURGE_BATCH_SIZE = 256
+
+CERTIFICATE_PAGE_CACHE_KEY = "CMS_certificate_page_{uuid}_{revision_id}_{version}"
+CERTIFICATE_PAGE_CACHE_AGE = 7 * 24 * 60 * ONE_MINUTE
@@ -6,7 +6,7 @@ import re
 import uuid
 from datetime import datetime, timedelta
 from json import dumps
-from urllib.parse import quote_plus
+from urllib.parse import quote_plus, urljoin
 
 from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
@@ -15,9 +15,11 @@ from django.core.exceptions import ValidationError
 from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 from django.forms import ChoiceField, DecimalField
-from django.http import Http404
+from django.http import Http404, HttpResponse
 from django.template.response import TemplateResponse
+from django.templatetags.static import static
 from django.urls import reverse
+from django.utils.dateparse import parse_datetime
 from django.utils.functional import cached_property
 from django.utils.text import slugify
 from mitol.common.utils.datetime import now_in_utc
@@ -50,16 +52,21 @@ from cms.blocks import (
 )
 from cms.constants import (
     CERTIFICATE_INDEX_SLUG,
+    CERTIFICATE_PAGE_CACHE_AGE,
+    CERTIFICATE_PAGE_CACHE_KEY,
     COURSE_INDEX_SLUG,
     INSTRUCTOR_INDEX_SLUG,
+    PRODUCT_PAGE_CACHE_AGE,
+    PRODUCT_PAGE_CACHE_KEY,
+    PRODUCT_PAGE_CACHE_VERSION_KEY,
     PROGRAM_INDEX_SLUG,
     SIGNATORY_INDEX_SLUG,
 )
 from cms.forms import CertificatePageForm
 from courses.api import get_relevant_course_run_qset
+from courses.constants import DEFAULT_COURSE_IMG_PATH
 from courses.models import (
     Course,
-    CourseRun,
     CourseRunCertificate,
     Program,
     ProgramCertificate,
@@ -186,6 +193,48 @@ class CertificateIndexPage(RoutablePageMixin, Page):
             and not parent.get_children().type(cls).exists()
         )
 
+    @staticmethod
+    def get_certificate_page_cache_key(request, certificate):
+        """
+        Returns the key that the rendered page of a certificate is cached under, or
+        None if the response can't be cached. Only anonymous visitors, who make up
+        most of the traffic to shared certificate links, are served from the cache,
+        since the certificate's owner sees the sharing links. The key includes the
+        app version, so a release with new templates doesn't serve stale pages.
+        """
+        if (
+            request.user.is_authenticated
+            or not certificate.certificate_page_revision_id
+        ):
+            return None
+        return CERTIFICATE_PAGE_CACHE_KEY.format(
+            uuid=certificate.uuid,
+            revision_id=certificate.certificate_page_revision_id,
+            version=settings.VERSION,
+        )
+
+    def get_cached_certificate_response(self, request, certificate):
+        """
+        Returns a response with the cached page of a certificate, or None if it
+        isn't cached
+        """
+        cache_key = self.get_certificate_page_cache_key(request, certificate)
+        content = caches["redis"].get(cache_key) if cache_key else None
+        return HttpResponse(content) if content is not None else None
+
+    def serve_certificate_page(self, request, certificate, certificate_page):
+        """
+        Serves the page of a certificate, and caches the rendered page if it can be
+        served from the cache
+        """
+        certificate_page.certificate = certificate
+        response = certificate_page.serve(request)
+        cache_key = self.get_certificate_page_cache_key(request, certificate)
+        if cache_key and response.status_code == 200:  # noqa: PLR2004
+            response.render()
+            caches["redis"].set(cache_key, response.content, CERTIFICATE_PAGE_CACHE_AGE)
+        return response
+
     @route(r"^program/([A-Fa-f0-9-]+)/?$")
     def program_certificate(self, request, uuid, *args, **kwargs):  # pylint: disable=unused-argument  # noqa: ARG002
         """
@@ -197,6 +246,10 @@ class CertificateIndexPage(RoutablePageMixin, Page):
         except ProgramCertificate.DoesNotExist:
             raise Http404()  # noqa: B904, RSE102
 
+        cached_response = self.get_cached_certificate_response(request, certificate)
+        if cached_response is not None:
+            return cached_response
+
         # Get a CertificatePage to serve this request
         certificate_page = (
             certificate.certificate_page_revision.as_object()
@@ -215,8 +268,7 @@ class CertificateIndexPage(RoutablePageMixin, Page):
             # page revision with the user's program certificate object
             certificate.save()
 
-        certificate_page.certificate = certificate
-        return certificate_page.serve(request)
+        return self.serve_certificate_page(request, certificate, certificate_page)
 
     @route(r"^([A-Fa-f0-9-]+)/?$")
     def course_certificate(self, request, uuid, *args, **kwargs):  # pylint: disable=unused-argument  # noqa: ARG002
@@ -229,6 +281,10 @@ class CertificateIndexPage(RoutablePageMixin, Page):
         except CourseRunCertificate.DoesNotExist:
             raise Http404()  # noqa: B904, RSE102
 
+        cached_response = self.get_cached_certificate_response(request, certificate)
+        if cached_response is not None:
+            return cached_response
+
         # Get a CertificatePage to serve this request
         certificate_page = (
             certificate.certificate_page_revision.as_object()
@@ -245,8 +301,7 @@ class CertificateIndexPage(RoutablePageMixin, Page):
 
         if not certificate.certificate_page_revision:
             certificate.save()
-        certificate_page.certificate = certificate
-        return certificate_page.serve(request)
+        return self.serve_certificate_page(request, certificate, certificate_page)
 
     @route(r"^$")
     def index_route(self, request, *args, **kwargs):  # noqa: ARG002
@@ -419,6 +474,7 @@ class CertificatePage(CourseProgramChildPage):
 
         if request.is_preview:
             preview_context = {
+                "certificate_url": request.build_absolute_uri(),
                 "learner_name": "Anthony M. Stark",
                 "start_date": (
                     self.parent.product.first_unexpired_run.start_date
@@ -456,6 +512,9 @@ class CertificatePage(CourseProgramChildPage):
 
             context = {
                 "uuid": self.certificate.uuid,
+                "certificate_url": urljoin(
+                    settings.SITE_BASE_URL, self.certificate.link
+                ),
                 "product_name": product_name,
                 "certificate_user": self.certificate.user,
                 "learner_name": self.certificate.user.get_full_name(),
@@ -725,51 +784,33 @@ class HomePage(VideoPlayerConfigMixin):
     @property
     def get_cached_featured_products(self):
         """
-        Retrieves teh featured products that were generated using cms/api/create_featured_items either from the
+        Retrieves the featured products that were generated using cms/api/create_featured_items either from the
         management command or the daily cron job. This is used to display the featured products on the home page.
+        Products are shown if their course is still enrollable according to the cached enrollment windows.
         """
-        now = now_in_utc()
-        redis_cache = caches["redis"]
-        cached_featured_products = redis_cache.get("CMS_homepage_featured_courses")
-        if cached_featured_products and len(cached_featured_products) > 0:
-            featured_product_ids = [course.id for course in cached_featured_products]
-            relevant_run_course_ids = (
-                CourseRun.objects.filter(live=True)
-                .filter(
-                    models.Q(course__id__in=featured_product_ids)
-                    & models.Q(enrollment_start__lte=now)
-                    & (
-                        models.Q(enrollment_end__gte=now)
-                        | models.Q(enrollment_end__isnull=True)
-                    )
+        from cms.api import get_cached_featured_products
+
+        now = now_in_utc().timestamp()
+        products, enrollability = get_cached_featured_products()
+        featured_product_pages = []
+        for product in products:
+            if not any(
+                enrollment_start <= now
+                and (enrollment_end is None or enrollment_end >= now)
+                for enrollment_start, enrollment_end in enrollability.get(
+                    product["course_id"], []
                 )
-                .values_list("course__id", flat=True)
-            )
-            featured_products = [
-                course.page
-                for course in cached_featured_products
-                if course.page is not None
-                and course.page.live
-                and course.id in relevant_run_course_ids
-            ]
-            featured_product_pages = []
-            for page in featured_products:
-                run = page.product.first_unexpired_run
-                run_data = {
-                    "title": page.title,
-                    "description": page.description,
-                    "feature_image": page.feature_image,
-                    "start_date": run.start_date if run is not None else None,
-                    "url_path": page.get_url(),
-                    "is_program": page.is_program_page,
-                    "is_self_paced": run.is_self_paced if run is not None else None,
-                    "program_type": (
-                        page.product.program_type if page.is_program_page else None
-                    ),
+            ):
+                continue
+            featured_product_pages.append(
+                {
+                    **product,
+                    "start_date": parse_datetime(product["start_date"])
+                    if product["start_date"]
+                    else None,
                 }
-                featured_product_pages.append(run_data)
-            return featured_product_pages
-        return []
+            )
+        return featured_product_pages
 
     @property
     def products(self):
@@ -1140,15 +1181,71 @@ class ProductPage(VideoPlayerConfigMixin, MetadataPageMixin):
             ),
         )
 
-    def get_context(self, request, *args, **kwargs):  # noqa: ARG002
-        instructors = [
-            member.linked_instructor_page for member in self.linked_instructors.all()
-        ]
+    def get_page_data(self):
+        """
+        Returns the parts of the page context that are the same for every learner,
+        as plain values that can be cached
+        """
+        from cms.api import get_wagtail_img_src
+
+        return {
+            "instructors": [
+                {
+                    "id": instructor.id,
+                    "instructor_name": instructor.instructor_name,
+                    "instructor_title": instructor.instructor_title,
+                    "instructor_bio_short": instructor.instructor_bio_short,
+                    "instructor_bio_long": instructor.instructor_bio_long,
+                    "feature_image_src": get_wagtail_img_src(instructor.feature_image)
+                    if instructor.feature_image
+                    else static(DEFAULT_COURSE_IMG_PATH),
+                }
+                for instructor in (
+                    member.linked_instructor_page
+                    for member in self.linked_instructors.select_related(
+                        "linked_instructor_page__feature_image"
+                    )
+                )
+            ],
+        }
+
+    def get_cached_page_data(self, request):
+        """
+        Returns the page data from the cache. The cache key changes when the page
+        is revised, and its version changes when pages are published or course
+        runs or products change.
+
+        Args:
+            request: the current request
+        Returns:
+            dict: the output of get_page_data
+        """
+        if getattr(request, "is_preview", False):
+            return self.get_page_data()
+
+        redis_cache = caches["redis"]
+        version = redis_cache.get_or_set(PRODUCT_PAGE_CACHE_VERSION_KEY, 1, None)
+        return redis_cache.get_or_set(
+            PRODUCT_PAGE_CACHE_KEY.format(
+                page_id=self.id,
+                revision_id=self.latest_revision_id,
+                version=version,
+            ),
+            self.get_page_data,
+            PRODUCT_PAGE_CACHE_AGE,
+        )
+
+    def get_page_context(self, page_data):
+        """
+        Returns the parts of the page context that are built from the page data
+        """
+        return {"instructors": page_data["instructors"]}
 
+    def get_context(self, request, *args, **kwargs):  # noqa: ARG002
         return {
             **super().get_context(request),
             **get_base_context(request),
-            "instructors": instructors,
+            **self.get_page_context(self.get_cached_page_data(request)),
         }
 
 
@@ -1192,11 +1289,11 @@ class CoursePage(ProductPage):
         Returns:
             None, or a tuple of the original price and the discount to apply
         """
+        if not is_courseware_flexible_price_approved(self.product, request.user):
+            return None
+
         ecommerce_product = self.product.active_products
-        if (
-            is_courseware_flexible_price_approved(self.product, request.user)
-            and ecommerce_product
-        ):
+        if ecommerce_product:
             ecommerce_product = ecommerce_product.first()
 
             discount = determine_courseware_flexible_price_discount(
@@ -1220,36 +1317,80 @@ class CoursePage(ProductPage):
         """Gets the title of the course in the specified format"""
         return f"{self.course.readable_id} | {self.title}"
 
-    def get_context(self, request, *args, **kwargs):
+    def get_page_data(self):
         relevant_runs = list(get_relevant_course_run_qset(course=self.product))
         relevant_run = relevant_runs[0] if relevant_runs else None
+        product = (
+            relevant_run.products.filter(is_active=True).first()
+            if relevant_run
+            else None
+        )
+        return {
+            **super().get_page_data(),
+            "course_runs": [
+                {
+                    "id": run.id,
+                    "title": run.title,
+                    "courseware_id": run.courseware_id,
+                    "start_date": run.start_date,
+                    "end_date": run.end_date,
+                    "enrollment_start": run.enrollment_start,
+                    "enrollment_end": run.enrollment_end,
+                    "upgrade_deadline": run.upgrade_deadline,
+                    "is_self_paced": run.is_self_paced,
+                }
+                for run in relevant_runs
+            ],
+            "product": {
+                "id": product.id,
+                "price": product.price,
+                "description": product.description,
+            }
+            if product
+            else None,
+        }
+
+    def get_page_context(self, page_data):
+        course_runs = page_data["course_runs"]
+        relevant_run = course_runs[0] if course_runs else None
+        return {
+            **super().get_page_context(page_data),
+            "run": relevant_run,
+            "course_runs": course_runs,
+            "start_date": relevant_run["start_date"] if relevant_run else None,
+            "product": page_data["product"],
+        }
+
+    def get_context(self, request, *args, **kwargs):
+        context = super().get_context(request, *args, **kwargs)
+        relevant_run = context["run"]
         sign_in_url = (
             None
             if request.user.is_authenticated
-            else f'{reverse("login")}?next={quote_plus(self.get_url())}'
+            else f"{reverse('login')}?next={quote_plus(self.get_url())}"
         )
-        start_date = relevant_run.start_date if relevant_run else None
+        now = now_in_utc()
         can_access_edx_course = (
             request.user.is_authenticated
             and relevant_run is not None
-            and (relevant_run.is_in_progress or request.user.is_editor)
+            and (
+                (
+                    relevant_run["start_date"] is not None
+                    and relevant_run["start_date"] <= now
+                    and (
+                        relevant_run["end_date"] is None
+                        or relevant_run["end_date"] > now
+                    )
+                )
+                or request.user.is_editor
+            )
         )
         finaid_price = self._get_current_finaid(request)
-        product = (
-            relevant_run.products.filter(is_active=True).first()
-            if relevant_run
-            else None
-        )
         return {
-            **super().get_context(request, *args, **kwargs),
-            **get_base_context(request),
-            "run": relevant_run,
-            "course_runs": relevant_runs,
+            **context,
             "sign_in_url": sign_in_url,
-            "start_date": start_date,
             "can_access_edx_course": can_access_edx_course,
             "finaid_price": finaid_price,
-            "product": product,
         }
 
     content_panels = [  # noqa: RUF005
@@ -1295,7 +1436,7 @@ class ProgramPage(ProductPage):
         sign_in_url = (
             None
             if request.user.is_authenticated
-            else f'{reverse("login")}?next={quote_plus(self.get_url())}'
+            else f"{reverse('login')}?next={quote_plus(self.get_url())}"
         )
         start_date = None
         can_access_edx_course = False
@@ -8,13 +8,20 @@ import factory
 import pytest
 from django.contrib.auth.models import AnonymousUser, Group
 from django.contrib.sessions.middleware import SessionMiddleware
-from django.core.cache import caches
+from django.db import connection
+from django.http import Http404
 from django.test.client import RequestFactory
+from django.test.utils import CaptureQueriesContext
 from django.urls import resolve
 from mitol.common.factories import UserFactory
 from mitol.common.utils.datetime import now_in_utc
 
-from cms.api import create_featured_items
+from cms.api import (
+    create_featured_items,
+    ensure_certificate_index,
+    get_cached_featured_products,
+    get_wagtail_img_src,
+)
 from cms.constants import CMS_EDITORS_GROUP_NAME
 from cms.factories import (
     CertificatePageFactory,
@@ -33,8 +40,10 @@ from cms.models import (
     ProgramPage,
     SignatoryPage,
 )
+from courses.api import get_relevant_course_run_qset
 from courses.factories import (
     CourseFactory,
+    CourseRunCertificateFactory,
     CourseRunEnrollmentFactory,
     CourseRunFactory,
     ProgramFactory,
@@ -81,6 +90,30 @@ def test_custom_detail_page_urls_handled(fully_configured_wagtail):
     assert resolver_match.func.__name__ == "serve"  # pylint: disable=protected-access
 
 
+def course_run_values(run):
+    """Return the values that a course page caches for a course run"""
+    return {
+        "id": run.id,
+        "title": run.title,
+        "courseware_id": run.courseware_id,
+        "start_date": run.start_date,
+        "end_date": run.end_date,
+        "enrollment_start": run.enrollment_start,
+        "enrollment_end": run.enrollment_end,
+        "upgrade_deadline": run.upgrade_deadline,
+        "is_self_paced": run.is_self_paced,
+    }
+
+
+def product_values(product):
+    """Return the values that a course page caches for a product"""
+    return {
+        "id": product.id,
+        "price": product.price,
+        "description": product.description,
+    }
+
+
 @pytest.mark.parametrize(
     "is_authenticated,has_relevant_run,enrolled,exp_sign_in_url,exp_is_enrolled,has_finaid,has_instructor",  # noqa: PT006
     [
@@ -157,21 +190,27 @@ def test_course_page_context(  # noqa: PLR0913
         "self": course_page,
         "page": course_page,
         "request": request,
-        "run": run,
-        "course_runs": relevant_runs,
+        "run": course_run_values(run) if run else None,
+        "course_runs": [course_run_values(run) for run in relevant_runs],
         "sign_in_url": f"/signin/?next={quote_plus(course_page.get_url())}"
         if exp_sign_in_url
         else None,
         "start_date": getattr(run, "start_date", None),
         "can_access_edx_course": is_authenticated and has_relevant_run,
         "finaid_price": finaid_price,
-        "product": product,
+        "product": product_values(product) if product else None,
         "hijack_logout_redirect_url": "/admin/users/user",
         "instructors": []
         if not has_instructor
         else [
-            member.linked_instructor_page
-            for member in course_page.linked_instructors.order_by("order").all()
+            {
+                "id": instructor_page.id,
+                "instructor_name": instructor_page.instructor_name,
+                "instructor_title": instructor_page.instructor_title,
+                "instructor_bio_short": instructor_page.instructor_bio_short,
+                "instructor_bio_long": instructor_page.instructor_bio_long,
+                "feature_image_src": get_wagtail_img_src(instructor_page.feature_image),
+            }
         ],
     }
 
@@ -216,7 +255,7 @@ def test_course_page_context_edx_access(  # noqa: PLR0913
         )
     )
     patched_get_relevant_run_qset = mocker.patch(
-        "cms.models.get_relevant_course_run_qset", return_value=[run if run else None]
+        "cms.models.get_relevant_course_run_qset", return_value=[run] if run else []
     )
     if not is_authed:  # noqa: SIM108
         request_user = AnonymousUser()
@@ -234,6 +273,64 @@ def test_course_page_context_edx_access(  # noqa: PLR0913
     patched_get_relevant_run_qset.assert_called_once_with(course=course_page.course)
 
 
+def test_course_page_context_cached(mocker, fully_configured_wagtail):
+    """CoursePage.get_context should cache the runs, product and instructors until a run changes"""
+    course_page = CoursePageFactory.create(course__readable_id=FAKE_READABLE_ID)
+    run = CourseRunFactory.create(course=course_page.course, in_future=True)
+    product = ProductFactory.create(purchasable_object=run)
+    patched_get_relevant_run_qset = mocker.patch(
+        "cms.models.get_relevant_course_run_qset",
+        side_effect=get_relevant_course_run_qset,
+    )
+    request = RequestFactory().get("/")
+    request.user = AnonymousUser()
+
+    for _ in range(2):
+        context = course_page.get_context(request=request)
+        assert context["run"] == course_run_values(run)
+        assert context["product"] == product_values(product)
+    patched_get_relevant_run_qset.assert_called_once_with(course=course_page.course)
+
+    run.title = "New title"
+    run.save()
+    assert course_page.get_context(request=request)["run"]["title"] == "New title"
+    assert patched_get_relevant_run_qset.call_count == 2
+
+
+def test_course_page_cached_data_plain_values(fully_configured_wagtail):
+    """
+    CoursePage should cache plain values rather than model instances, so that
+    anonymous requests don't load the runs or products
+    """
+    course_page = CoursePageFactory.create(course__readable_id=FAKE_READABLE_ID)
+    run = CourseRunFactory.create(course=course_page.course, in_future=True)
+    product = ProductFactory.create(purchasable_object=run)
+    instructor_page = InstructorPageFactory.create()
+    InstructorPageLink.objects.create(
+        page=course_page, linked_instructor_page=instructor_page
+    )
+    request = RequestFactory().get("/")
+    request.user = AnonymousUser()
+
+    page_data = course_page.get_cached_page_data(request)
+
+    assert page_data["course_runs"] == [course_run_values(run)]
+    assert page_data["product"] == product_values(product)
+    assert [instructor["id"] for instructor in page_data["instructors"]] == [
+        instructor_page.id
+    ]
+
+    with CaptureQueriesContext(connection) as queries:
+        context = course_page.get_context(request=request)
+    assert context["start_date"] == run.start_date
+    assert not [
+        query["sql"]
+        for query in queries
+        if '"courses_courserun"' in query["sql"]
+        or '"ecommerce_product"' in query["sql"]
+    ]
+
+
 def generate_flexible_pricing_response(mocker, request_user, flexible_pricing_form):
     """
     Generates a fully realized request for the Flexible Pricing tests.
@@ -339,9 +436,9 @@ def test_flex_pricing_form_state_display(mocker, submission_status):
     elif submission_status == FlexiblePriceStatus.DENIED:
         assert "Application Denied" in response.rendered_content
     elif submission_status == FlexiblePriceStatus.RESET:
-        assert (
-            "csrfmiddlewaretoken" in response.rendered_content
-        ), response.rendered_content
+        assert "csrfmiddlewaretoken" in response.rendered_content, (
+            response.rendered_content
+        )
 
 
 @pytest.mark.parametrize("course_or_program", [True, False])
@@ -606,6 +703,46 @@ def test_certificate_for_program_page():
         assert signatory.value.signature_image.title == "Image"
 
 
+@pytest.mark.usefixtures("generates_renditions")
+def test_course_certificate_page_cached(mocker, fully_configured_wagtail):
+    """Course certificate pages should be cached for anonymous visitors until the certificate is revoked"""
+    mocker.patch(
+        "hubspot_sync.management.commands.configure_hubspot_properties._upsert_custom_properties",
+    )
+    certificate_index_page = ensure_certificate_index()
+    course_page = CoursePageFactory.create()
+    course_page.certificate_page.save_revision()
+    certificate = CourseRunCertificateFactory.create(
+        course_run__course=course_page.course
+    )
+    patched_serve = mocker.patch.object(
+        CertificatePage, "serve", side_effect=CertificatePage.serve, autospec=True
+    )
+    request = RequestFactory().get(certificate.link)
+    request.user = AnonymousUser()
+
+    responses = [
+        certificate_index_page.course_certificate(request, str(certificate.uuid))
+        for _ in range(2)
+    ]
+    assert responses[0].content == responses[1].content
+    assert patched_serve.call_count == 1
+
+    request.user = certificate.user
+    certificate_index_page.course_certificate(request, str(certificate.uuid))
+    assert patched_serve.call_count == 2
+
+    certificate.is_revoked = True
+    certificate.save()
+    with pytest.raises(Http404):
+        certificate_index_page.course_certificate(request, str(certificate.uuid))
+    certificate.is_revoked = False
+    certificate.save()
+    request.user = AnonymousUser()
+    certificate_index_page.course_certificate(request, str(certificate.uuid))
+    assert patched_serve.call_count == 3
+
+
 @pytest.mark.parametrize("test_course", [True, False])
 def test_courseware_title_synced_with_product_page_title(test_course):
     """Tests that Courseware title is synced with the Course Page title from CMS"""
@@ -658,12 +795,6 @@ def test_homepage__featured_products(settings, mocker):
     further_future_date = future_date + timedelta(days=1)
     further_past_date = past_date - timedelta(days=1)
     furthest_future_date = further_future_date + timedelta(days=1)
-    redis_cache = caches["redis"]
-    # Ensure the key is empty since pytest doesn't clear the cache between tests
-    featured_courses = redis_cache.get("CMS_homepage_featured_courses")
-    if featured_courses is not None:
-        redis_cache.delete("CMS_homepage_featured_courses")
-    assert redis_cache.get("CMS_homepage_featured_courses") is None
 
     enrollable_future_course = CourseFactory.create(page=None, live=True)
     enrollable_future_course_page = CoursePageFactory.create(
@@ -678,13 +809,19 @@ def test_homepage__featured_products(settings, mocker):
         end_date=furthest_future_date,
     )
     create_featured_items()
-    assert len(redis_cache.get("CMS_homepage_featured_courses")) == 1
+    assert len(get_cached_featured_products()[0]) == 1
     hf = HomePageFactory.create()
-    assert hf.get_cached_featured_products == [
+    with CaptureQueriesContext(connection) as queries:
+        featured_products = hf.get_cached_featured_products
+    assert len(queries) == 0
+    assert featured_products == [
         {
+            "course_id": enrollable_future_course.id,
             "title": enrollable_future_course_page.title,
             "description": enrollable_future_course_page.description,
-            "feature_image": enrollable_future_course_page.feature_image,
+            "feature_image_src": get_wagtail_img_src(
+                enrollable_future_course_page.feature_image
+            ),
             "start_date": enrollable_future_courserun.start_date,
             "url_path": enrollable_future_course_page.get_url(),
             "is_program": enrollable_future_course_page.is_program_page,
@@ -711,13 +848,16 @@ def test_homepage__featured_products(settings, mocker):
         end_date=furthest_future_date,
     )
     create_featured_items()
-    assert len(redis_cache.get("CMS_homepage_featured_courses")) == 1
+    assert len(get_cached_featured_products()[0]) == 1
     hf = HomePageFactory.create()
     assert hf.get_cached_featured_products == [
         {
+            "course_id": enrollable_future_course_with_no_enrollment_end.id,
             "title": enrollable_future_course_with_no_enrollment_end_page.title,
             "description": enrollable_future_course_with_no_enrollment_end_page.description,
-            "feature_image": enrollable_future_course_with_no_enrollment_end_page.feature_image,
+            "feature_image_src": get_wagtail_img_src(
+                enrollable_future_course_with_no_enrollment_end_page.feature_image
+            ),
             "start_date": enrollable_future_courserun_with_no_enrollment_end.start_date,
             "url_path": enrollable_future_course_with_no_enrollment_end_page.get_url(),
             "is_program": enrollable_future_course_with_no_enrollment_end_page.is_program_page,
@@ -725,3 +865,8 @@ def test_homepage__featured_products(settings, mocker):
             "program_type": None,
         }
     ]
+
+    # Closing enrollment for the featured run should remove it without regenerating the items
+    enrollable_future_courserun_with_no_enrollment_end.enrollment_end = past_date
+    enrollable_future_courserun_with_no_enrollment_end.save()
+    assert hf.get_cached_featured_products == []
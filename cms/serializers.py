@@ -5,8 +5,7 @@ from django.templatetags.static import static
 from rest_framework import serializers
 
 from cms import models
-from cms.api import get_wagtail_img_src
-from cms.models import FlexiblePricingRequestForm, ProgramPage
+from cms.api import get_financial_assistance_form_urls, get_wagtail_img_src
 from courses.constants import DEFAULT_COURSE_IMG_PATH
 
 
@@ -70,59 +69,21 @@ class CoursePageSerializer(BaseCoursePageSerializer):
         """
         Returns URL of the Financial Assistance Form.
         """
-        financial_assistance_page = None
-        if instance.product.programs:
-            valid_program_objs = [program for program in instance.product.programs]  # noqa: C416
-            valid_related_programs = []
-
-            for valid_program in valid_program_objs:
-                for valid_related_program in valid_program.related_programs:
-                    valid_related_programs.append(valid_related_program)  # noqa: PERF402
-
-            valid_program_objs.extend(valid_related_programs)
-
-            program_page = ProgramPage.objects.filter(
-                program_id__in=[program.id for program in valid_program_objs]
-            ).first()
-
-            # for courses in program, financial assistance form from program should take precedence if exist
-            if program_page:
-                financial_assistance_page = (
-                    program_page.get_children()
-                    .type(FlexiblePricingRequestForm)
-                    .live()
-                    .first()
-                )
-                if financial_assistance_page:
-                    return f"{program_page.get_url()}{financial_assistance_page.slug}/"
-
-            financial_assistance_page = FlexiblePricingRequestForm.objects.filter(
-                selected_program__in=valid_program_objs
-            ).first()
-
-        if financial_assistance_page is None:
-            financial_assistance_page = FlexiblePricingRequestForm.objects.filter(
-                selected_course=instance.product
-            ).first()
-
-        if financial_assistance_page is None:
-            financial_assistance_page = (
-                instance.get_children().type(FlexiblePricingRequestForm).live().first()
-            )
-
-        return (
-            f"{instance.get_url()}{financial_assistance_page.slug}/"
-            if financial_assistance_page
-            else ""
-        )
+        return get_financial_assistance_form_urls()["course_pages"].get(instance.id, "")
 
     def get_current_price(self, instance):
-        relevant_product = (
-            instance.product.active_products.filter().order_by("-price").first()
-            if instance.product.active_products
-            else None
+        """
+        Returns the highest price of the active products of the first unexpired run.
+        Reads the run's products with products.all() so that a prefetch of the
+        course's courseruns__products can be used.
+        """
+        relevant_run = instance.product.first_unexpired_run
+        if relevant_run is None:
+            return None
+        return max(
+            (product.price for product in relevant_run.products.all()),
+            default=None,
         )
-        return relevant_product.price if relevant_product else None
 
     def get_instructors(self, instance):
         members = [
@@ -178,42 +139,8 @@ class ProgramPageSerializer(serializers.ModelSerializer):
         """
         Returns URL of the Financial Assistance Form.
         """
-        financial_assistance_page = (
-            FlexiblePricingRequestForm.objects.filter(
-                selected_program_id=instance.program.id
-            )
-            .live()
-            .first()
-        )
-        page_children = instance.get_children()
-        if (financial_assistance_page is None) and (page_children is not None):
-            financial_assistance_page = (
-                page_children.type(FlexiblePricingRequestForm).live().first()
-            )
-        if (financial_assistance_page is None) & (
-            len(instance.program.related_programs) > 0
-        ):
-            financial_assistance_page = (
-                FlexiblePricingRequestForm.objects.filter(
-                    selected_program__in=instance.program.related_programs
-                )
-                .select_related("selected_program")
-                .live()
-                .first()
-            )
-
-            if financial_assistance_page is None:
-                return ""
-
-            program_page = ProgramPage.objects.filter(
-                program=financial_assistance_page.selected_program
-            ).get()
-            return f"{program_page.get_url()}{financial_assistance_page.slug}/"
-
-        return (
-            f"{instance.get_url()}{financial_assistance_page.slug}/"
-            if financial_assistance_page
-            else ""
+        return get_financial_assistance_form_urls()["program_pages"].get(
+            instance.id, ""
         )
 
     class Meta:
@@ -4,7 +4,9 @@ Tests for cms serializers
 
 import bleach
 import pytest
+from django.db import connection
 from django.test.client import RequestFactory
+from django.test.utils import CaptureQueriesContext
 
 from cms.factories import (
     CoursePageFactory,
@@ -307,6 +309,36 @@ def test_serialized_course_finaid_form_url(
             )
 
 
+def test_serialized_finaid_form_url_cached():
+    """The financial assistance form URLs of course pages should be resolved once for all pages"""
+    program = ProgramFactory.create()
+    form = FlexiblePricingFormFactory.create(
+        parent=program.page, selected_program=program
+    )
+    course_pages = []
+    for _ in range(3):
+        course = CourseFactory.create()
+        program.add_requirement(course)
+        course_pages.append(course.page)
+
+    with CaptureQueriesContext(connection) as queries:
+        form_urls = [
+            CoursePageSerializer(course_page).data["financial_assistance_form_url"]
+            for course_page in course_pages
+        ]
+    assert form_urls == [f"{program.page.get_url()}{form.slug}/"] * 3
+    assert (
+        len(
+            [
+                query
+                for query in queries.captured_queries
+                if "cms_flexiblepricingrequestform" in query["sql"]
+            ]
+        )
+        == 1
+    )
+
+
 def test_serialize_program_page(
     mocker, fully_configured_wagtail, staff_user, mock_context
 ):
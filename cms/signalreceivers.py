@@ -1,34 +1,40 @@
+"""Signal receivers for the CMS"""
+
 import logging
 
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from wagtail.images.models import Image
 from wagtail.signals import page_published, page_unpublished, post_page_move
 
-from cms.models import FlexiblePricingRequestForm
-from cms.tasks import queue_fastly_purge_url
+from cms.api import (
+    clear_certificate_page_cache,
+    clear_financial_assistance_form_urls,
+    clear_product_page_cache,
+    get_courseware_surrogate_keys,
+    get_page_surrogate_keys,
+    update_featured_products,
+)
+from cms.models import CoursePage, FlexiblePricingRequestForm, ProgramPage
+from cms.tasks import queue_fastly_purge_keys, warm_image_renditions
+from courses.models import (
+    Course,
+    CourseRun,
+    CourseRunCertificate,
+    Program,
+    ProgramCertificate,
+    ProgramRequirement,
+    RelatedProgram,
+)
+from ecommerce.models import Product
 from flexiblepricing.utils import ensure_flexprice_form_fields
 
 logger = logging.getLogger("cms.signalreceiver")
 
 
-def fastly_purge_url_receiver(sender, **kwargs):  # noqa: ARG001
-    """
-    Generic receiver for the Wagtail page_published, page_unpublished, and
-    post_page_move signals. The most important part of the kwargs passed in all
-    of these is the page instance so we can use the same receiver for all of them.
-
-    For post_page_move, we also look for the url_path_before arg and only
-    process this if the path_before and path_after are different.
-    """
-    instance = kwargs["instance"]
-
-    if "url_path_before" in kwargs:  # noqa: SIM102
-        if kwargs["url_path_before"] == kwargs["url_path_after"]:
-            return
-
-    logger.info(f"Queueing Fastly purge for {instance.id} - {instance.title}")  # noqa: G004
-
-    queue_fastly_purge_url.delay(instance.id)
-
-
+@receiver(page_published, dispatch_uid="flex_pricing_field_check_page_published")
 def flex_pricing_field_check(sender, **kwargs):  # noqa: ARG001
     """
     Receives the Wagtail page_published signal and, if it's for a flexible
@@ -55,8 +61,173 @@ def flex_pricing_field_check(sender, **kwargs):  # noqa: ARG001
             logger.info("Form changed (or needs changes)")
 
 
-page_published.connect(fastly_purge_url_receiver)
-page_unpublished.connect(fastly_purge_url_receiver)
-post_page_move.connect(fastly_purge_url_receiver)
+@receiver(page_published, dispatch_uid="product_page_cache_page_published")
+@receiver(page_unpublished, dispatch_uid="product_page_cache_page_unpublished")
+def expire_product_pages_on_publish(sender, **kwargs):  # pylint:disable=unused-argument  # noqa: ARG001
+    """
+    Expire the cached product page data when a page is published, since it
+    includes the instructor pages linked to course and program pages.
+    """
+    clear_product_page_cache()
+
+
+@receiver(post_save, sender=CourseRun, dispatch_uid="product_page_cache_courserun_save")
+@receiver(
+    post_delete, sender=CourseRun, dispatch_uid="product_page_cache_courserun_delete"
+)
+@receiver(post_save, sender=Product, dispatch_uid="product_page_cache_product_save")
+def expire_product_pages_on_run_change(sender, **kwargs):  # pylint:disable=unused-argument  # noqa: ARG001
+    """
+    Expire the cached product page data when a course run is changed (including by
+    a sync from edX) or a product is changed.
+    """
+    clear_product_page_cache()
 
-page_published.connect(flex_pricing_field_check)
+
+@receiver(page_published, dispatch_uid="finaid_form_urls_page_published")
+@receiver(page_unpublished, dispatch_uid="finaid_form_urls_page_unpublished")
+@receiver(post_page_move, dispatch_uid="finaid_form_urls_page_move")
+def expire_finaid_form_urls_on_publish(sender, **kwargs):  # pylint:disable=unused-argument  # noqa: ARG001
+    """
+    Expire the cached financial assistance form URLs when a page is published,
+    unpublished or moved.
+    """
+    clear_financial_assistance_form_urls()
+
+
+@receiver(
+    post_save, sender=CoursePage, dispatch_uid="finaid_form_urls_course_page_save"
+)
+@receiver(
+    post_delete, sender=CoursePage, dispatch_uid="finaid_form_urls_course_page_delete"
+)
+@receiver(
+    post_save, sender=ProgramPage, dispatch_uid="finaid_form_urls_program_page_save"
+)
+@receiver(
+    post_delete, sender=ProgramPage, dispatch_uid="finaid_form_urls_program_page_delete"
+)
+@receiver(
+    post_save,
+    sender=FlexiblePricingRequestForm,
+    dispatch_uid="finaid_form_urls_form_save",
+)
+@receiver(
+    post_delete,
+    sender=FlexiblePricingRequestForm,
+    dispatch_uid="finaid_form_urls_form_delete",
+)
+@receiver(
+    post_save,
+    sender=ProgramRequirement,
+    dispatch_uid="finaid_form_urls_requirement_save",
+)
+@receiver(
+    post_delete,
+    sender=ProgramRequirement,
+    dispatch_uid="finaid_form_urls_requirement_delete",
+)
+@receiver(
+    post_save, sender=RelatedProgram, dispatch_uid="finaid_form_urls_related_save"
+)
+@receiver(
+    post_delete, sender=RelatedProgram, dispatch_uid="finaid_form_urls_related_delete"
+)
+def expire_finaid_form_urls(sender, **kwargs):  # pylint:disable=unused-argument  # noqa: ARG001
+    """
+    Expire the cached financial assistance form URLs when a course page, program
+    page or form is saved outside of publishing, or when the programs a course
+    belongs to or the related programs change.
+    """
+    clear_financial_assistance_form_urls()
+
+
+@receiver(post_save, sender=CourseRun, dispatch_uid="featured_products_courserun_save")
+@receiver(
+    post_delete, sender=CourseRun, dispatch_uid="featured_products_courserun_delete"
+)
+@receiver(post_save, sender=CoursePage, dispatch_uid="featured_products_page_save")
+def refresh_featured_products(sender, instance, **kwargs):  # pylint:disable=unused-argument  # noqa: ARG001
+    """
+    Update the cached data and enrollment windows of a featured course when its
+    runs or page change, including when the page is republished.
+    """
+    update_featured_products([instance.course_id])
+
+
+@receiver(post_save, sender=Image, dispatch_uid="image_renditions_post_save")
+def warm_uploaded_image_renditions(sender, instance, update_fields, **kwargs):  # pylint:disable=unused-argument  # noqa: ARG001
+    """
+    Generate the renditions of an image in the background when it is uploaded.
+    """
+    if update_fields == {"file_hash"}:
+        # this was saved by the warm-up itself
+        return
+    transaction.on_commit(lambda: warm_image_renditions.delay([instance.id]))
+
+
+@receiver(page_published, dispatch_uid="image_renditions_page_published")
+def warm_published_page_renditions(sender, instance, **kwargs):  # pylint:disable=unused-argument  # noqa: ARG001
+    """
+    Generate the renditions of the images a page uses in the background when it
+    is published.
+    """
+    page = instance.specific
+    image_ids = [
+        getattr(page, field.attname)
+        for field in page._meta.get_fields()  # noqa: SLF001
+        if isinstance(field, models.ForeignKey)
+        and issubclass(field.related_model, Image)
+        and getattr(page, field.attname)
+    ]
+    if image_ids:
+        transaction.on_commit(lambda: warm_image_renditions.delay(image_ids))
+
+
+@receiver(page_published, dispatch_uid="fastly_purge_page_published")
+@receiver(page_unpublished, dispatch_uid="fastly_purge_page_unpublished")
+@receiver(post_page_move, dispatch_uid="fastly_purge_page_move")
+def purge_page_from_fastly(sender, instance, **kwargs):  # pylint:disable=unused-argument  # noqa: ARG001
+    """
+    Purge a page from the Fastly cache when it is published, unpublished or moved.
+    """
+    surrogate_keys = get_page_surrogate_keys(instance.specific)
+    transaction.on_commit(lambda: queue_fastly_purge_keys(surrogate_keys))
+
+
+@receiver(post_save, sender=CourseRun, dispatch_uid="fastly_purge_courserun_save")
+@receiver(post_delete, sender=CourseRun, dispatch_uid="fastly_purge_courserun_delete")
+@receiver(post_save, sender=Course, dispatch_uid="fastly_purge_course_save")
+@receiver(post_save, sender=Program, dispatch_uid="fastly_purge_program_save")
+def purge_courseware_from_fastly(sender, instance, **kwargs):  # pylint:disable=unused-argument  # noqa: ARG001
+    """
+    Purge the pages that show a course or program from the Fastly cache when it or
+    one of its runs changes (including by a sync from edX).
+    """
+    if not settings.MITX_ONLINE_FASTLY_SERVICE_ID:
+        return
+    if isinstance(instance, Program):
+        surrogate_keys = get_courseware_surrogate_keys(program_ids=[instance.id])
+    else:
+        course_id = instance.id if isinstance(instance, Course) else instance.course_id
+        surrogate_keys = get_courseware_surrogate_keys(course_ids=[course_id])
+    transaction.on_commit(lambda: queue_fastly_purge_keys(surrogate_keys))
+
+
+@receiver(
+    post_save,
+    sender=CourseRunCertificate,
+    dispatch_uid="certificate_page_course_certificate_save",
+)
+@receiver(
+    post_save,
+    sender=ProgramCertificate,
+    dispatch_uid="certificate_page_program_certificate_save",
+)
+def expire_certificate_page(sender, instance, created, **kwargs):  # pylint:disable=unused-argument  # noqa: ARG001
+    """
+    Expire the cached page of a certificate when it changes after being created,
+    which is how certificates are revoked and un-revoked.
+    """
+    if not created:
+        clear_certificate_page_cache(instance)
@@ -2,12 +2,25 @@ import logging
 from urllib.parse import urljoin, urlparse
 
 import requests
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
 from django.core.cache import caches
+from django.http import Http404, HttpRequest
+from django_redis import get_redis_connection
 from mitol.common.decorators import single_task
+from wagtail.images.models import Image
 
 from cms.api import create_featured_items
-from cms.constants import ONE_MINUTE
-from cms.models import Page
+from cms.constants import (
+    FASTLY_PURGE_BATCH_SIZE,
+    FASTLY_PURGE_KEYS_SET,
+    FASTLY_PURGE_SCHEDULED_KEY,
+    FEATURED_PRODUCTS_CACHE_KEY,
+    IMAGE_RENDITION_FILTER_SPECS,
+    ONE_MINUTE,
+)
+from cms.models import CertificateIndexPage
+from courses.models import CourseRunCertificate, ProgramCertificate
 from main.celery import app
 from main.settings import (
     MITX_ONLINE_FASTLY_AUTH_TOKEN,
@@ -15,6 +28,19 @@ from main.settings import (
     SITE_BASE_URL,
 )
 
+_fastly_session = None
+
+
+def get_fastly_session():
+    """
+    Returns the requests session used for Fastly API calls, so that purges reuse
+    pooled connections instead of opening a new one each time.
+    """
+    global _fastly_session  # noqa: PLW0603
+    if _fastly_session is None:
+        _fastly_session = requests.Session()
+    return _fastly_session
+
 
 def call_fastly_purge_api(relative_url):
     """
@@ -41,7 +67,7 @@ def call_fastly_purge_api(relative_url):
 
     api_url = urljoin(MITX_ONLINE_FASTLY_URL, relative_url)
 
-    resp = requests.request("PURGE", api_url, headers=headers)  # noqa: S113
+    resp = get_fastly_session().request("PURGE", api_url, headers=headers)  # noqa: S113
 
     if resp.status_code >= 400:  # noqa: PLR2004
         logger.error(f"Fastly API Purge call failed: {resp.status_code} {resp.reason}")  # noqa: G004
@@ -52,27 +78,18 @@ def call_fastly_purge_api(relative_url):
         return resp.json()
 
 
-@app.task
-def queue_fastly_purge_url(page_id):
+@app.task()
+def queue_fastly_full_purge():
     """
-    Purges the given page_id from the Fastly cache. This should happen on a
-    handful of Wagtail signals:
-    - page_published
-    - page_unpublished
-    - post_page_move
+    Purges everything from the Fastly cache.
+
+    Passing * to the purge API instructs Fastly to purge everything.
     """
     logger = logging.getLogger("fastly_purge")
 
-    logger.info(f"Processing purge request for {page_id}")  # noqa: G004
-
-    page = Page.objects.get(pk=page_id)
-
-    logger.debug(f"Page URL is {page.get_url()}")  # noqa: G004
-
-    if page is None:
-        raise Exception(f"Page {page_id} not found.")  # noqa: EM102, TRY002
+    logger.info("Purging all pages from the Fastly cache...")
 
-    resp = call_fastly_purge_api(page.get_url())
+    resp = call_fastly_purge_api("*")
 
     if resp and resp["status"] == "ok":
         logger.info("Purge request processed OK.")
@@ -81,24 +98,111 @@ def queue_fastly_purge_url(page_id):
     logger.error("Purge request failed.")  # noqa: RET503
 
 
-@app.task()
-def queue_fastly_full_purge():
+def call_fastly_surrogate_key_purge_api(surrogate_keys):
     """
-    Purges everything from the Fastly cache.
+    Calls the Fastly bulk purge API to soft purge every cached response that is
+    tagged with any of the given surrogate keys.
 
-    Passing * to the purge API instructs Fastly to purge everything.
+    Args:
+        - surrogate_keys  The surrogate keys to purge (at most 256).
+    Returns:
+        - Dict of the response (resp.json), or False if there was an error.
     """
     logger = logging.getLogger("fastly_purge")
 
-    logger.info("Purging all pages from the Fastly cache...")
+    headers = {"fastly-soft-purge": "1", "accept": "application/json"}
 
-    resp = call_fastly_purge_api("*")
+    if settings.MITX_ONLINE_FASTLY_AUTH_TOKEN:
+        headers["fastly-key"] = settings.MITX_ONLINE_FASTLY_AUTH_TOKEN
 
-    if resp and resp["status"] == "ok":
-        logger.info("Purge request processed OK.")
-        return True
+    api_url = urljoin(
+        settings.MITX_ONLINE_FASTLY_URL,
+        f"/service/{settings.MITX_ONLINE_FASTLY_SERVICE_ID}/purge",
+    )
 
-    logger.error("Purge request failed.")  # noqa: RET503
+    resp = get_fastly_session().post(
+        api_url,
+        headers=headers,
+        json={"surrogate_keys": list(surrogate_keys)},
+        timeout=30,
+    )
+
+    if resp.status_code >= 400:  # noqa: PLR2004
+        logger.error(f"Fastly API Purge call failed: {resp.status_code} {resp.reason}")  # noqa: G004
+        logger.error(f"Fastly returned: {resp.text}")  # noqa: G004
+        return False
+    else:
+        logger.info(f"Fastly returned: {resp.text}")  # noqa: G004
+        return resp.json()
+
+
+def queue_fastly_purge_keys(surrogate_keys):
+    """
+    Adds surrogate keys to the set of keys waiting to be purged from Fastly, and
+    schedules a purge if one isn't scheduled already. Keys queued in quick
+    succession (for example by a course run sync) are purged together.
+
+    Args:
+        surrogate_keys (iterable of str): the surrogate keys to purge
+    """
+    surrogate_keys = set(surrogate_keys)
+    if not surrogate_keys or not settings.MITX_ONLINE_FASTLY_SERVICE_ID:
+        return
+
+    get_redis_connection("redis").sadd(_get_fastly_purge_keys_set(), *surrogate_keys)
+    _schedule_fastly_purge()
+
+
+def _get_fastly_purge_keys_set():
+    """
+    Returns the redis key of the set of queued surrogate keys. The set is written
+    with the raw redis connection, so the key gets the redis cache's prefix here.
+    """
+    return caches["redis"].make_key(FASTLY_PURGE_KEYS_SET)
+
+
+def _schedule_fastly_purge():
+    """
+    Schedules a purge of the queued surrogate keys, unless one is scheduled already
+    """
+    delay = settings.MITX_ONLINE_FASTLY_PURGE_DELAY
+    if caches["redis"].add(FASTLY_PURGE_SCHEDULED_KEY, True, delay + 5 * ONE_MINUTE):  # noqa: FBT003
+        purge_fastly_surrogate_keys.apply_async(countdown=delay)
+
+
+@app.task
+def purge_fastly_surrogate_keys():
+    """
+    Purges the queued surrogate keys from the Fastly cache, in batches of the most
+    keys that Fastly accepts in one request. Each batch is popped from the queue
+    before it is purged, so a key queued again meanwhile stays queued for the next
+    purge. The keys of a failed purge are queued again and tried later.
+    """
+    logger = logging.getLogger("fastly_purge")
+
+    # keys queued from here on schedule another purge
+    caches["redis"].delete(FASTLY_PURGE_SCHEDULED_KEY)
+    connection = get_redis_connection("redis")
+    keys_set = _get_fastly_purge_keys_set()
+
+    while True:
+        surrogate_keys = sorted(
+            key.decode() for key in connection.spop(keys_set, FASTLY_PURGE_BATCH_SIZE)
+        )
+        if not surrogate_keys:
+            break
+
+        logger.info(f"Purging {len(surrogate_keys)} surrogate keys from Fastly")  # noqa: G004
+        try:
+            resp = call_fastly_surrogate_key_purge_api(surrogate_keys)
+        except requests.RequestException:
+            logger.exception("Fastly API Purge call failed")
+            resp = False
+        if resp is False:
+            logger.error("Purge request failed.")
+            connection.sadd(keys_set, *surrogate_keys)
+            _schedule_fastly_purge()
+            break
 
 
 @app.task
@@ -112,9 +216,74 @@ def refresh_featured_homepage_items():
     # if the key is not found, the ttl will be 0 per their docs
     # https://github.com/jazzband/django-redis?tab=readme-ov-file#get-ttl-time-to-live-from-key
     redis_cache = caches["redis"]
-    if redis_cache.ttl("CMS_homepage_featured_courses") > (10 * ONE_MINUTE):
+    if redis_cache.ttl(FEATURED_PRODUCTS_CACHE_KEY) > (10 * ONE_MINUTE):
         logger.info("Featured courses found in cache, moving on")
         return
     logger.info("No featured courses found in cache, refreshing")
     create_featured_items()
     logger.info("New featured items created")
+
+
+@app.task
+def warm_image_renditions(image_ids):
+    """
+    Generates the renditions of images that the site's templates use, and the file
+    hashes that image URLs use for cache busting, so that requests don't have to.
+    """
+    logger = logging.getLogger("warm_image_renditions")
+    for image in Image.objects.filter(id__in=image_ids).prefetch_renditions(
+        *IMAGE_RENDITION_FILTER_SPECS
+    ):
+        try:
+            image.get_file_hash()
+            image.get_renditions(*IMAGE_RENDITION_FILTER_SPECS)
+        except OSError:  # noqa: PERF203
+            logger.exception("Unable to generate renditions for image %s", image.id)
+
+
+def _get_anonymous_request(path):
+    """
+    Returns a GET request for the given path on the site, as an anonymous visitor
+    would make it
+    """
+    site_url = urlparse(SITE_BASE_URL)
+    request = HttpRequest()
+    request.method = "GET"
+    request.path = request.path_info = path
+    request.META["SERVER_NAME"] = site_url.hostname
+    request.META["SERVER_PORT"] = site_url.port or (
+        443 if site_url.scheme == "https" else 80
+    )
+    request.user = AnonymousUser()
+    return request
+
+
+@app.task
+def prerender_certificate_pages(course_certificate_ids=(), program_certificate_ids=()):
+    """
+    Renders and caches the pages of new certificates, so that the first visits to
+    their shared links don't have to.
+    """
+    logger = logging.getLogger("prerender_certificate_pages")
+    certificate_index_page = CertificateIndexPage.objects.live().first()
+    if certificate_index_page is None:
+        return
+
+    certificates = [
+        (certificate_index_page.course_certificate, certificate)
+        for certificate in CourseRunCertificate.objects.filter(
+            id__in=course_certificate_ids
+        )
+    ] + [
+        (certificate_index_page.program_certificate, certificate)
+        for certificate in ProgramCertificate.objects.filter(
+            id__in=program_certificate_ids
+        )
+    ]
+    for serve_certificate, certificate in certificates:
+        try:
+            serve_certificate(
+                _get_anonymous_request(certificate.link), str(certificate.uuid)
+            )
+        except Http404:  # noqa: PERF203
+            logger.info("Certificate %s has no certificate page", certificate.uuid)
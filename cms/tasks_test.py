@@ -0,0 +1,238 @@
+"""Tests for CMS celery tasks"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import urljoin
+
+import pytest
+import requests
+import wagtail_factories
+from django.core.cache import caches
+from django_redis import get_redis_connection
+from wagtail.images.models import Image
+
+from cms import tasks
+from cms.api import ensure_certificate_index
+from cms.constants import (
+    CERTIFICATE_PAGE_CACHE_KEY,
+    FASTLY_PURGE_KEYS_SET,
+    FASTLY_PURGE_SCHEDULED_KEY,
+    IMAGE_RENDITION_FILTER_SPECS,
+)
+from cms.factories import (
+    CoursePageFactory,
+    InstructorPageFactory,
+    ProgramPageFactory,
+)
+from cms.tasks import (
+    prerender_certificate_pages,
+    purge_fastly_surrogate_keys,
+    queue_fastly_purge_keys,
+    warm_image_renditions,
+)
+from courses.factories import (
+    CourseRunCertificateFactory,
+    ProgramCertificateFactory,
+)
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.mark.usefixtures("generates_renditions")
+def test_warm_image_renditions():
+    """warm_image_renditions should store the file hash and generate the renditions of images"""
+    image = wagtail_factories.ImageFactory.create()
+    Image.objects.filter(id=image.id).update(file_hash="")
+
+    warm_image_renditions([image.id])
+
+    image.refresh_from_db()
+    assert image.file_hash != ""
+    assert set(image.renditions.values_list("filter_spec", flat=True)) == set(
+        IMAGE_RENDITION_FILTER_SPECS
+    )
+
+
+def test_warm_image_renditions_on_publish(mocker, django_capture_on_commit_callbacks):
+    """Publishing a page should generate the renditions of its images in the background"""
+    patched_warm = mocker.patch("cms.signalreceivers.warm_image_renditions")
+    page = InstructorPageFactory.create()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        page.save_revision().publish()
+
+    patched_warm.delay.assert_called_once_with([page.feature_image_id])
+
+
+def get_queued_surrogate_keys():
+    """Return the surrogate keys that are queued for purging"""
+    return {
+        key.decode()
+        for key in get_redis_connection("redis").smembers(
+            caches["redis"].make_key(FASTLY_PURGE_KEYS_SET)
+        )
+    }
+
+
+@pytest.fixture
+def fastly_stub(settings, mocker):
+    """Run a local server that records the purge requests sent to the Fastly API"""
+    purge_requests = []
+
+    class FastlyStubHandler(BaseHTTPRequestHandler):
+        """Responds to Fastly bulk purge requests"""
+
+        def do_POST(self):  # noqa: N802
+            """Record the purge request and respond with a purge id for each key"""
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            purge_requests.append((self.path, dict(self.headers), body))
+            payload = json.dumps(
+                {key: "purge-id" for key in body["surrogate_keys"]}
+            ).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            """Don't log requests"""
+
+    server = HTTPServer(("127.0.0.1", 0), FastlyStubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    settings.MITX_ONLINE_FASTLY_URL = f"http://127.0.0.1:{server.server_port}"
+    settings.MITX_ONLINE_FASTLY_SERVICE_ID = "service-id"
+    settings.MITX_ONLINE_FASTLY_AUTH_TOKEN = "token"  # noqa: S105
+    session = requests.Session()
+    mocker.patch.object(tasks, "_fastly_session", session)
+
+    yield purge_requests
+
+    session.close()
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+def test_purge_fastly_surrogate_keys(fastly_stub):
+    """Queued surrogate keys should be purged in batches with the Fastly bulk purge API"""
+    surrogate_keys = {f"course-{course_id}" for course_id in range(300)}
+
+    queue_fastly_purge_keys(surrogate_keys)
+
+    assert len(fastly_stub) == 2
+    purged_keys = set()
+    for path, headers, body in fastly_stub:
+        assert path == "/service/service-id/purge"
+        assert headers["fastly-key"] == "token"
+        assert headers["fastly-soft-purge"] == "1"
+        assert len(body["surrogate_keys"]) <= 256
+        purged_keys.update(body["surrogate_keys"])
+    assert purged_keys == surrogate_keys
+    assert get_queued_surrogate_keys() == set()
+    assert caches["redis"].get(FASTLY_PURGE_SCHEDULED_KEY) is None
+
+
+def test_queue_fastly_purge_keys_coalesces(fastly_stub, mocker):
+    """Keys queued while a purge is scheduled should be purged by that same purge"""
+    patched_purge = mocker.patch("cms.tasks.purge_fastly_surrogate_keys")
+
+    queue_fastly_purge_keys(["course-1", "catalog"])
+    queue_fastly_purge_keys(["course-2", "catalog"])
+
+    patched_purge.apply_async.assert_called_once()
+    purge_fastly_surrogate_keys()
+    assert [body["surrogate_keys"] for _, _, body in fastly_stub] == [
+        ["catalog", "course-1", "course-2"]
+    ]
+
+
+def test_purge_fastly_surrogate_keys_requeued_during_purge(fastly_stub, mocker):
+    """A key queued again while its purge is in flight should stay queued and be purged again"""
+    purge_api = tasks.call_fastly_surrogate_key_purge_api
+    patched_purge = mocker.patch("cms.tasks.purge_fastly_surrogate_keys")
+    queue_fastly_purge_keys(["course-1", "catalog"])
+
+    def requeue_and_purge(surrogate_keys):
+        """Queue course-1 again as if it changed during the purge request"""
+        if len(fastly_stub) == 0:
+            get_redis_connection("redis").sadd(
+                caches["redis"].make_key(FASTLY_PURGE_KEYS_SET), "course-1"
+            )
+        return purge_api(surrogate_keys)
+
+    mocker.patch(
+        "cms.tasks.call_fastly_surrogate_key_purge_api", side_effect=requeue_and_purge
+    )
+
+    purge_fastly_surrogate_keys()
+
+    assert [body["surrogate_keys"] for _, _, body in fastly_stub] == [
+        ["catalog", "course-1"],
+        ["course-1"],
+    ]
+    assert get_queued_surrogate_keys() == set()
+    patched_purge.apply_async.assert_called_once()
+
+
+@pytest.mark.parametrize(
+    "purge_api_result",
+    [
+        {"side_effect": requests.ConnectionError("connection refused")},
+        {"return_value": False},
+    ],
+)
+def test_purge_fastly_surrogate_keys_failure(fastly_stub, mocker, purge_api_result):
+    """Keys should be queued again and another purge should be scheduled when a purge fails"""
+    queue_fastly_purge_keys(["course-1", "catalog"])
+    assert len(fastly_stub) == 1
+    assert get_queued_surrogate_keys() == set()
+    mocker.patch("cms.tasks.call_fastly_surrogate_key_purge_api", **purge_api_result)
+    patched_purge = mocker.patch("cms.tasks.purge_fastly_surrogate_keys")
+    get_redis_connection("redis").sadd(
+        caches["redis"].make_key(FASTLY_PURGE_KEYS_SET), "course-2", "catalog"
+    )
+
+    purge_fastly_surrogate_keys()
+
+    assert get_queued_surrogate_keys() == {"course-2", "catalog"}
+    patched_purge.apply_async.assert_called_once()
+    assert caches["redis"].get(FASTLY_PURGE_SCHEDULED_KEY) is True
+
+
+@pytest.mark.usefixtures("generates_renditions")
+@pytest.mark.parametrize("is_program", [False, True])
+def test_prerender_certificate_pages(
+    mocker, settings, fully_configured_wagtail, is_program
+):
+    """prerender_certificate_pages should cache the rendered pages of certificates"""
+    mocker.patch(
+        "hubspot_sync.management.commands.configure_hubspot_properties._upsert_custom_properties",
+    )
+    ensure_certificate_index()
+    if is_program:
+        program_page = ProgramPageFactory.create()
+        program_page.certificate_page.save_revision()
+        certificate = ProgramCertificateFactory.create(program=program_page.program)
+        certificate_ids = {"program_certificate_ids": [certificate.id]}
+    else:
+        course_page = CoursePageFactory.create()
+        course_page.certificate_page.save_revision()
+        certificate = CourseRunCertificateFactory.create(
+            course_run__course=course_page.course
+        )
+        certificate_ids = {"course_certificate_ids": [certificate.id]}
+    cache_key = CERTIFICATE_PAGE_CACHE_KEY.format(
+        uuid=certificate.uuid,
+        revision_id=certificate.certificate_page_revision_id,
+        version=settings.VERSION,
+    )
+    caches["redis"].delete(cache_key)
+
+    prerender_certificate_pages(**certificate_ids)
+
+    content = caches["redis"].get(cache_key).decode()
+    assert certificate.user.get_full_name() in content
+    assert urljoin(settings.SITE_BASE_URL, certificate.link) in content
@@ -5,6 +5,8 @@ from typing import List  # noqa: UP035
 from wagtail import hooks
 from wagtail.admin.api.views import PagesAdminAPIViewSet
 
+from cms.api import get_page_surrogate_keys
+
 DEFAULT_ORDER = (
     "{prefix}coursepage__course__readable_id".format(prefix=""),
     "title",
@@ -49,3 +51,9 @@ class OrderedPagesAPIEndpoint(PagesAdminAPIViewSet):
 def configure_admin_api_default_order(router):
     """Swap admin pages API for our own flavor that orders results by title"""
     router.register_endpoint("pages", OrderedPagesAPIEndpoint)
+
+
+@hooks.register("before_serve_page")
+def tag_page_surrogate_keys(page, request, serve_args, serve_kwargs):  # pylint: disable=unused-argument  # noqa: ARG001
+    """Tag the served page with surrogate keys so it can be purged from Fastly by key"""
+    request.surrogate_keys = get_page_surrogate_keys(page)
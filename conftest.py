@@ -3,6 +3,7 @@
 from types import SimpleNamespace  # noqa: F401
 
 import pytest
+from django.core.cache import caches
 
 from fixtures.common import *  # noqa: F403
 from main import features
@@ -23,6 +24,21 @@ def mocked_product_signal(mocker):  # noqa: PT004
     mocker.patch("ecommerce.signals.sync_hubspot_product")
 
 
+@pytest.fixture(autouse=True)
+def mocked_image_renditions_signal(mocker):  # noqa: PT004
+    """Mock the task that generates image renditions when images are saved or published"""
+    mocker.patch("cms.signalreceivers.warm_image_renditions")
+
+
+@pytest.fixture(autouse=True)
+def clear_redis_cache():  # noqa: PT004
+    """
+    Clear the redis cache, since ids are reused between test runs. pytest.ini gives
+    its keys a test-only prefix, so this only deletes the keys set by tests.
+    """
+    caches["redis"].delete_pattern("*")
+
+
 def pytest_addoption(parser):
     """Pytest hook that adds command line parameters"""
     parser.addoption(
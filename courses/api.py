@@ -687,6 +687,8 @@ def generate_course_run_certificates():
     """
     Hits the edX grades API for eligible course runs and generates the certificates and grades for users for course runs
     """
+    from cms.tasks import prerender_certificate_pages
+
     now = now_in_utc()
     course_runs = get_certificate_grade_eligible_runs(now)
 
@@ -703,6 +705,7 @@ def generate_course_run_certificates():
             0,
             0,
         )
+        generated_certificate_ids = []
         for edx_grade, user in edx_grade_user_iter:
             course_run_grade, created, updated = ensure_course_run_grade(
                 user=user, course_run=run, edx_grade=edx_grade, should_update=True
@@ -721,7 +724,7 @@ def generate_course_run_certificates():
             if run.is_self_paced or (
                 run.certificate_available_date and run.certificate_available_date <= now
             ):
-                _, created, deleted = process_course_run_grade_certificate(
+                certificate, created, deleted = process_course_run_grade_certificate(
                     course_run_grade=course_run_grade
                 )
 
@@ -734,6 +737,11 @@ def generate_course_run_certificates():
                         "Certificate created for user %s and course_run %s", user, run
                     )
                     generated_certificates_count += 1
+                    generated_certificate_ids.append(certificate.id)
+        if generated_certificate_ids:
+            prerender_certificate_pages.delay(
+                course_certificate_ids=generated_certificate_ids
+            )
         log.info(
             f"Finished processing course run {run}: created grades for {created_grades_count} users, updated grades for {updated_grades_count} users, generated certificates for {generated_certificates_count} users"  # noqa: G004
         )
@@ -865,6 +873,7 @@ def generate_program_certificate(user, program, force_create=False):  # noqa: FB
         ProgramCertificate (or None if one was not found or created) paired
         with a boolean indicating whether the certificate was newly created.
     """
+    from cms.tasks import prerender_certificate_pages
     from hubspot_sync.task_helpers import sync_hubspot_user
 
     existing_cert_queryset = ProgramCertificate.all_objects.filter(
@@ -887,6 +896,11 @@ def generate_program_certificate(user, program, force_create=False):  # noqa: FB
             program.title,
         )
         sync_hubspot_user(user)
+        transaction.on_commit(
+            lambda: prerender_certificate_pages.delay(
+                program_certificate_ids=[program_cert.id]
+            )
+        )
         _, created = ProgramEnrollment.objects.get_or_create(
             program=program, user=user, defaults={"active": True, "change_status": None}
         )
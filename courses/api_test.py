@@ -1259,7 +1259,9 @@ def test_generate_program_certificate_failure_not_all_passed(
     assert len(ProgramCertificate.objects.all()) == 0
 
 
-def test_generate_program_certificate_success_single_requirement_course(user, mocker):
+def test_generate_program_certificate_success_single_requirement_course(
+    user, mocker, django_capture_on_commit_callbacks
+):
     """
     Test that generate_program_certificate generates a program certificate for a Program with a single required Course.
     """
@@ -1284,12 +1286,17 @@ def test_generate_program_certificate_success_single_requirement_course(user, mo
     CourseRunGradeFactory.create(course_run=course_run, user=user, passed=True, grade=1)
 
     CourseRunCertificateFactory.create(user=user, course_run=course_run)
+    patched_prerender = mocker.patch("cms.tasks.prerender_certificate_pages")
 
-    certificate, created = generate_program_certificate(user=user, program=program)
+    with django_capture_on_commit_callbacks(execute=True):
+        certificate, created = generate_program_certificate(user=user, program=program)
     assert created is True
     assert isinstance(certificate, ProgramCertificate)
     assert len(ProgramCertificate.objects.all()) == 1
     patched_sync_hubspot_user.assert_called_once_with(user)
+    patched_prerender.delay.assert_called_once_with(
+        program_certificate_ids=[certificate.id]
+    )
 
 
 def test_generate_program_certificate_success_multiple_required_courses(user, mocker):
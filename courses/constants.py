@@ -36,3 +36,9 @@ AVAILABILITY_ANYTIME = "anytime"
 AVAILABILITY_DATED = "dated"
 AVAILABILITY_TYPES = [AVAILABILITY_ANYTIME, AVAILABILITY_DATED]
 AVAILABILITY_CHOICES = list(zip(AVAILABILITY_TYPES, AVAILABILITY_TYPES))
+
+PROGRAM_REQUIREMENTS_CACHE_KEY = "courses_program_requirements_{program_id}"
+PROGRAM_REQUIREMENTS_CACHE_AGE = 60 * 60  # 1 hour
+
+LEARNER_RECORD_SHARE_CACHE_KEY = "courses_learner_record_share_{share_uuid}"
+LEARNER_RECORD_SHARE_CACHE_AGE = 60 * 60  # 1 hour
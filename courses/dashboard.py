@@ -0,0 +1,113 @@
+"""Data for the learner dashboard loaded for all of a user's enrollments at once"""
+
+from django.utils.functional import cached_property
+
+from courses.models import CourseRunCertificate, CourseRunGrade
+from courses.utils import filter_pages_with_certificate_page
+from flexiblepricing.api import (
+    get_approved_flexible_prices,
+    get_bulk_eligible_courseware_keys,
+)
+
+
+def prefetch_dashboard_enrollments(queryset):
+    """
+    Loads the runs, courses, course pages, products and departments that the
+    dashboard serializes for course run enrollments, with a fixed number of queries
+
+    Args:
+        queryset (QuerySet of CourseRunEnrollment): the enrollments
+    Returns:
+        QuerySet of CourseRunEnrollment: the enrollments with related objects loaded
+    """
+    return queryset.select_related("run__course__page__feature_image").prefetch_related(
+        "run__products",
+        "run__course__courseruns__products",
+        "run__course__departments",
+        "run__course__page__linked_instructors__linked_instructor_page",
+    )
+
+
+class DashboardEnrollmentPreloader:
+    """
+    Loads the certificates, grades and flexible price approvals for a user's course run
+    enrollments in a fixed number of queries. Enrollment serializers use it when it is
+    in their context as "dashboard_preloader", instead of querying for each enrollment.
+    """
+
+    def __init__(self, user, enrollments):
+        self.user = user
+        self.enrollments = list(enrollments)
+
+    @cached_property
+    def certificate_page_course_ids(self) -> set:
+        """The ids of the enrolled courses that have a certificate page"""
+        pages = {
+            enrollment.run.course_id: enrollment.run.course.page
+            for enrollment in self.enrollments
+            if getattr(enrollment.run.course, "page", None) is not None
+        }
+        return {
+            page.course_id
+            for page in filter_pages_with_certificate_page(list(pages.values()))
+        }
+
+    @cached_property
+    def certificates(self) -> dict:
+        """The user's course run certificates, keyed by course run id"""
+        run_ids = {
+            enrollment.run_id
+            for enrollment in self.enrollments
+            if enrollment.run.course_id in self.certificate_page_course_ids
+        }
+        if not run_ids:
+            return {}
+        return {
+            certificate.course_run_id: certificate
+            for certificate in CourseRunCertificate.objects.filter(
+                user=self.user, course_run_id__in=run_ids
+            )
+        }
+
+    @cached_property
+    def grades(self) -> dict:
+        """Lists of the user's course run grades, keyed by course run id"""
+        if not self.enrollments:
+            return {}
+        grades = {}
+        for grade in CourseRunGrade.objects.filter(
+            user=self.user,
+            course_run_id__in={enrollment.run_id for enrollment in self.enrollments},
+        ):
+            grades.setdefault(grade.course_run_id, []).append(grade)
+        return grades
+
+    @cached_property
+    def flexible_price_approved_run_ids(self) -> set:
+        """The ids of the enrolled course runs that the user has an approved flexible price for"""
+        flexible_prices = get_approved_flexible_prices(self.user)
+        if not flexible_prices or not self.enrollments:
+            return set()
+        courseware_keys = get_bulk_eligible_courseware_keys(
+            {enrollment.run.course for enrollment in self.enrollments}
+        )
+        return {
+            enrollment.run_id
+            for enrollment in self.enrollments
+            if any(
+                key in flexible_prices
+                for key in courseware_keys[enrollment.run.course_id]
+            )
+        }
+
+    def get_certificate(self, enrollment):
+        """Return the certificate for an enrollment, or None"""
+        return self.certificates.get(enrollment.run_id)
+
+    def get_grades(self, enrollment):
+        """Return the list of grades for an enrollment"""
+        return self.grades.get(enrollment.run_id, [])
+
+    def is_flexible_price_approved(self, enrollment) -> bool:
+        """Return true if the user has an approved flexible price for an enrollment's course run"""
+        return enrollment.run_id in self.flexible_price_approved_run_ids
@@ -0,0 +1,243 @@
+"""
+Builds learner program records from a cached copy of the program's requirements
+and a fixed number of queries for the learner's certificates, enrollments and grades
+"""
+
+from django.core.cache import caches
+from django.db.models import Q
+from mitol.common.utils import now_in_utc
+
+from courses.constants import (
+    LEARNER_RECORD_SHARE_CACHE_KEY,
+    PROGRAM_REQUIREMENTS_CACHE_AGE,
+    PROGRAM_REQUIREMENTS_CACHE_KEY,
+)
+from courses.models import (
+    Course,
+    CourseRunCertificate,
+    CourseRunEnrollment,
+    CourseRunGrade,
+    LearnerProgramRecordShare,
+    ProgramRequirement,
+    ProgramRequirementNodeType,
+)
+from openedx.constants import EDX_ENROLLMENT_VERIFIED_MODE
+
+REQUIRED_COURSES_REQTYPE = "Required Courses"
+ELECTIVE_COURSES_REQTYPE = "Elective Courses"
+
+
+def compile_program_requirements(program):
+    """
+    Compiles the requirements tree of a program into the data that a learner record
+    shows: the bulk dump of the tree, and the courses in the tree in order, along
+    with whether they are required or elective.
+
+    Args:
+        program (Program): the program
+
+    Returns:
+        dict: the "requirements" dump and the list of "courses"
+    """
+    root = program.get_requirements_root()
+    if root is None:
+        return {"requirements": [], "courses": []}
+
+    requirements = ProgramRequirement.dump_bulk(parent=root, keep_ids=True)
+
+    course_reqtypes = []
+
+    def _collect_courses(nodes, reqtype):
+        for node in nodes:
+            if node["data"]["node_type"] == ProgramRequirementNodeType.COURSE:
+                course_reqtypes.append((node["data"]["course"], reqtype))
+            _collect_courses(node.get("children", []), reqtype)
+
+    for operator in requirements[0].get("children", []):
+        _collect_courses(
+            [operator],
+            ELECTIVE_COURSES_REQTYPE
+            if operator["data"]["elective_flag"]
+            else REQUIRED_COURSES_REQTYPE,
+        )
+
+    courses = Course.objects.in_bulk([course_id for course_id, _ in course_reqtypes])
+    return {
+        "requirements": requirements,
+        "courses": [
+            {
+                "id": course_id,
+                "title": courses[course_id].title,
+                "readable_id": courses[course_id].readable_id,
+                "reqtype": reqtype,
+            }
+            for course_id, reqtype in course_reqtypes
+            if course_id in courses
+        ],
+    }
+
+
+def get_program_requirements(program):
+    """
+    Returns the compiled requirements of a program from the cache, compiling them if
+    they aren't cached.
+
+    Args:
+        program (Program): the program
+
+    Returns:
+        dict: the output of compile_program_requirements
+    """
+    return caches["redis"].get_or_set(
+        PROGRAM_REQUIREMENTS_CACHE_KEY.format(program_id=program.id),
+        lambda: compile_program_requirements(program),
+        PROGRAM_REQUIREMENTS_CACHE_AGE,
+    )
+
+
+def get_bulk_program_requirements(programs):
+    """
+    Returns the compiled requirements of several programs, reading them from the
+    cache together and compiling only the ones that aren't cached.
+
+    Args:
+        programs (iterable of Program): the programs
+
+    Returns:
+        dict: the output of compile_program_requirements, keyed by program id
+    """
+    programs = {program.id: program for program in programs}
+    cache_keys = {
+        PROGRAM_REQUIREMENTS_CACHE_KEY.format(program_id=program_id): program_id
+        for program_id in programs
+    }
+    cached = caches["redis"].get_many(cache_keys)
+    program_requirements = {
+        cache_keys[cache_key]: requirements
+        for cache_key, requirements in cached.items()
+    }
+    compiled = {
+        cache_key: compile_program_requirements(programs[program_id])
+        for cache_key, program_id in cache_keys.items()
+        if cache_key not in cached
+    }
+    if compiled:
+        caches["redis"].set_many(compiled, PROGRAM_REQUIREMENTS_CACHE_AGE)
+        program_requirements.update(
+            {
+                cache_keys[cache_key]: requirements
+                for cache_key, requirements in compiled.items()
+            }
+        )
+    return program_requirements
+
+
+def clear_program_requirements_cache(program_ids):
+    """
+    Expires the compiled requirements of programs
+
+    Args:
+        program_ids (iterable of int): the ids of the programs
+    """
+    caches["redis"].delete_many(
+        [
+            PROGRAM_REQUIREMENTS_CACHE_KEY.format(program_id=program_id)
+            for program_id in set(program_ids)
+        ]
+    )
+
+
+def clear_shared_learner_record_cache(shares):
+    """
+    Expires the cached learner records of record shares
+
+    Args:
+        shares (QuerySet of LearnerProgramRecordShare): the record shares
+    """
+    caches["redis"].delete_many(
+        [
+            LEARNER_RECORD_SHARE_CACHE_KEY.format(share_uuid=share_uuid)
+            for share_uuid in shares.values_list("share_uuid", flat=True)
+        ]
+    )
+
+
+def clear_course_shared_learner_record_cache(user_id, course_id):
+    """
+    Expires the cached learner records that a learner has shared for the programs
+    that a course is part of
+
+    Args:
+        user_id (int): the id of the learner
+        course_id (int): the id of the course
+    """
+    clear_shared_learner_record_cache(
+        LearnerProgramRecordShare.objects.filter(
+            user_id=user_id, program__all_requirements__course_id=course_id
+        ).distinct()
+    )
+
+
+def get_learner_record_courses(user, courses):
+    """
+    Finds the best grade and the latest certificate that a learner has for each of
+    the given courses. Grades are taken from the runs the learner has a certificate
+    for, or if there are none, from verified enrollments in runs whose certificates
+    are available (or that have ended, if there is no certificate available date).
+
+    Args:
+        user (User): the learner
+        courses (list of dict): the "courses" of compiled program requirements
+
+    Returns:
+        list of dict: the courses, each with its "grade" (CourseRunGrade) and
+            "certificate" (CourseRunCertificate), or None for either
+    """
+    course_ids = {course["id"] for course in courses}
+
+    run_course_ids = {}
+    certificates = {}
+    for certificate in (
+        CourseRunCertificate.objects.filter(
+            user=user, course_run__course_id__in=course_ids, is_revoked=False
+        )
+        .select_related("course_run")
+        .order_by("-created_on")
+    ):
+        run_course_ids[certificate.course_run_id] = certificate.course_run.course_id
+        certificates.setdefault(certificate.course_run.course_id, certificate)
+
+    uncertified_course_ids = course_ids - set(certificates)
+    if uncertified_course_ids:
+        now = now_in_utc()
+        run_course_ids.update(
+            CourseRunEnrollment.objects.filter(
+                Q(user=user)
+                & Q(run__course_id__in=uncertified_course_ids)
+                & Q(enrollment_mode=EDX_ENROLLMENT_VERIFIED_MODE)
+                & Q(change_status=None)
+                & (
+                    Q(run__certificate_available_date__lt=now)
+                    | (
+                        Q(run__certificate_available_date=None)
+                        & Q(run__end_date__lt=now)
+                    )
+                )
+            ).values_list("run_id", "run__course_id")
+        )
+
+    grades = {}
+    if run_course_ids:
+        for grade in CourseRunGrade.objects.filter(
+            user=user, course_run_id__in=run_course_ids
+        ).order_by("-grade"):
+            grades.setdefault(run_course_ids[grade.course_run_id], grade)
+
+    return [
+        {
+            **course,
+            "grade": grades.get(course["id"]),
+            "certificate": certificates.get(course["id"]),
+        }
+        for course in courses
+    ]
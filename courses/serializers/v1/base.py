@@ -95,6 +95,15 @@ class BaseCourseRunEnrollmentSerializer(serializers.ModelSerializer):
         if isinstance(enrollment, list):
             enrollment = enrollment[0] if enrollment else None
 
+        preloader = self.context.get("dashboard_preloader")
+        if preloader is not None and enrollment:
+            certificate = preloader.get_certificate(enrollment)
+            return (
+                CourseRunCertificateSerializer(certificate).data
+                if certificate
+                else None
+            )
+
         # No need to include a certificate if there is no corresponding wagtail page
         # to support the render
         try:
@@ -120,6 +129,10 @@ class BaseCourseRunEnrollmentSerializer(serializers.ModelSerializer):
             return None
 
     def get_approved_flexible_price_exists(self, instance):
+        preloader = self.context.get("dashboard_preloader")
+        if preloader is not None and not isinstance(instance, list):
+            return preloader.is_flexible_price_approved(instance)
+
         instance_run = instance[0].run if isinstance(instance, list) else instance.run
         instance_user = (
             instance[0].user if isinstance(instance, list) else instance.user
@@ -130,6 +143,12 @@ class BaseCourseRunEnrollmentSerializer(serializers.ModelSerializer):
         return flexible_price_exists  # noqa: RET504
 
     def get_grades(self, instance):
+        preloader = self.context.get("dashboard_preloader")
+        if preloader is not None and not isinstance(instance, list):
+            return CourseRunGradeSerializer(
+                instance=preloader.get_grades(instance), many=True
+            ).data
+
         instance_run = instance[0].run if isinstance(instance, list) else instance.run
         instance_user = (
             instance[0].user if isinstance(instance, list) else instance.user
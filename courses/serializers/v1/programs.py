@@ -1,11 +1,15 @@
 from django.contrib.auth.models import AnonymousUser
-from django.db.models import Q
-from mitol.common.utils import now_in_utc
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
 from cms.serializers import ProgramPageSerializer
 from courses import models
+from courses.records import (
+    ELECTIVE_COURSES_REQTYPE,
+    REQUIRED_COURSES_REQTYPE,
+    get_learner_record_courses,
+    get_program_requirements,
+)
 from courses.serializers.base import (
     BaseProgramRequirementTreeSerializer,
     get_thumbnail_url,
@@ -20,7 +24,6 @@ from courses.serializers.v1.courses import (
 )
 from courses.serializers.v1.departments import DepartmentSerializer
 from main.serializers import StrictFieldsSerializer
-from openedx.constants import EDX_ENROLLMENT_VERIFIED_MODE
 from users.models import User
 
 
@@ -33,21 +36,56 @@ class ProgramSerializer(serializers.ModelSerializer):
     page = serializers.SerializerMethodField()
     departments = DepartmentSerializer(many=True, read_only=True)
 
+    def _get_program_requirements(self, instance):
+        """
+        Returns the compiled requirements of the program if they were passed in the
+        context (with the "program_requirements" and "program_courses" keys)
+        """
+        return self.context.get("program_requirements", {}).get(instance.id)
+
     def get_courses(self, instance):
         """Serializer for courses"""
+        requirements = self._get_program_requirements(instance)
+        if requirements is not None:
+            program_courses = self.context["program_courses"]
+            courses = [
+                program_courses[course["id"]]
+                for course in requirements["courses"]
+                if course["id"] in program_courses
+            ]
+        else:
+            courses = [course[0] for course in instance.courses]
         return CourseWithCourseRunsSerializer(
-            [course[0] for course in instance.courses if course[0].live],
+            [course for course in courses if course.live],
             many=True,
             context={"include_page_fields": True},
         ).data
 
     def get_requirements(self, instance):
+        requirements = self._get_program_requirements(instance)
+        if requirements is not None:
+            return {
+                "required": [
+                    course["id"]
+                    for course in requirements["courses"]
+                    if course["reqtype"] == REQUIRED_COURSES_REQTYPE
+                ],
+                "electives": [
+                    course["id"]
+                    for course in requirements["courses"]
+                    if course["reqtype"] == ELECTIVE_COURSES_REQTYPE
+                ],
+            }
         return {
             "required": [course.id for course in instance.required_courses],
             "electives": [course.id for course in instance.elective_courses],
         }
 
     def get_req_tree(self, instance):
+        requirements = self._get_program_requirements(instance)
+        if requirements is not None:
+            return requirements["requirements"]
+
         req_root = instance.get_requirements_root()
 
         if req_root is None:
@@ -231,62 +269,26 @@ class LearnerRecordSerializer(serializers.BaseSerializer):
         if user is None:
             raise ValidationError("Valid user object not found")  # noqa: EM101
 
+        requirements = get_program_requirements(instance)
         courses = []
-        for course, requirement_type in instance.courses:
-            fmt_course = {
-                "title": course.title,
-                "id": course.id,
-                "readable_id": course.readable_id,
-                "reqtype": requirement_type,
-                "grade": None,
-                "certificate": None,
-            }
-            runs_ids = models.CourseRunCertificate.objects.filter(
-                user=user, course_run__course=course, is_revoked=False
-            ).values_list("course_run__id", flat=True)
-
-            if not runs_ids:
-                # if there are no certificates then show verified enrollment grades that either
-                # certificate available date has passed or course has ended if no certificate available date
-                runs_ids = models.CourseRunEnrollment.objects.filter(
-                    Q(user=user)
-                    & Q(run__course=course)
-                    & Q(enrollment_mode=EDX_ENROLLMENT_VERIFIED_MODE)
-                    & Q(change_status=None)
-                    & (
-                        Q(run__certificate_available_date__lt=now_in_utc())
-                        | (
-                            Q(run__certificate_available_date=None)
-                            & Q(run__end_date__lt=now_in_utc())
-                        )
-                    )
-                ).values_list("run__id", flat=True)
-
-            grade = (
-                models.CourseRunGrade.objects.filter(user=user, course_run__in=runs_ids)
-                .order_by("-grade")
-                .first()
-            )
-
+        for course in get_learner_record_courses(user, requirements["courses"]):
+            grade = course["grade"]
             if grade is not None:
                 grade.grade = round(grade.grade, 2)
-                fmt_course["grade"] = CourseRunGradeSerializer(grade).data
-
-            certificate = (
-                models.CourseRunCertificate.objects.filter(
-                    user=user, course_run__course=course, is_revoked=False
-                )
-                .order_by("-created_on")
-                .first()
+            courses.append(
+                {
+                    **course,
+                    "grade": CourseRunGradeSerializer(grade).data
+                    if grade is not None
+                    else None,
+                    "certificate": CourseRunCertificateSerializer(
+                        course["certificate"]
+                    ).data
+                    if course["certificate"] is not None
+                    else None,
+                }
             )
 
-            if certificate is not None:
-                fmt_course["certificate"] = CourseRunCertificateSerializer(
-                    certificate
-                ).data
-
-            courses.append(fmt_course)
-
         shares = models.LearnerProgramRecordShare.objects.filter(
             user=user, program=instance, is_active=True
         ).all()
@@ -301,9 +303,7 @@ class LearnerRecordSerializer(serializers.BaseSerializer):
                 "title": instance.title,
                 "readable_id": instance.readable_id,
                 "courses": courses,
-                "requirements": ProgramRequirementTreeSerializer(
-                    instance.requirements_root
-                ).data,
+                "requirements": requirements["requirements"],
             },
             "sharing": LearnerProgramRecordShareSerializer(shares, many=True).data
             if "anonymous_pull" not in self.context
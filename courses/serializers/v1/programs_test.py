@@ -2,6 +2,8 @@ from datetime import timedelta
 from decimal import Decimal
 
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.utils.timezone import now
 from mitol.common.utils import now_in_utc
 
@@ -349,6 +351,36 @@ def test_learner_record_serializer(
     assert course_0_payload == serialized_data["program"]["courses"][0]
 
 
+@pytest.mark.parametrize("course_count", [1, 4])
+def test_learner_record_serializer_query_count(
+    mock_context,
+    program_with_empty_requirements,  # noqa: F811
+    course_count,
+):
+    """The learner record should take the same number of queries regardless of the number of courses"""
+    program = program_with_empty_requirements
+    user = mock_context["request"].user
+    for course in CourseFactory.create_batch(course_count):
+        program.add_requirement(course)
+        run = CourseRunFactory.create(
+            course=course, certificate_available_date=now_in_utc() - timedelta(days=1)
+        )
+        CourseRunEnrollmentFactory.create(
+            run=run, user=user, enrollment_mode=EDX_ENROLLMENT_VERIFIED_MODE
+        )
+        CourseRunGradeFactory.create(course_run=run, user=user)
+    # the first record compiles and caches the program's requirements
+    LearnerRecordSerializer(instance=program, context=mock_context).data  # noqa: B018
+
+    with CaptureQueriesContext(connection) as queries:
+        serialized_data = LearnerRecordSerializer(
+            instance=program, context=mock_context
+        ).data
+    assert len(queries) == 5
+    assert len(serialized_data["program"]["courses"]) == course_count
+    assert all(course["grade"] for course in serialized_data["program"]["courses"])
+
+
 def test_program_serializer_returns_default_image():
     """If the program has no page, we should still get a featured_image_url."""
 
@@ -4,13 +4,22 @@ Signals for mitxonline course certificates
 
 from django.core.management import call_command
 from django.db import transaction
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
 from courses.api import generate_multiple_programs_certificate
 from courses.models import (
+    Course,
     CourseRunCertificate,
+    CourseRunGrade,
+    LearnerProgramRecordShare,
     Program,
+    ProgramRequirement,
+)
+from courses.records import (
+    clear_course_shared_learner_record_cache,
+    clear_program_requirements_cache,
+    clear_shared_learner_record_cache,
 )
 from hubspot_sync.task_helpers import sync_hubspot_user
 
@@ -43,3 +52,69 @@ def handle_create_course_run_certificate(
             )
         call_command("configure_hubspot_properties")
         sync_hubspot_user(instance.user)
+
+
+@receiver(
+    post_save, sender=ProgramRequirement, dispatch_uid="programrequirement_post_save"
+)
+@receiver(
+    post_delete,
+    sender=ProgramRequirement,
+    dispatch_uid="programrequirement_post_delete",
+)
+def expire_program_requirements(
+    sender,  # pylint: disable=unused-argument  # noqa: ARG001
+    instance,
+    **kwargs,  # pylint: disable=unused-argument  # noqa: ARG001
+):
+    """
+    When a node of a program's requirements tree is changed.
+    """
+    clear_program_requirements_cache([instance.program_id])
+    clear_shared_learner_record_cache(
+        LearnerProgramRecordShare.objects.filter(program_id=instance.program_id)
+    )
+
+
+@receiver(post_save, sender=Course, dispatch_uid="course_requirements_post_save")
+def expire_course_program_requirements(
+    sender,  # pylint: disable=unused-argument  # noqa: ARG001
+    instance,
+    created,
+    **kwargs,  # pylint: disable=unused-argument  # noqa: ARG001
+):
+    """
+    When a Course model is changed, since the compiled requirements of the programs
+    it belongs to include its title.
+    """
+    if not created:
+        program_ids = list(
+            ProgramRequirement.objects.filter(course=instance).values_list(
+                "program_id", flat=True
+            )
+        )
+        clear_program_requirements_cache(program_ids)
+        clear_shared_learner_record_cache(
+            LearnerProgramRecordShare.objects.filter(program_id__in=program_ids)
+        )
+
+
+@receiver(
+    post_save,
+    sender=CourseRunCertificate,
+    dispatch_uid="courseruncertificate_record_share_post_save",
+)
+@receiver(post_save, sender=CourseRunGrade, dispatch_uid="courserungrade_post_save")
+@receiver(post_delete, sender=CourseRunGrade, dispatch_uid="courserungrade_post_delete")
+def expire_course_shared_learner_records(
+    sender,  # pylint: disable=unused-argument  # noqa: ARG001
+    instance,
+    **kwargs,  # pylint: disable=unused-argument  # noqa: ARG001
+):
+    """
+    When a learner's grade or certificate for a course run is changed, since the
+    records the learner has shared for the programs of the course show them.
+    """
+    clear_course_shared_learner_record_cache(
+        instance.user_id, instance.course_run.course_id
+    )
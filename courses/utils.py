@@ -1,11 +1,14 @@
 """Utilities for courses"""
 
 import logging
+import operator
 import re
+from functools import reduce
 
 from django.db.models import Prefetch, Q
 from mitol.common.utils.datetime import now_in_utc
 from requests.exceptions import HTTPError
+from wagtail.models import Page
 
 from courses.models import CourseRun, CourseRunEnrollment, ProgramCertificate
 
@@ -76,6 +79,70 @@ def get_program_certificate_by_enrollment(enrollment, program=None):
         return None
 
 
+def filter_pages_with_certificate_page(pages):
+    """
+    Filter course or program pages down to the ones that have a live certificate
+    page, with a single query
+
+    Args:
+    - pages: list of CoursePage or ProgramPage
+
+    Returns:
+    - list of the pages that have a live certificate page
+    """
+    from cms.models import CertificatePage
+
+    if not pages:
+        return []
+
+    certificate_parent_paths = {
+        path[: -Page.steplen]
+        for path in CertificatePage.objects.live()
+        .filter(
+            reduce(
+                operator.or_,
+                (Q(path__startswith=page.path, depth=page.depth + 1) for page in pages),
+            )
+        )
+        .values_list("path", flat=True)
+    }
+    return [page for page in pages if page.path in certificate_parent_paths]
+
+
+def get_program_certificates_by_enrollments(enrollments):
+    """
+    Resolve the certificates for a user's program enrollments all at once
+
+    Like get_program_certificate_by_enrollment, this only includes certificates
+    for programs that have a certificate page to render them.
+
+    Args:
+    - enrollments: list of ProgramEnrollment, the program enrollments of a single user
+
+    Returns:
+    - dict of program id to ProgramCertificate
+    """
+    program_ids = [
+        page.program_id
+        for page in filter_pages_with_certificate_page(
+            [
+                enrollment.program.page
+                for enrollment in enrollments
+                if getattr(enrollment.program, "page", None) is not None
+            ]
+        )
+    ]
+    if not program_ids:
+        return {}
+
+    return {
+        certificate.program_id: certificate
+        for certificate in ProgramCertificate.objects.filter(
+            user_id=enrollments[0].user_id, program_id__in=program_ids
+        )
+    }
+
+
 def get_enrollable_course_run_filter(enrollment_end_date=None, valid_courses=None):
     """
     Returns a queryset of all course runs that are open for enrollment.
@@ -14,7 +14,7 @@ from courses.factories import (
     CourseRunFactory,
     ProgramCertificateFactory,
     ProgramEnrollmentFactory,
-    ProgramFactory,  # noqa: F401
+    ProgramFactory,
     program_with_requirements,  # noqa: F401
 )
 from courses.models import Course, CourseRun
@@ -23,6 +23,7 @@ from courses.utils import (
     get_enrollable_courseruns_qs,
     get_enrollable_courses,
     get_program_certificate_by_enrollment,
+    get_program_certificates_by_enrollments,
     get_unenrollable_courseruns_qs,
     get_unenrollable_courses,
 )
@@ -57,6 +58,29 @@ def test_get_program_certificate_by_enrollment(user, program_with_requirements):
     )
 
 
+def test_get_program_certificates_by_enrollments(user):
+    """
+    Test that get_program_certificates_by_enrollments returns the program certificates
+    of programs that have a certificate page
+    """
+    programs = ProgramFactory.create_batch(3)
+    enrollments = [
+        ProgramEnrollmentFactory.create(user=user, program=program)
+        for program in programs
+    ]
+    certificates = [
+        ProgramCertificateFactory.create(user=user, program=program)
+        for program in programs[:2]
+    ]
+    programs[1].page.certificate_page.delete()
+    for enrollment in enrollments:
+        enrollment.program.refresh_from_db()
+
+    assert get_program_certificates_by_enrollments(enrollments) == {
+        programs[0].id: certificates[0]
+    }
+
+
 def test_get_program_certificate_by_enrollment_program_does_not_exist(user):
     """
     Test that get_program_certificate_by_enrollment returns None if course has no program
@@ -39,6 +39,7 @@ def num_queries_from_programs(programs, version="v1"):
     - 4 query to get the program, related courses, related runs, department
     - 3 times num_courses for wagtail to get the generic data for the program and courses
     - 3 times num_courses for program requirements plus one for the initial call
+    - 5 queries, once for all programs, to resolve the financial assistance form URLs of every page
 
 
     Args:
@@ -55,6 +56,8 @@ def num_queries_from_programs(programs, version="v1"):
             num_queries += 4 + (6 * num_courses) + 1
         if version == "v2":
             num_queries += 6 + (17 * num_courses) + 1
+    if programs:
+        num_queries += 5
     return num_queries
 
 
@@ -1,15 +1,20 @@
 """Course views version 1"""
 
+import hashlib
+import json
 import logging
 from typing import Optional, Tuple, Union  # noqa: UP035
 
 import django_filters
 from django.contrib.auth.models import User
 from django.contrib.contenttypes.models import ContentType
+from django.core.cache import caches
 from django.db import transaction
 from django.db.models import Count, Q
 from django.http import HttpResponse, HttpResponseRedirect
 from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
 from django_filters.rest_framework import DjangoFilterBackend
 from mitol.olposthog.features import is_enabled
 from requests import ConnectionError as RequestsConnectionError
@@ -28,7 +33,15 @@ from courses.api import (
     get_relevant_course_run_qset,
     get_user_relevant_program_course_run_qset,
 )
-from courses.constants import ENROLL_CHANGE_STATUS_UNENROLLED
+from courses.constants import (
+    ENROLL_CHANGE_STATUS_UNENROLLED,
+    LEARNER_RECORD_SHARE_CACHE_AGE,
+    LEARNER_RECORD_SHARE_CACHE_KEY,
+)
+from courses.dashboard import (
+    DashboardEnrollmentPreloader,
+    prefetch_dashboard_enrollments,
+)
 from courses.models import (
     Course,
     CourseRun,
@@ -40,6 +53,10 @@ from courses.models import (
     Program,
     ProgramEnrollment,
 )
+from courses.records import (
+    clear_shared_learner_record_cache,
+    get_bulk_program_requirements,
+)
 from courses.serializers.v1.courses import (
     CourseRunEnrollmentSerializer,
     CourseRunWithCourseSerializer,
@@ -55,7 +72,7 @@ from courses.serializers.v1.programs import (
 from courses.tasks import send_partner_school_email
 from courses.utils import (
     get_enrollable_courses,
-    get_program_certificate_by_enrollment,
+    get_program_certificates_by_enrollments,
     get_unenrollable_courses,
 )
 from ecommerce.models import FulfilledOrder, OrderStatus, PendingOrder, Product
@@ -360,13 +377,27 @@ class UserEnrollmentsApiViewSet(
         else:
             return {"user": self.request.user}
 
-    def list(self, request, *args, **kwargs):
+    def list(self, request, *args, **kwargs):  # noqa: ARG002
         if is_enabled(features.SYNC_ON_DASHBOARD_LOAD):
             try:
                 sync_enrollments_with_edx(self.request.user)
             except Exception:  # pylint: disable=broad-except
                 log.exception("Failed to sync user enrollments with edX")
-        return super().list(request, *args, **kwargs)
+
+        enrollments = list(
+            prefetch_dashboard_enrollments(self.filter_queryset(self.get_queryset()))
+        )
+        serializer = self.get_serializer(
+            enrollments,
+            many=True,
+            context={
+                **self.get_serializer_context(),
+                "dashboard_preloader": DashboardEnrollmentPreloader(
+                    request.user, enrollments
+                ),
+            },
+        )
+        return Response(serializer.data)
 
     def destroy(self, request, *args, **kwargs):  # noqa: ARG002
         enrollment = self.get_object()
@@ -425,36 +456,66 @@ class UserProgramEnrollmentsViewSet(viewsets.ViewSet):
         user.
         """
 
-        program_enrollments = (
+        program_enrollments = list(
             ProgramEnrollment.objects.select_related(
                 "program",
-                "program__page",
+                "program__page__feature_image",
             )
+            .prefetch_related("program__departments")
             .filter(user=request.user)
             .filter(~Q(change_status=ENROLL_CHANGE_STATUS_UNENROLLED))
-            .all()
         )
-
-        program_list = []
-
-        for enrollment in program_enrollments:
-            courses = [course[0] for course in enrollment.program.courses]
-
-            program_list.append(
-                {
-                    "enrollments": CourseRunEnrollment.objects.filter(
-                        user=request.user, run__course__in=courses
-                    )
-                    .filter(~Q(change_status=ENROLL_CHANGE_STATUS_UNENROLLED))
-                    .select_related("run__course__page")
-                    .all(),
-                    "program": enrollment.program,
-                    "certificate": get_program_certificate_by_enrollment(enrollment),
-                }
+        program_requirements = get_bulk_program_requirements(
+            enrollment.program for enrollment in program_enrollments
+        )
+        program_course_ids = {
+            program_id: {course["id"] for course in requirements["courses"]}
+            for program_id, requirements in program_requirements.items()
+        }
+        course_ids = set().union(*program_course_ids.values())
+        run_enrollments = list(
+            prefetch_dashboard_enrollments(
+                CourseRunEnrollment.objects.filter(
+                    user=request.user, run__course_id__in=course_ids
+                ).filter(~Q(change_status=ENROLL_CHANGE_STATUS_UNENROLLED))
             )
+        )
+        certificates = get_program_certificates_by_enrollments(program_enrollments)
+
+        program_list = [
+            {
+                "enrollments": [
+                    run_enrollment
+                    for run_enrollment in run_enrollments
+                    if run_enrollment.run.course_id
+                    in program_course_ids[enrollment.program_id]
+                ],
+                "program": enrollment.program,
+                "certificate": certificates.get(enrollment.program_id),
+            }
+            for enrollment in program_enrollments
+        ]
 
         return Response(
-            UserProgramEnrollmentDetailSerializer(program_list, many=True).data
+            UserProgramEnrollmentDetailSerializer(
+                program_list,
+                many=True,
+                context={
+                    "program_requirements": program_requirements,
+                    "program_courses": Course.objects.select_related(
+                        "page__feature_image"
+                    )
+                    .prefetch_related(
+                        "departments",
+                        "courseruns__products",
+                        "page__linked_instructors__linked_instructor_page",
+                    )
+                    .in_bulk(course_ids),
+                    "dashboard_preloader": DashboardEnrollmentPreloader(
+                        request.user, run_enrollments
+                    ),
+                },
+            ).data
         )
 
     def destroy(self, request, pk=None):
@@ -546,19 +607,22 @@ def revoke_learner_record_share(request, pk):
     """
     program = Program.objects.get(pk=pk)
 
-    LearnerProgramRecordShare.objects.filter(
+    shares = LearnerProgramRecordShare.objects.filter(
         user=request.user, partner_school=None, program=program
-    ).update(is_active=False)
+    )
+    clear_shared_learner_record_cache(shares)
+    shares.update(is_active=False)
 
     return Response(LearnerRecordSerializer(program, context={"request": request}).data)
 
 
 @api_view(["GET"])
 @permission_classes([])
-def get_learner_record_from_uuid(request, uuid):  # noqa: ARG001
+def get_learner_record_from_uuid(request, uuid):
     """
     Does mostly the same thing as get_learner_record, but sets context to skip
-    the partner school and sharing information.
+    the partner school and sharing information. The record is cached for each
+    share, and requests that already have the current version (by ETag) get a 304.
     """
     record = LearnerProgramRecordShare.objects.filter(
         is_active=True, share_uuid=uuid
@@ -567,11 +631,37 @@ def get_learner_record_from_uuid(request, uuid):  # noqa: ARG001
     if record is None:
         return Response([], status=status.HTTP_404_NOT_FOUND)
 
-    return Response(
-        LearnerRecordSerializer(
-            record.program, context={"user": record.user, "anonymous_pull": True}
-        ).data
+    shared_record = caches["redis"].get_or_set(
+        LEARNER_RECORD_SHARE_CACHE_KEY.format(share_uuid=record.share_uuid),
+        lambda: _serialize_shared_learner_record(record),
+        LEARNER_RECORD_SHARE_CACHE_AGE,
+    )
+    etag = quote_etag(shared_record["etag"])
+    response = get_conditional_response(request, etag=etag) or Response(
+        shared_record["record"]
     )
+    response["ETag"] = etag
+    return response
+
+
+def _serialize_shared_learner_record(share):
+    """
+    Serializes the learner record of a record share, along with an ETag for it
+
+    Args:
+        share (LearnerProgramRecordShare): the record share
+
+    Returns:
+        dict: the "record" data and its "etag"
+    """
+    record = LearnerRecordSerializer(
+        share.program, context={"user": share.user, "anonymous_pull": True}
+    ).data
+    serialized = json.dumps(record, sort_keys=True, default=str)
+    return {
+        "record": record,
+        "etag": hashlib.sha256(serialized.encode("utf-8")).hexdigest(),
+    }
 
 
 @permission_classes([])
@@ -4,11 +4,15 @@ Tests for course views
 
 # pylint: disable=unused-argument, redefined-outer-name, too-many-arguments
 import operator as op
+from datetime import timedelta
 
 import pytest
 import reversion
+from django.db import connection
 from django.db.models import Count, Q
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from mitol.common.utils import now_in_utc
 from requests import ConnectionError as RequestsConnectionError
 from requests import HTTPError
 from rest_framework import status
@@ -18,11 +22,18 @@ from courses.constants import ENROLL_CHANGE_STATUS_UNENROLLED
 from courses.factories import (
     BlockedCountryFactory,
     CourseFactory,
+    CourseRunCertificateFactory,
     CourseRunEnrollmentFactory,
     CourseRunFactory,
+    CourseRunGradeFactory,
+    LearnerProgramRecordShareFactory,
+    ProgramCertificateFactory,
+    ProgramFactory,
+    program_with_empty_requirements,  # noqa: F401
 )
 from courses.models import (
     CourseRun,
+    LearnerProgramRecordShare,
     ProgramEnrollment,
 )
 from courses.serializers.v1.courses import (
@@ -39,6 +50,8 @@ from courses.views.test_utils import (
 from courses.views.v1 import UserEnrollmentsApiViewSet
 from ecommerce.factories import LineFactory, OrderFactory, ProductFactory
 from ecommerce.models import Order, OrderStatus
+from flexiblepricing.constants import FlexiblePriceStatus
+from flexiblepricing.factories import FlexiblePriceFactory
 from main import features
 from main.constants import (
     USER_MSG_COOKIE_NAME,
@@ -48,6 +61,7 @@ from main.constants import (
 )
 from main.test_utils import assert_drf_json_equal, duplicate_queries_check
 from main.utils import encode_json_cookie_value
+from openedx.constants import EDX_ENROLLMENT_VERIFIED_MODE
 from openedx.exceptions import NoEdxApiAuthError
 
 pytestmark = [pytest.mark.django_db, pytest.mark.usefixtures("raise_nplusone")]
@@ -433,6 +447,57 @@ def test_user_enrollments_list(user_drf_client, user):
     )
 
 
+def test_user_enrollments_list_query_count(
+    mocker,
+    settings,
+    user_drf_client,
+    user,
+    program_with_empty_requirements,  # noqa: F811
+):
+    """
+    The user enrollments view should make the same number of queries however many
+    enrollments the user has, and serialize them the same way
+    """
+    settings.FEATURES[features.SYNC_ON_DASHBOARD_LOAD] = False
+    settings.POSTHOG_ENABLED = False
+    mocker.patch(
+        "hubspot_sync.management.commands.configure_hubspot_properties._upsert_custom_properties",
+    )
+    program = program_with_empty_requirements
+    FlexiblePriceFactory.create(
+        user=user, courseware_object=program, status=FlexiblePriceStatus.APPROVED
+    )
+    url = reverse("v1:user-enrollments-api-list")
+    enrollments = []
+    query_counts = []
+    for enrollment_count in [1, 3]:
+        while len(enrollments) < enrollment_count:
+            run = CourseRunFactory.create()
+            ProductFactory.create(purchasable_object=run)
+            program.add_requirement(run.course)
+            enrollments.append(CourseRunEnrollmentFactory.create(run=run, user=user))
+            CourseRunGradeFactory.create(course_run=run, user=user)
+            CourseRunCertificateFactory.create(course_run=run, user=user)
+        # the first request caches the programs used for flexible price eligibility
+        user_drf_client.get(url)
+
+        with CaptureQueriesContext(connection) as queries:
+            resp = user_drf_client.get(url)
+        query_counts.append(len(queries))
+
+        assert_drf_json_equal(
+            resp.json(),
+            CourseRunEnrollmentSerializer(
+                enrollments, many=True, context={"include_page_fields": True}
+            ).data,
+            ignore_order=True,
+        )
+        assert all(
+            enrollment["approved_flexible_price_exists"] for enrollment in resp.json()
+        )
+    assert query_counts[0] == query_counts[1]
+
+
 @pytest.mark.parametrize("sync_dashboard_flag", [True, False])
 def test_user_enrollments_list_sync(
     mocker, settings, user_drf_client, user, sync_dashboard_flag
@@ -759,6 +824,38 @@ def test_program_enrollments(user_drf_client, user, programs):
             assert len(program_detail["enrollments"]) == 0
 
 
+def test_program_enrollments_query_count(user_drf_client, user):
+    """
+    The program enrollments API should make the same number of queries however
+    many programs the user is enrolled in
+    """
+    url = reverse("v1:user_program_enrollments_api-list")
+    query_counts = []
+    for program_count in [1, 3]:
+        while ProgramEnrollment.objects.filter(user=user).count() < program_count:
+            program = ProgramFactory.create()
+            ProgramEnrollment.objects.create(user=user, program=program)
+            course = CourseFactory.create()
+            program.add_requirement(course)
+            run = CourseRunFactory.create(course=course)
+            ProductFactory.create(purchasable_object=run)
+            CourseRunEnrollmentFactory.create(run=run, user=user)
+            CourseRunGradeFactory.create(course_run=run, user=user)
+            ProgramCertificateFactory.create(user=user, program=program)
+        # the first request compiles and caches the requirements of the programs
+        user_drf_client.get(url)
+
+        with CaptureQueriesContext(connection) as queries:
+            resp = user_drf_client.get(url)
+        query_counts.append(len(queries))
+
+        assert len(resp.json()) == program_count
+        for program_detail in resp.json():
+            assert len(program_detail["enrollments"]) == 1
+            assert program_detail["certificate"] is not None
+    assert query_counts[0] == query_counts[1]
+
+
 @pytest.mark.parametrize("fulfilled_order_exists", [True, False])
 def test_create_enrollments_with_existing_fulfilled_order(
     mocker, user_client, user, fulfilled_order_exists
@@ -791,3 +888,48 @@ def test_create_enrollments_with_existing_fulfilled_order(
     else:
         assert Order.objects.filter(state=OrderStatus.PENDING).count() == 1
     patched_create_enrollments.assert_called_once()
+
+
+def test_get_learner_record_from_uuid_cached(
+    client,
+    user,
+    user_drf_client,
+    program_with_empty_requirements,  # noqa: F811
+):
+    """
+    The shared learner record should be cached until the learner's grades change or
+    the share is revoked, and should support conditional requests
+    """
+    program = program_with_empty_requirements
+    run = CourseRunFactory.create(
+        certificate_available_date=now_in_utc() - timedelta(days=1)
+    )
+    program.add_requirement(run.course)
+    grade = CourseRunGradeFactory.create(course_run=run, user=user, grade=0.5)
+    CourseRunEnrollmentFactory.create(
+        run=run, user=user, enrollment_mode=EDX_ENROLLMENT_VERIFIED_MODE
+    )
+    share = LearnerProgramRecordShareFactory.create(
+        user=user, program=program, partner_school=None, is_active=True
+    )
+    url = reverse("shared_learner_record_from_uuid", args=[share.share_uuid])
+
+    resp = client.get(url)
+    assert resp.status_code == status.HTTP_200_OK
+    etag = resp["ETag"]
+    assert resp.json()["program"]["readable_id"] == program.readable_id
+
+    resp = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert resp.status_code == status.HTTP_304_NOT_MODIFIED
+    assert resp["ETag"] == etag
+
+    grade.grade = 0.75
+    grade.save()
+    resp = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert resp.status_code == status.HTTP_200_OK
+    assert resp["ETag"] != etag
+
+    resp = user_drf_client.post(f"/api/records/program/{program.id}/revoke/")
+    assert resp.status_code == status.HTTP_200_OK
+    assert not LearnerProgramRecordShare.objects.get(pk=share.share_uuid).is_active
+    assert client.get(url).status_code == status.HTTP_404_NOT_FOUND
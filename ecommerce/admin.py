@@ -177,7 +177,14 @@ class OrderLineInline(admin.TabularInline):
     """Inline editor for lines"""
 
     model = Line
-    readonly_fields = ["unit_price", "total_price", "discounted_price"]
+    readonly_fields = [
+        "unit_price",
+        "total_price",
+        "discounted_price",
+        "list_price",
+        "discount_amount",
+        "final_price",
+    ]
     min_num = 1
     extra = 0
 
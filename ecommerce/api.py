@@ -1,12 +1,27 @@
 """Ecommerce APIs"""
 
+import csv
+import hashlib
 import logging
 import uuid
+from collections import namedtuple
+from contextlib import nullcontext
 from decimal import Decimal
+from typing import List  # noqa: UP035
 
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import caches
 from django.core.exceptions import ObjectDoesNotExist, PermissionDenied, ValidationError
 from django.db import transaction
-from django.db.models import Q
+from django.db.models import (
+    Count,
+    F,
+    Max,
+    Prefetch,
+    Q,
+    QuerySet,
+    prefetch_related_objects,
+)
 from django.urls import reverse
 from ipware import get_client_ip
 from mitol.common.utils.datetime import now_in_utc
@@ -16,6 +31,8 @@ from mitol.payment_gateway.api import PaymentGateway, ProcessorResponse
 
 from courses.api import create_run_enrollments, deactivate_run_enrollment
 from courses.constants import ENROLL_CHANGE_STATUS_REFUNDED
+from courses.models import CourseRun, ProgramRequirement, ProgramRun
+from ecommerce.basket import BasketEvaluation
 from ecommerce.constants import (
     ALL_DISCOUNT_TYPES,
     ALL_PAYMENT_TYPES,
@@ -28,19 +45,30 @@ from ecommerce.constants import (
     REFUND_SUCCESS_STATES,
     ZERO_PAYMENT_DATA,
 )
+from ecommerce.discounts import products_from_lines
+from ecommerce.exceptions import DiscountRedemptionLimitError
 from ecommerce.models import (
     Basket,
     BasketDiscount,
     BasketItem,
     Discount,
+    DiscountCodeBatch,
+    DiscountCodeBatchStatus,
     DiscountRedemption,
     FulfilledOrder,
+    Line,
     Order,
     OrderStatus,
     PendingOrder,
+    Product,
+    ProductEnrollability,
     UserDiscount,
 )
-from ecommerce.tasks import perform_downgrade_from_order
+from ecommerce.tasks import (
+    generate_discount_code_batch,
+    perform_downgrade_from_order,
+    perform_pending_order_resolution,
+)
 from flexiblepricing.api import determine_courseware_flexible_price_discount
 from hubspot_sync.task_helpers import sync_hubspot_deal
 from main.constants import (
@@ -56,11 +84,35 @@ from openedx.constants import EDX_ENROLLMENT_AUDIT_MODE
 
 log = logging.getLogger(__name__)
 
+DISCOUNT_CODE_CHUNK_SIZE = 1000
+PENDING_ORDER_RESOLUTION_CHUNK_SIZE = 50
+PRODUCT_LIST_CACHE_KEY = "ecommerce_product_list_{version}_{url_hash}"
+PRODUCT_LIST_CACHE_VERSION_KEY = "ecommerce_product_list_version"
 
-def generate_checkout_payload(request):
+
+def _reset_invalid_basket_discounts(request, basket):
+    """
+    Clear the discounts of a basket that can't be redeemed, reapply the user's
+    automatic discounts, and return the checkout payload that sends the user back
+    to the cart.
+    """
+    # We only allow one discount per basket so clear all of them here.
+    basket.discounts.all().delete()
+    apply_user_discounts(request)
+    return {
+        "invalid_discounts": True,
+        "response": redirect_with_user_message(
+            reverse("cart"),
+            {"type": USER_MSG_TYPE_DISCOUNT_INVALID},
+        ),
+    }
+
+
+def generate_checkout_payload(request):  # noqa: PLR0911
     basket = establish_basket(request)
+    evaluation = BasketEvaluation(basket)
 
-    if basket.has_user_blocked_products(request.user):
+    if evaluation.has_blocked_products():
         return {
             "country_blocked": True,
             "response": redirect_with_user_message(
@@ -69,7 +121,7 @@ def generate_checkout_payload(request):
             ),
         }
 
-    if basket.has_user_purchased_same_courserun(request.user):
+    if evaluation.has_purchased_same_courserun():
         return {
             "purchased_same_courserun": True,
             "response": redirect_with_user_message(
@@ -78,7 +130,7 @@ def generate_checkout_payload(request):
             ),
         }
 
-    if basket.has_user_purchased_non_upgradable_courserun():
+    if evaluation.has_non_upgradable_courserun():
         return {
             "purchased_non_upgradeable_courserun": True,
             "response": redirect_with_user_message(
@@ -87,19 +139,17 @@ def generate_checkout_payload(request):
             ),
         }
 
-    if not check_basket_discounts_for_validity(request):
-        # We only allow one discount per basket so clear all of them here.
-        basket.discounts.all().delete()
-        apply_user_discounts(request)
-        return {
-            "invalid_discounts": True,
-            "response": redirect_with_user_message(
-                reverse("cart"),
-                {"type": USER_MSG_TYPE_DISCOUNT_INVALID},
-            ),
-        }
+    if not evaluation.has_valid_discounts():
+        return _reset_invalid_basket_discounts(request, basket)
 
-    order = PendingOrder.create_from_basket(basket)
+    try:
+        with transaction.atomic():
+            order = PendingOrder.create_from_basket(basket)
+            # hold the discount's remaining redemptions for this order before the
+            # learner is sent to pay for it
+            order.reserve_discount_redemptions()
+    except DiscountRedemptionLimitError:
+        return _reset_invalid_basket_discounts(request, basket)
     total_price = 0
 
     ip = get_client_ip(request)[0]
@@ -126,20 +176,24 @@ def generate_checkout_payload(request):
         total_price += line_item.discounted_price
 
     if total_price == 0:
-        with transaction.atomic():
-            fulfill_completed_order(
-                order, payment_data=ZERO_PAYMENT_DATA, basket=basket
-            )
-            return {
-                "no_checkout": True,
-                "response": redirect_with_user_message(
-                    reverse("user-dashboard"),
-                    {
-                        "type": USER_MSG_TYPE_PAYMENT_ACCEPTED_NOVALUE,
-                        "run": order.lines.first().purchased_object.course.title,
-                    },
-                ),
-            }
+        try:
+            with transaction.atomic():
+                fulfill_completed_order(
+                    order, payment_data=ZERO_PAYMENT_DATA, basket=basket
+                )
+        except DiscountRedemptionLimitError:
+            # another order used up the discount since the basket was checked
+            return _reset_invalid_basket_discounts(request, basket)
+        return {
+            "no_checkout": True,
+            "response": redirect_with_user_message(
+                reverse("user-dashboard"),
+                {
+                    "type": USER_MSG_TYPE_PAYMENT_ACCEPTED_NOVALUE,
+                    "run": order.lines.first().purchased_object.course.title,
+                },
+            ),
+        }
 
     callback_uri = request.build_absolute_uri(reverse("checkout-result-callback"))
 
@@ -177,15 +231,7 @@ def check_discount_for_products(discount, basket):
 
 
 def check_basket_discounts_for_validity(request):
-    basket = establish_basket(request)
-
-    for basket_discount in basket.discounts.all():
-        if not basket_discount.redeemed_discount.check_validity(
-            basket.user
-        ) or not check_discount_for_products(basket_discount.redeemed_discount, basket):
-            return False
-
-    return True
+    return BasketEvaluation(establish_basket(request)).has_valid_discounts()
 
 
 def apply_user_discounts(request):
@@ -249,6 +295,25 @@ def fulfill_completed_order(order, payment_data, basket=None, already_enrolled=F
         basket.delete()
 
 
+def error_paid_order(order, payment_data):
+    """
+    Records the payment for an order that can't be fulfilled because a discount it
+    redeems has no redemptions left, and marks the order errored so staff can
+    refund or resolve it.
+
+    Args:
+        - order (Order): the pending order
+        - payment_data (dict): the payment data from the payment gateway
+    """
+    log.error(
+        "Paid order %s redeems a discount that has no redemptions left",
+        order.reference_number,
+    )
+    order_flow = order.get_object_flow()
+    order_flow.create_transaction(payment_data)
+    order_flow.errored()
+
+
 def get_order_from_cybersource_payment_response(request):
     payment_data = request.POST
     converted_order = PaymentGateway.get_gateway_class(
@@ -263,7 +328,7 @@ def get_order_from_cybersource_payment_response(request):
     return order
 
 
-def process_cybersource_payment_response(request, order):
+def process_cybersource_payment_response(request, order):  # noqa: C901
     """
     Updates the order and basket based on the payment request from Cybersource.
     Returns the order state after applying update operations corresponding to the request.
@@ -344,6 +409,8 @@ def process_cybersource_payment_response(request, order):
                 f"Missing transaction id from transaction response: {processor_response.message}"  # noqa: G004
             )
             raise
+        except DiscountRedemptionLimitError:
+            error_paid_order(order, request.POST)
 
         return_message = order.state
     else:
@@ -358,6 +425,63 @@ def process_cybersource_payment_response(request, order):
     return return_message
 
 
+def with_order_details(queryset: QuerySet) -> QuerySet:
+    """
+    Add the related data that order history and receipts serialize to an Order queryset
+
+    Args:
+        queryset (QuerySet): an Order queryset
+
+    Returns:
+        QuerySet: the queryset with the purchaser, lines, discounts and transactions loaded
+    """
+    return queryset.select_related("purchaser__legal_address").prefetch_related(
+        Prefetch("lines", queryset=Line.objects.select_related("product_version")),
+        Prefetch(
+            "discounts",
+            queryset=DiscountRedemption.objects.select_related("redeemed_discount"),
+        ),
+        "transactions",
+    )
+
+
+def prefetch_order_products(orders: List[Order]):  # noqa: UP006
+    """
+    Build the purchased product of each line of the orders (which should come from
+    with_order_details) and load their purchasable objects, courses, programs, and
+    the course page data that CoursePageSerializer reads (feature images,
+    instructors, and the runs and products for the current price) in bulk.
+
+    Args:
+        orders (List[Order]): the orders
+    """
+    lines = [line for order in orders for line in order.lines.all()]
+    products = products_from_lines(lines)
+    for line in lines:
+        line.product = products[line.id]
+
+    products = list(products.values())
+    prefetch_related_objects(products, "purchasable_object")
+    prefetch_related_objects(
+        [
+            product.purchasable_object
+            for product in products
+            if isinstance(product.purchasable_object, CourseRun)
+        ],
+        "course__page__feature_image",
+        "course__page__linked_instructors__linked_instructor_page",
+        "course__courseruns__products",
+    )
+    prefetch_related_objects(
+        [
+            product.purchasable_object
+            for product in products
+            if isinstance(product.purchasable_object, ProgramRun)
+        ],
+        "program",
+    )
+
+
 def establish_basket(request):
     """
     Gets or creates the user's basket. (This may get some more logic later.)
@@ -496,90 +620,197 @@ def unenroll_learner_from_order(order_id):
                 pass
 
 
-def check_and_process_pending_orders_for_resolution(refnos=None):
+def _pending_order_pages(refnos=None):
+    """
+    Yields pages of pending orders, oldest first.
+
+    Args:
+    - refnos (list or None): only include orders with these reference numbers
+    Yields:
+    - Lists of PendingOrders, at most PENDING_ORDER_RESOLUTION_CHUNK_SIZE long
+    """
+    pending_orders = PendingOrder.objects.filter(state=OrderStatus.PENDING)
+
+    if refnos is not None:
+        pending_orders = pending_orders.filter(reference_number__in=refnos)
+
+    last_order = None
+
+    while True:
+        page = pending_orders
+        if last_order is not None:
+            page = page.filter(
+                Q(created_on__gt=last_order.created_on)
+                | Q(created_on=last_order.created_on, id__gt=last_order.id)
+            )
+        orders = list(
+            page.order_by("created_on", "id")[:PENDING_ORDER_RESOLUTION_CHUNK_SIZE]
+        )
+
+        if not orders:
+            return
+
+        yield orders
+        last_order = orders[-1]
+
+
+def resolve_pending_order(order_id, payload):
+    """
+    Fulfills or cancels a pending order, depending on the transaction that the
+    payment gateway has for it. Orders that are no longer pending are left
+    alone, so this can safely run more than once for the same order.
+
+    The order is locked only while its new state, transaction and paid runs are
+    recorded. The learner is enrolled in edX and sent the receipt after that is
+    committed, so the lock isn't held during the edX requests. Enrollments that
+    fail are kept and retried like any other failed enrollment.
+
+    Args:
+    - order_id (int): the id of the order
+    - payload (dict): the formatted transaction from the payment gateway
+    Returns:
+    - str: the state of the order afterwards
+    """
+    fulfill = int(payload["reason_code"]) == 100  # noqa: PLR2004
+
+    with transaction.atomic():
+        order = PendingOrder.objects.select_for_update().get(pk=order_id)
+
+        if order.state != OrderStatus.PENDING:
+            return order.state
+
+        order_flow = order.get_object_flow()
+
+        if fulfill:
+            try:
+                # enrolling and the receipt are done below, once this is committed
+                order_flow.fulfill(payload, already_enrolled=True)
+            except DiscountRedemptionLimitError:
+                error_paid_order(order, payload)
+                fulfill = False
+        else:
+            order_flow.cancel()
+            order.transactions.create(
+                transaction_id=payload["transaction_id"],
+                amount=order.total_price_paid,
+                data=payload,
+                reason=f"Cancelled due to processor code {payload['reason_code']}",
+            )
+
+    if fulfill:
+        order_flow.create_enrollments()
+        order.send_ecommerce_order_receipt()
+
+    sync_hubspot_deal(order)
+
+    return order.state
+
+
+def check_and_process_pending_orders_for_resolution(  # noqa: C901
+    refnos=None, *, fulfill_in_background=False, progress=None
+):
     """
     Checks pending orders for resolution. By default, this will pull all the
     pending orders that are in the system.
 
+    The orders are checked a page at a time, oldest first, so that each request
+    to the payment gateway covers at most PENDING_ORDER_RESOLUTION_CHUNK_SIZE
+    orders. Failed payments are cancelled right away. Successful payments are
+    fulfilled right away too, unless fulfill_in_background is set - fulfilling
+    an order enrolls the learner in edX, so then each fulfillment is queued as
+    its own task and counted as queued rather than fulfilled.
+
     Args:
     - refnos (list or None): check specific reference numbers
+    - fulfill_in_background (bool): queue a task for each order to fulfill
+    - progress (callable or None): called after each page with the counts so
+      far, as the keyword arguments checked, fulfilled, canceled, errored and
+      queued
     Returns:
-    - Tuple of counts: fulfilled count, cancelled count, error count
+    - Tuple of counts: fulfilled count, cancelled count, error count, queued count
 
     """
 
     gateway = PaymentGateway.get_gateway_class(ECOMMERCE_DEFAULT_PAYMENT_GATEWAY)
+    checked_count = fulfilled_count = cancel_count = error_count = queued_count = 0
 
-    if refnos is not None:
-        pending_orders = PendingOrder.objects.filter(
-            state=OrderStatus.PENDING, reference_number__in=refnos
-        ).values_list("reference_number", flat=True)
-    else:
-        pending_orders = PendingOrder.objects.filter(
-            state=OrderStatus.PENDING
-        ).values_list("reference_number", flat=True)
+    for orders in _pending_order_pages(refnos):
+        orders_by_refno = {order.reference_number: order for order in orders}
+        checked_count += len(orders)
 
-    if len(pending_orders) == 0:
-        return (0, 0, 0)
+        log.info(f"Resolving {len(orders)} orders")  # noqa: G004
 
-    log.info(f"Resolving {len(pending_orders)} orders")  # noqa: G004
-
-    results = gateway.find_and_get_transactions(pending_orders)
-
-    if len(results.keys()) == 0:
-        log.info("No orders found to resolve.")
-        return (0, 0, 0)
+        try:
+            results = gateway.find_and_get_transactions(list(orders_by_refno))
+        except Exception:
+            log.exception(
+                "Couldn't find transactions for %d pending orders", len(orders)
+            )
+            error_count += len(orders)
+            results = {}
 
-    fulfilled_count = cancel_count = error_count = 0
+        for payload in results.values():
+            reference_number = payload["req_reference_number"]
+            order = orders_by_refno.get(reference_number)
+            fulfill = int(payload["reason_code"]) == 100  # noqa: PLR2004
 
-    for result in results:
-        payload = results[result]
-        if int(payload["reason_code"]) == 100:  # noqa: PLR2004
             try:
-                order = PendingOrder.objects.filter(
-                    state=OrderStatus.PENDING,
-                    reference_number=payload["req_reference_number"],
-                ).get()
-                order_flow = order.get_object_flow()
-                order_flow.fulfill(payload)
-                sync_hubspot_deal(order)
-                fulfilled_count += 1
+                if order is None:
+                    raise PendingOrder.DoesNotExist(  # noqa: TRY301
+                        "No pending order in this page matches the transaction"  # noqa: EM101
+                    )
 
-                log.info(f"Fulfilled order {order.reference_number}.")  # noqa: G004
+                if fulfill and fulfill_in_background:
+                    perform_pending_order_resolution.delay(order.id, payload)
+                    state = None
+                else:
+                    state = resolve_pending_order(order.id, payload)
             except Exception as e:  # noqa: BLE001
                 log.error(  # noqa: TRY400
-                    f"Couldn't process pending order for fulfillment {payload['req_reference_number']}: {e!s}"  # noqa: G004
+                    f"Couldn't process pending order for {'fulfillment' if fulfill else 'cancellation'} {reference_number}: {e!s}"  # noqa: G004
                 )
                 error_count += 1
-        else:
-            try:
-                order = PendingOrder.objects.filter(
-                    state=OrderStatus.PENDING,
-                    reference_number=payload["req_reference_number"],
-                ).get()
-                order_flow = order.get_object_flow()
-                order_flow.cancel()
-                order.transactions.create(
-                    transaction_id=payload["transaction_id"],
-                    amount=order.total_price_paid,
-                    data=payload,
-                    reason=f"Cancelled due to processor code {payload['reason_code']}",
-                )
-                order.save()
-                sync_hubspot_deal(order)
+                continue
+
+            if state is None:
+                queued_count += 1
+                log.info(f"Queued fulfillment of order {reference_number}.")  # noqa: G004
+            elif state == OrderStatus.FULFILLED:
+                fulfilled_count += 1
+                log.info(f"Fulfilled order {reference_number}.")  # noqa: G004
+            elif state == OrderStatus.CANCELED:
                 cancel_count += 1
+                log.info(f"Cancelled order {reference_number}.")  # noqa: G004
+
+        if progress is not None:
+            progress(
+                checked=checked_count,
+                fulfilled=fulfilled_count,
+                canceled=cancel_count,
+                errored=error_count,
+                queued=queued_count,
+            )
 
-                log.info(f"Cancelled order {order.reference_number}.")  # noqa: G004
-            except Exception as e:  # noqa: BLE001
-                log.error(  # noqa: TRY400
-                    f"Couldn't process pending order for cancellation {payload['req_reference_number']}: {e!s}"  # noqa: G004
-                )
-                error_count += 1
+    if checked_count:
+        log.info(
+            "Checked %d pending orders: %d fulfilled, %d canceled, %d errored, %d queued",
+            checked_count,
+            fulfilled_count,
+            cancel_count,
+            error_count,
+            queued_count,
+        )
 
-    return (fulfilled_count, cancel_count, error_count)
+    return (fulfilled_count, cancel_count, error_count, queued_count)
 
 
-def check_for_duplicate_discount_redemptions():
+DuplicateDiscountRedemption = namedtuple(  # noqa: PYI024
+    "DuplicateDiscountRedemption",
+    ["discount_id", "discount_code", "redemption_type", "user_id", "redemptions"],
+)
+
+
+def check_for_duplicate_discount_redemptions() -> List[DuplicateDiscountRedemption]:  # noqa: UP006
     """
     Checks for multiple redemptions for discount codes, and makes noise if there
     are any.
@@ -589,68 +820,63 @@ def check_for_duplicate_discount_redemptions():
     for that and emit some log messages if so. (This can happen if the code is
     entered into two orders and those orders are completed simultaneously.)
 
+    The redemptions are grouped by discount (and by user for one-time-per-user
+    discounts) in the database, so this runs two queries regardless of the
+    number of redemptions.
+
     Returns:
-    - List of seen discount IDs
+    - List of DuplicateDiscountRedemption, one per discount (or per discount and
+      user for one-time-per-user discounts) that was redeemed more than once
     """
 
-    redemptions = (
-        DiscountRedemption.objects.filter(
-            Q(redeemed_discount__redemption_type=REDEMPTION_TYPE_ONE_TIME)
-            | Q(redeemed_discount__redemption_type=REDEMPTION_TYPE_ONE_TIME_PER_USER)
-        )
-        .filter(redeemed_order__state=OrderStatus.FULFILLED)
-        .prefetch_related("redeemed_discount")
-        .all()
-    )
+    fulfilled_redemptions = DiscountRedemption.objects.filter(
+        redeemed_order__state=OrderStatus.FULFILLED
+    ).order_by()
+    duplicates = []
 
-    seen = []
-
-    for redemption in redemptions:
-        if redemption.redeemed_discount.id in seen:
-            continue
-
-        if (
-            redemption.redeemed_discount.redemption_type == REDEMPTION_TYPE_ONE_TIME
-            and redemption.redeemed_discount.order_redemptions.filter(
-                redeemed_order__state=OrderStatus.FULFILLED
-            ).count()
-            > 1
-        ):
-            message = f"Discount code {redemption.redeemed_discount.discount_code} is a one-time discount that's been redeemed more than once"
-            log.error(message)
-            seen.append(redemption.redeemed_discount.id)
-
-        if (
-            redemption.redeemed_discount.redemption_type
-            == REDEMPTION_TYPE_ONE_TIME_PER_USER
-            and redemption.redeemed_discount.order_redemptions.filter(
-                redeemed_order__state=OrderStatus.FULFILLED
-            ).count()
-            > 1
-        ):
-            seen_user = []
-
-            for (
-                user_redemption
-            ) in redemption.redeemed_discount.order_redemptions.filter(
-                redeemed_order__state=OrderStatus.FULFILLED
-            ).all():
-                if user_redemption.redeemed_by.id in seen_user:
-                    continue
+    for redemption_type, group_by in (
+        (REDEMPTION_TYPE_ONE_TIME, ["redeemed_discount_id"]),
+        (REDEMPTION_TYPE_ONE_TIME_PER_USER, ["redeemed_discount_id", "redeemed_by_id"]),
+    ):
+        duplicates.extend(
+            DuplicateDiscountRedemption(
+                discount_id=row["redeemed_discount_id"],
+                discount_code=row["redeemed_discount__discount_code"],
+                redemption_type=redemption_type,
+                user_id=row.get("redeemed_by_id"),
+                redemptions=row["redemptions"],
+            )
+            for row in fulfilled_redemptions.filter(
+                redeemed_discount__redemption_type=redemption_type
+            )
+            .values(*group_by, "redeemed_discount__discount_code")
+            .annotate(redemptions=Count("id"))
+            .filter(redemptions__gt=1)
+            .order_by(*group_by)
+        )
 
-                if (
-                    redemption.redeemed_discount.order_redemptions.filter(
-                        redeemed_by=user_redemption.redeemed_by
-                    ).count()
-                    > 1
-                ):
-                    message = f"Discount code {redemption.redeemed_discount.discount_code} is a one-time per-user discount that's been redeemed more than once by {user_redemption.redeemed_by}"
-                    log.error(message)
-                    seen_user.append(user_redemption.redeemed_by.id)
+    for duplicate in duplicates:
+        if duplicate.user_id is None:
+            log.error(
+                "Discount code %s is a one-time discount that's been redeemed %d times",
+                duplicate.discount_code,
+                duplicate.redemptions,
+            )
+        else:
+            log.error(
+                "Discount code %s is a one-time per-user discount that's been redeemed %d times by user %d",
+                duplicate.discount_code,
+                duplicate.redemptions,
+                duplicate.user_id,
+            )
 
-            seen.append(redemption.redeemed_discount.id)
+    log.info(
+        "Duplicate discount redemption check found %d duplicates across %d discounts",
+        len(duplicates),
+        len({duplicate.discount_id for duplicate in duplicates}),
+    )
 
-    return seen
+    return duplicates
 
 
 def generate_discount_code(**kwargs):  # noqa: C901
@@ -676,13 +902,17 @@ def generate_discount_code(**kwargs):  # noqa: C901
     * expires - date to expire the code
     * count - number of codes to create (requires prefix)
     * prefix - prefix to append to the codes (max 63 characters)
+    * batch - the DiscountCodeBatch to record the codes and progress on
+
+    Codes are inserted in chunks of DISCOUNT_CODE_CHUNK_SIZE. Generated codes
+    that already exist are replaced before they're inserted, and supplied codes
+    that already exist are rejected.
 
     Returns:
     * List of generated codes, with the following fields:
       code, type, amount, expiration_date
 
     """
-    codes_to_generate = []
     discount_type = kwargs["discount_type"]
     redemption_type = REDEMPTION_TYPE_UNLIMITED
     payment_type = kwargs["payment_type"]
@@ -711,13 +941,30 @@ def generate_discount_code(**kwargs):  # noqa: C901
                 f"Prefix {prefix} is {len(prefix)} - prefixes must be 63 characters or less."  # noqa: EM102
             )
 
-        for i in range(kwargs["count"]):  # noqa: B007
-            generated_uuid = uuid.uuid4()
-            code = f"{prefix}{generated_uuid}"
-
-            codes_to_generate.append(code)
+        code_chunks = (
+            _generate_prefixed_discount_codes(
+                prefix,
+                min(DISCOUNT_CODE_CHUNK_SIZE, kwargs["count"] - chunk_start),
+            )
+            for chunk_start in range(0, kwargs["count"], DISCOUNT_CODE_CHUNK_SIZE)
+        )
     else:
         codes_to_generate = kwargs["codes"]
+        existing_codes = list(
+            Discount.objects.filter(discount_code__in=codes_to_generate).values_list(
+                "discount_code", flat=True
+            )
+        )
+        if existing_codes:
+            raise Exception(  # noqa: TRY002
+                f"Discount codes {', '.join(existing_codes)} already exist."  # noqa: EM102
+            )
+        code_chunks = (
+            codes_to_generate[chunk_start : chunk_start + DISCOUNT_CODE_CHUNK_SIZE]
+            for chunk_start in range(
+                0, len(codes_to_generate), DISCOUNT_CODE_CHUNK_SIZE
+            )
+        )
 
     if kwargs.get("one_time"):
         redemption_type = REDEMPTION_TYPE_ONE_TIME
@@ -741,20 +988,290 @@ def generate_discount_code(**kwargs):  # noqa: C901
     else:
         activation_date = None
 
+    # the codes are inserted without calling Discount.save, so check the dates here
+    Discount(
+        expiration_date=expiration_date, activation_date=activation_date
+    ).check_date_validity()
+
     generated_codes = []
+    batch = kwargs.get("batch")
+
+    # A batch commits each chunk so its progress can be polled, and deletes its
+    # codes if it fails partway (see process_discount_code_batch). Otherwise,
+    # either all of the codes are created or none are.
+    with transaction.atomic() if batch is None else nullcontext():
+        for codes in code_chunks:
+            generated_codes.extend(
+                Discount.objects.bulk_create(
+                    [
+                        Discount(
+                            discount_type=discount_type,
+                            redemption_type=redemption_type,
+                            payment_type=payment_type,
+                            expiration_date=expiration_date,
+                            activation_date=activation_date,
+                            discount_code=code,
+                            amount=amount,
+                            is_bulk=True,
+                            batch=batch,
+                        )
+                        for code in codes
+                    ]
+                )
+            )
+
+            if batch is not None:
+                DiscountCodeBatch.objects.filter(pk=batch.pk).update(
+                    generated_count=F("generated_count") + len(codes)
+                )
+
+    return generated_codes
+
 
-    for code_to_generate in codes_to_generate:
-        discount = Discount.objects.create(
-            discount_type=discount_type,
-            redemption_type=redemption_type,
-            payment_type=payment_type,
-            expiration_date=expiration_date,
-            activation_date=activation_date,
-            discount_code=code_to_generate,
-            amount=amount,
-            is_bulk=True,
+def _generate_prefixed_discount_codes(prefix: str, count: int) -> List[str]:  # noqa: UP006
+    """
+    Generates codes made of the prefix and a UUID that aren't used by any
+    existing discount.
+
+    Args:
+        prefix (str): the prefix for the codes
+        count (int): the number of codes to generate
+
+    Returns:
+        list of str: the codes
+    """
+    codes = set()
+
+    while len(codes) < count:
+        candidates = {f"{prefix}{uuid.uuid4()}" for _ in range(count - len(codes))}
+        candidates.difference_update(
+            Discount.objects.filter(discount_code__in=candidates).values_list(
+                "discount_code", flat=True
+            )
         )
+        codes.update(candidates)
 
-        generated_codes.append(discount)
+    return list(codes)
 
-    return generated_codes
+
+def create_discount_code_batch(user, parameters: dict) -> DiscountCodeBatch:
+    """
+    Records a batch of discount codes and queues the task that generates them.
+
+    Args:
+        user (User): the user requesting the codes
+        parameters (dict): the keyword arguments for generate_discount_code
+
+    Returns:
+        DiscountCodeBatch: the batch, which tracks the progress of the task
+    """
+    batch = DiscountCodeBatch.objects.create(
+        created_by=user,
+        parameters=parameters,
+        count=parameters["count"],
+    )
+    transaction.on_commit(lambda: generate_discount_code_batch.delay(batch.id))
+    return batch
+
+
+def process_discount_code_batch(batch_id: int):
+    """
+    Generates the discount codes for a batch, and records whether that worked.
+
+    Args:
+        batch_id (int): the id of the DiscountCodeBatch
+    """
+    batch = DiscountCodeBatch.objects.get(pk=batch_id)
+    batch.status = DiscountCodeBatchStatus.PROCESSING
+    batch.save(update_fields=["status", "updated_on"])
+
+    try:
+        generate_discount_code(**batch.parameters, batch=batch)
+    except Exception as exc:
+        log.exception("Failed to generate the discount codes for batch %d", batch.id)
+        # the codes are only handed out once the batch completes, so remove the
+        # ones that were created before the failure
+        batch.discounts.all().delete()
+        batch.status = DiscountCodeBatchStatus.FAILED
+        batch.error = str(exc)
+        batch.generated_count = 0
+        batch.save(update_fields=["status", "error", "generated_count", "updated_on"])
+        return
+
+    batch.status = DiscountCodeBatchStatus.COMPLETED
+    batch.save(update_fields=["status", "updated_on"])
+
+
+def write_discount_codes_csv(discounts, output_file):
+    """
+    Writes discount codes to a CSV file.
+
+    Args:
+        discounts (iterable of Discount): the discounts to write
+        output_file (file-like): the file to write the CSV to
+    """
+    writer = csv.DictWriter(output_file, ["code", "type", "amount", "expiration_date"])
+
+    writer.writeheader()
+
+    for discount in discounts:
+        writer.writerow(
+            {
+                "code": discount.discount_code,
+                "type": discount.discount_type,
+                "amount": discount.amount,
+                "expiration_date": discount.expiration_date,
+            }
+        )
+
+
+def _earliest(first, second):
+    """Return the earlier of two datetimes, where None means there is no end"""
+    if first is None:
+        return second
+    if second is None:
+        return first
+    return min(first, second)
+
+
+def update_product_enrollability(products):
+    """
+    Recomputes the enrollability index of products. Course run products can be
+    enrolled in until the enrollment end of the run. Program run products can be
+    enrolled in until the end of the run, as long as every course the program
+    requires has a run that can still be enrolled in.
+
+    Args:
+    - products (iterable of Product): the products to update
+    """
+    products = list(products)
+    if not products:
+        return
+
+    prefetch_related_objects(products, "purchasable_object")
+
+    required_course_ids = {}
+    for program_id, course_id in ProgramRequirement.objects.filter(
+        program_id__in={
+            product.purchasable_object.program_id
+            for product in products
+            if isinstance(product.purchasable_object, ProgramRun)
+        },
+        course__isnull=False,
+    ).values_list("program_id", "course_id"):
+        required_course_ids.setdefault(program_id, set()).add(course_id)
+
+    # courses are missing from this if they have no runs at all
+    course_enrollment_ends = {
+        row["course_id"]: None if row["open_runs"] else row["last_enrollment_end"]
+        for row in CourseRun.objects.filter(
+            course_id__in=set().union(*required_course_ids.values())
+        )
+        .values("course_id")
+        .annotate(
+            last_enrollment_end=Max("enrollment_end"),
+            open_runs=Count("id", filter=Q(enrollment_end__isnull=True)),
+        )
+    }
+
+    rows = []
+    for product in products:
+        purchasable_object = product.purchasable_object
+        is_enrollable = purchasable_object is not None
+        enrollable_until = None
+
+        if isinstance(purchasable_object, CourseRun):
+            enrollable_until = purchasable_object.enrollment_end
+        elif isinstance(purchasable_object, ProgramRun):
+            enrollable_until = purchasable_object.end_date
+            for course_id in required_course_ids.get(purchasable_object.program_id, ()):
+                if course_id not in course_enrollment_ends:
+                    is_enrollable = False
+                    break
+                enrollable_until = _earliest(
+                    enrollable_until, course_enrollment_ends[course_id]
+                )
+
+        rows.append(
+            ProductEnrollability(
+                product=product,
+                is_enrollable=is_enrollable,
+                enrollable_until=enrollable_until,
+            )
+        )
+
+    ProductEnrollability.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=["product"],
+        update_fields=["is_enrollable", "enrollable_until"],
+    )
+    clear_product_list_cache()
+
+
+def update_course_product_enrollability(course_ids):
+    """
+    Recomputes the enrollability index of the products for the runs of courses,
+    and for the runs of the programs that require them.
+
+    Args:
+    - course_ids (iterable of int): the ids of the courses that changed
+    """
+    program_ids = ProgramRequirement.objects.filter(
+        course_id__in=course_ids
+    ).values_list("program_id", flat=True)
+
+    update_product_enrollability(
+        Product.all_objects.filter(
+            Q(
+                content_type=ContentType.objects.get_for_model(CourseRun),
+                object_id__in=CourseRun.objects.filter(
+                    course_id__in=course_ids
+                ).values_list("id", flat=True),
+            )
+            | Q(
+                content_type=ContentType.objects.get_for_model(ProgramRun),
+                object_id__in=ProgramRun.objects.filter(
+                    program_id__in=program_ids
+                ).values_list("id", flat=True),
+            )
+        )
+    )
+
+
+def update_program_product_enrollability(program_ids):
+    """
+    Recomputes the enrollability index of the products for the runs of programs.
+
+    Args:
+    - program_ids (iterable of int): the ids of the programs that changed
+    """
+    update_product_enrollability(
+        Product.all_objects.filter(
+            content_type=ContentType.objects.get_for_model(ProgramRun),
+            object_id__in=ProgramRun.objects.filter(
+                program_id__in=program_ids
+            ).values_list("id", flat=True),
+        )
+    )
+
+
+def get_product_list_cache_key(request) -> str:
+    """
+    Returns the cache key for a page of the product list. The key includes a
+    version that changes whenever the enrollability index is updated.
+
+    Args:
+    - request (Request): the request for the product list
+    """
+    version = caches["redis"].get_or_set(PRODUCT_LIST_CACHE_VERSION_KEY, 1, None)
+    url_hash = hashlib.sha256(request.build_absolute_uri().encode()).hexdigest()
+    return PRODUCT_LIST_CACHE_KEY.format(version=version, url_hash=url_hash)
+
+
+def clear_product_list_cache():
+    """Expires every cached page of the product list"""
+    try:
+        caches["redis"].incr(PRODUCT_LIST_CACHE_VERSION_KEY)
+    except ValueError:
+        caches["redis"].set(PRODUCT_LIST_CACHE_VERSION_KEY, 1, None)
@@ -2,27 +2,42 @@
 
 import random
 import uuid
-from datetime import datetime
+from datetime import datetime, timedelta
 
 import pytest
 import pytz
 import reversion
 from CyberSource.rest import ApiException
 from django.conf import settings
+from django.db import DatabaseError, connection
 from django.urls import reverse
 from factory import Faker, fuzzy
+from mitol.common.utils.datetime import now_in_utc
 from mitol.payment_gateway.api import ProcessorResponse
 from reversion.models import Version
 
-from courses.factories import CourseRunEnrollmentFactory
+from courses.factories import (
+    CourseFactory,
+    CourseRunEnrollmentFactory,
+    CourseRunFactory,
+    ProgramRunFactory,
+)
 from ecommerce.api import (
     check_and_process_pending_orders_for_resolution,
     check_for_duplicate_discount_redemptions,
+    generate_discount_code,
     process_cybersource_payment_response,
+    process_discount_code_batch,
     refund_order,
+    resolve_pending_order,
     unenroll_learner_from_order,
 )
-from ecommerce.constants import TRANSACTION_TYPE_PAYMENT, TRANSACTION_TYPE_REFUND
+from ecommerce.constants import (
+    DISCOUNT_TYPE_PERCENT_OFF,
+    PAYMENT_TYPE_CUSTOMER_SUPPORT,
+    TRANSACTION_TYPE_PAYMENT,
+    TRANSACTION_TYPE_REFUND,
+)
 from ecommerce.factories import (
     DiscountRedemptionFactory,
     LineFactory,
@@ -36,6 +51,9 @@ from ecommerce.factories import (
 from ecommerce.models import (
     Basket,
     BasketItem,
+    Discount,
+    DiscountCodeBatch,
+    DiscountCodeBatchStatus,
     DiscountRedemption,
     FulfilledOrder,
     Order,
@@ -454,6 +472,49 @@ def test_process_cybersource_payment_response(  # noqa: PLR0913
     assert result == OrderStatus.FULFILLED
 
 
+def test_process_cybersource_payment_response_used_up_discount(  # noqa: PLR0913
+    settings, rf, mocker, user_client, user, products
+):
+    """
+    An ACCEPTed payment for an order whose discount was used up meanwhile should be
+    recorded, and the order marked errored
+    """
+    settings.OPENEDX_SERVICE_WORKER_API_TOKEN = "mock_api_token"  # noqa: S105
+    mocker.patch(
+        "mitol.payment_gateway.api.PaymentGateway.validate_processor_response",
+        return_value=True,
+    )
+    create_basket(user, products)
+
+    resp = user_client.post(reverse("checkout_api-start_checkout"))
+
+    payload = resp.json()["payload"]
+    payload = {
+        **{f"req_{key}": value for key, value in payload.items()},
+        "decision": "ACCEPT",
+        "message": "payment processor message",
+        "transaction_id": "12345",
+    }
+
+    order = Order.objects.get(state=OrderStatus.PENDING, purchaser=user)
+    discount = OneTimeDiscountFactory.create()
+    DiscountRedemptionFactory.create(
+        redeemed_discount=discount,
+        redeemed_order=OrderFactory.create(state=OrderStatus.FULFILLED),
+    )
+    DiscountRedemptionFactory.create(
+        redeemed_discount=discount, redeemed_order=order, redeemed_by=user
+    )
+
+    request = rf.post(reverse("checkout_result_api"), payload)
+
+    result = process_cybersource_payment_response(request, order)
+    assert result == OrderStatus.ERRORED
+    order.refresh_from_db()
+    assert order.state == OrderStatus.ERRORED
+    assert order.transactions.get().transaction_id == "12345"
+
+
 @pytest.mark.parametrize("include_discount", [True, False])
 def test_process_cybersource_payment_decline_response(  # noqa: PLR0913
     rf, mocker, user_client, user, products, include_discount
@@ -593,7 +654,10 @@ def test_check_and_process_pending_orders_for_resolution(mocker, test_type):
         return_value=retval,
     )
 
-    (fulfilled, cancelled, errored) = check_and_process_pending_orders_for_resolution()
+    (fulfilled, cancelled, errored, queued) = (
+        check_and_process_pending_orders_for_resolution()
+    )
+    assert queued == 0
 
     if test_type == "empty":
         assert not mocked_gateway_func.called
@@ -608,6 +672,149 @@ def test_check_and_process_pending_orders_for_resolution(mocker, test_type):
         assert (fulfilled, cancelled, errored) == (1, 0, 0)
 
 
+def make_gateway_payload(order, reason_code="100"):
+    """Return a minimal formatted transaction from the payment gateway for an order"""
+    return {
+        "req_reference_number": order.reference_number,
+        "reason_code": reason_code,
+        "transaction_id": uuid.uuid4().hex,
+        "amount": str(order.total_price_paid),
+    }
+
+
+def test_pending_order_resolution_pages(mocker):
+    """
+    Pending orders should be checked a page at a time, oldest first, and the
+    counts reported after each page.
+    """
+    mocker.patch("ecommerce.api.PENDING_ORDER_RESOLUTION_CHUNK_SIZE", 2)
+    mocker.patch("ecommerce.models.OrderFlow.create_enrollments", return_value=True)
+    mocker.patch("ecommerce.models.OrderFlow.create_paid_courseruns", return_value=True)
+    orders = OrderFactory.create_batch(3, state=OrderStatus.PENDING)
+    OrderFactory.create(state=OrderStatus.FULFILLED)
+    mocked_gateway_func = mocker.patch(
+        "mitol.payment_gateway.api.CyberSourcePaymentGateway.find_and_get_transactions",
+        side_effect=[
+            {
+                orders[0].reference_number: make_gateway_payload(orders[0]),
+                orders[1].reference_number: make_gateway_payload(orders[1], "999"),
+            },
+            Exception("Gateway is down"),
+        ],
+    )
+    progress = mocker.Mock()
+
+    assert check_and_process_pending_orders_for_resolution(progress=progress) == (
+        1,
+        1,
+        1,
+        0,
+    )
+
+    assert [call.args[0] for call in mocked_gateway_func.call_args_list] == [
+        [orders[0].reference_number, orders[1].reference_number],
+        [orders[2].reference_number],
+    ]
+    assert [call.kwargs for call in progress.call_args_list] == [
+        {"checked": 2, "fulfilled": 1, "canceled": 1, "errored": 0, "queued": 0},
+        {"checked": 3, "fulfilled": 1, "canceled": 1, "errored": 1, "queued": 0},
+    ]
+    assert [Order.objects.get(pk=order.id).state for order in orders] == [
+        OrderStatus.FULFILLED,
+        OrderStatus.CANCELED,
+        OrderStatus.PENDING,
+    ]
+
+
+def test_pending_order_resolution_in_background(mocker):
+    """Fulfillments should be queued as tasks when fulfill_in_background is set"""
+    order = OrderFactory.create(state=OrderStatus.PENDING)
+    payload = make_gateway_payload(order)
+    mocker.patch(
+        "mitol.payment_gateway.api.CyberSourcePaymentGateway.find_and_get_transactions",
+        return_value={order.reference_number: payload},
+    )
+    mock_task = mocker.patch("ecommerce.api.perform_pending_order_resolution")
+
+    assert check_and_process_pending_orders_for_resolution(
+        fulfill_in_background=True
+    ) == (0, 0, 0, 1)
+
+    mock_task.delay.assert_called_once_with(order.id, payload)
+    order.refresh_from_db()
+    assert order.state == OrderStatus.PENDING
+
+
+def test_resolve_pending_order_enrolls_after_commit(mocker):
+    """The learner should be enrolled once the fulfilled order is committed, not while it's locked"""
+    order = OrderFactory.create(state=OrderStatus.PENDING)
+    mock_receipt = mocker.patch("ecommerce.models.send_ecommerce_order_receipt")
+
+    # the test runs in a transaction, so compare the nesting of atomic blocks
+    savepoint_depth = len(connection.savepoint_ids)
+
+    def check_order_committed(self):
+        assert len(connection.savepoint_ids) == savepoint_depth
+        assert Order.objects.get(pk=order.id).state == OrderStatus.FULFILLED
+        assert self.order.transactions.count() == 1
+
+    mock_enroll = mocker.patch(
+        "ecommerce.models.OrderFlow.create_enrollments",
+        autospec=True,
+        side_effect=check_order_committed,
+    )
+
+    assert (
+        resolve_pending_order(order.id, make_gateway_payload(order))
+        == OrderStatus.FULFILLED
+    )
+
+    mock_enroll.assert_called_once()
+    mock_receipt.delay.assert_called_once_with(order.id)
+
+
+def test_resolve_pending_order_only_once(mocker):
+    """Resolving an order that isn't pending anymore shouldn't change it"""
+    mock_fulfill = mocker.patch("ecommerce.models.OrderFlow.fulfill")
+    order = OrderFactory.create(state=OrderStatus.CANCELED)
+
+    assert (
+        resolve_pending_order(order.id, make_gateway_payload(order))
+        == OrderStatus.CANCELED
+    )
+
+    mock_fulfill.assert_not_called()
+    assert order.transactions.count() == 0
+
+
+def test_resolve_pending_order_used_up_discount(mocker):
+    """
+    A paid order whose discount was used up by another order should keep its
+    transaction and be marked errored, rather than fulfilled
+    """
+    mock_enroll = mocker.patch("ecommerce.models.OrderFlow.create_enrollments")
+    discount = OneTimeDiscountFactory.create()
+    DiscountRedemptionFactory.create(
+        redeemed_discount=discount,
+        redeemed_order=OrderFactory.create(state=OrderStatus.FULFILLED),
+    )
+    order = OrderFactory.create(state=OrderStatus.PENDING)
+    DiscountRedemptionFactory.create(
+        redeemed_discount=discount,
+        redeemed_order=order,
+        redeemed_by=order.purchaser,
+    )
+    payload = make_gateway_payload(order)
+
+    assert resolve_pending_order(order.id, payload) == OrderStatus.ERRORED
+
+    mock_enroll.assert_not_called()
+    order.refresh_from_db()
+    assert order.state == OrderStatus.ERRORED
+    assert order.transactions.get().transaction_id == payload["transaction_id"]
+    assert discount.get_fulfilled_redemption_count() == 1
+
+
 @pytest.mark.parametrize("peruser", [True, False])
 def test_duplicate_redemption_check(peruser):
     """
@@ -638,6 +845,218 @@ def test_duplicate_redemption_check(peruser):
 
     second_redemption = make_stuff(user, discount)  # noqa: F841
 
-    seen_ids = check_for_duplicate_discount_redemptions()
+    duplicates = check_for_duplicate_discount_redemptions()
+
+    assert [
+        (duplicate.discount_id, duplicate.user_id, duplicate.redemptions)
+        for duplicate in duplicates
+    ] == [(discount.id, user.id if peruser else None, 2)]
+
+
+def test_duplicate_redemption_check_ignores_valid_redemptions(
+    django_assert_num_queries,
+):
+    """
+    The duplicate redemption check should not report redemptions that follow the
+    discount's rules, and should run a fixed number of queries.
+    """
+    per_user_discount = OneTimePerUserDiscountFactory.create()
+    for user in UserFactory.create_batch(3):
+        DiscountRedemptionFactory.create(
+            redeemed_by=user,
+            redeemed_discount=per_user_discount,
+            redeemed_order=OrderFactory.create(
+                purchaser=user, state=OrderStatus.FULFILLED
+            ),
+        )
+    one_time_discount = OneTimeDiscountFactory.create()
+    for state in [OrderStatus.FULFILLED, OrderStatus.CANCELED]:
+        DiscountRedemptionFactory.create(
+            redeemed_discount=one_time_discount,
+            redeemed_order=OrderFactory.create(state=state),
+        )
+
+    with django_assert_num_queries(2):
+        assert check_for_duplicate_discount_redemptions() == []
+
+
+@pytest.fixture
+def discount_code_parameters():
+    """Keyword arguments for generate_discount_code"""
+    return {
+        "discount_type": DISCOUNT_TYPE_PERCENT_OFF,
+        "payment_type": PAYMENT_TYPE_CUSTOMER_SUPPORT,
+        "amount": 10,
+        "count": 5,
+        "prefix": "batch-",
+    }
+
+
+def test_generate_discount_code_chunks(
+    mocker, django_assert_num_queries, discount_code_parameters
+):
+    """Generated codes should be checked and inserted a chunk at a time"""
+    mocker.patch("ecommerce.api.DISCOUNT_CODE_CHUNK_SIZE", 2)
+
+    # 3 chunks of 2 queries, and the savepoint around them
+    with django_assert_num_queries(8):
+        discounts = generate_discount_code(**discount_code_parameters)
+
+    assert len(discounts) == 5
+    assert len({discount.discount_code for discount in discounts}) == 5
+    assert (
+        Discount.objects.filter(
+            discount_code__startswith="batch-", is_bulk=True
+        ).count()
+        == 5
+    )
+
+
+def test_generate_discount_code_replaces_existing_codes(
+    mocker, discount_code_parameters
+):
+    """Generated codes that already exist should be replaced with new ones"""
+    existing = UnlimitedUseDiscountFactory.create(discount_code="batch-existing")
+    mock_uuid = mocker.patch("ecommerce.api.uuid")
+    mock_uuid.uuid4.side_effect = ["existing", *[uuid.uuid4() for _ in range(5)]]
+
+    discounts = generate_discount_code(**discount_code_parameters)
+
+    assert len(discounts) == 5
+    assert existing.discount_code not in {
+        discount.discount_code for discount in discounts
+    }
+    assert Discount.objects.filter(discount_code=existing.discount_code).count() == 1
+
+
+def test_generate_discount_code_rejects_existing_codes(discount_code_parameters):
+    """Supplied codes that already exist should not be created again"""
+    UnlimitedUseDiscountFactory.create(discount_code="existing-code")
+
+    with pytest.raises(Exception, match="existing-code"):
+        generate_discount_code(
+            **{
+                **discount_code_parameters,
+                "count": 1,
+                "codes": ["new-code", "existing-code"],
+            }
+        )
+
+    assert not Discount.objects.filter(discount_code="new-code").exists()
+
+
+@pytest.mark.parametrize("valid", [True, False])
+def test_process_discount_code_batch(discount_code_parameters, valid):
+    """Processing a batch should generate its codes and record the outcome"""
+    if not valid:
+        discount_code_parameters["discount_type"] = "not-a-type"
+    batch = DiscountCodeBatch.objects.create(
+        parameters=discount_code_parameters, count=discount_code_parameters["count"]
+    )
+
+    process_discount_code_batch(batch.id)
+
+    batch.refresh_from_db()
+    if valid:
+        assert batch.status == DiscountCodeBatchStatus.COMPLETED
+        assert batch.generated_count == 5
+        assert batch.discounts.count() == 5
+    else:
+        assert batch.status == DiscountCodeBatchStatus.FAILED
+        assert "not-a-type" in batch.error
+        assert batch.generated_count == 0
+
+
+@pytest.fixture
+def failing_second_chunk(mocker):
+    """Make the second chunk of generated codes fail to insert"""
+    mocker.patch("ecommerce.api.DISCOUNT_CODE_CHUNK_SIZE", 2)
+    bulk_create = Discount.objects.bulk_create
+    chunks = []
+
+    def insert_first_chunk(objs):
+        chunks.append(objs)
+        if len(chunks) > 1:
+            raise DatabaseError("insert failed")  # noqa: EM101
+        return bulk_create(objs)
+
+    mocker.patch.object(Discount.objects, "bulk_create", side_effect=insert_first_chunk)
+
+
+@pytest.mark.usefixtures("failing_second_chunk")
+def test_generate_discount_code_is_atomic(discount_code_parameters):
+    """Codes generated without a batch should all be created, or none of them"""
+    with pytest.raises(DatabaseError):
+        generate_discount_code(**discount_code_parameters)
+
+    assert not Discount.objects.filter(discount_code__startswith="batch-").exists()
+
+
+@pytest.mark.usefixtures("failing_second_chunk")
+def test_process_discount_code_batch_partial_failure(discount_code_parameters):
+    """A batch that fails partway should not leave the codes it created so far"""
+    batch = DiscountCodeBatch.objects.create(
+        parameters=discount_code_parameters, count=discount_code_parameters["count"]
+    )
+
+    process_discount_code_batch(batch.id)
+
+    batch.refresh_from_db()
+    assert batch.status == DiscountCodeBatchStatus.FAILED
+    assert "insert failed" in batch.error
+    assert batch.generated_count == 0
+    assert not Discount.objects.filter(discount_code__startswith="batch-").exists()
+
+
+def test_update_product_enrollability_program(django_capture_on_commit_callbacks):
+    """
+    A program run product should be enrollable until the end of the run or the
+    last enrollment end of a required course, whichever is earlier.
+    """
+    now = now_in_utc()
+    program_run = ProgramRunFactory.create(end_date=now + timedelta(days=30))
+    product = ProductFactory.create(purchasable_object=program_run)
+    with django_capture_on_commit_callbacks(execute=True):
+        course_run = CourseRunFactory.create(enrollment_end=now + timedelta(days=5))
+        CourseRunFactory.create(
+            course=course_run.course, enrollment_end=now + timedelta(days=10)
+        )
+    program_run.program.add_requirement(course_run.course)
+
+    product.enrollability.refresh_from_db()
+    assert product.enrollability.is_enrollable is True
+    assert product.enrollability.enrollable_until == now + timedelta(days=10)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        CourseRunFactory.create(course=course_run.course, enrollment_end=None)
+
+    product.enrollability.refresh_from_db()
+    assert product.enrollability.enrollable_until == program_run.end_date
+
+    program_run.program.add_requirement(CourseFactory.create())
+
+    product.enrollability.refresh_from_db()
+    assert product.enrollability.is_enrollable is False
+
+
+def test_course_run_enrollability_on_commit(django_capture_on_commit_callbacks):
+    """
+    Saving a course run should update the enrollability of its products once,
+    after the transaction commits
+    """
+    course_run = CourseRunFactory.create(enrollment_end=None)
+    product = ProductFactory.create(purchasable_object=course_run)
+    enrollment_end = now_in_utc() + timedelta(days=1)
+    course_run.enrollment_end = enrollment_end
+
+    with django_capture_on_commit_callbacks() as callbacks:
+        course_run.save()
+
+    product.enrollability.refresh_from_db()
+    assert product.enrollability.enrollable_until != enrollment_end
+    assert len(callbacks) == 1
+
+    callbacks[0]()
 
-    assert discount.id in seen_ids
+    product.enrollability.refresh_from_db()
+    assert product.enrollability.enrollable_until == enrollment_end
@@ -0,0 +1,153 @@
+"""Checkout eligibility rules evaluated against a single snapshot of a basket"""
+
+from django.db.models import OuterRef, Subquery, prefetch_related_objects
+from django.db.models.functions import Coalesce
+from django.utils.functional import cached_property
+
+from courses.models import BlockedCountry, CourseRun, PaidCourseRun
+from ecommerce.models import (
+    Basket,
+    Discount,
+    DiscountProduct,
+    DiscountRedemptionCount,
+    OrderStatus,
+    UserDiscountRedemptionCount,
+)
+
+
+class BasketEvaluation:
+    """
+    Loads a basket with its products, purchasable objects, blocked countries, paid
+    runs and discounts in a fixed number of queries, so that the checkout rules can
+    be checked without querying again for each basket item.
+    """
+
+    def __init__(self, basket: Basket):
+        self.basket = basket
+        self.user = basket.user
+        self.products = [
+            item.product for item in basket.basket_items.select_related("product")
+        ]
+        prefetch_related_objects(self.products, "purchasable_object")
+        self.course_runs = [
+            product.purchasable_object
+            for product in self.products
+            if isinstance(product.purchasable_object, CourseRun)
+        ]
+        self.basket_discounts = list(
+            basket.discounts.select_related("redeemed_discount")
+        )
+
+    @cached_property
+    def blocked_course_ids(self) -> set:
+        """The ids of the courses in the basket that block the user's country"""
+        if not self.course_runs:
+            return set()
+        return set(
+            BlockedCountry.objects.filter(
+                course_id__in={run.course_id for run in self.course_runs},
+                country=self.user.legal_address.country,
+            ).values_list("course_id", flat=True)
+        )
+
+    @cached_property
+    def paid_course_run_ids(self) -> set:
+        """The ids of the course runs in the basket that the user has already paid for"""
+        if not self.course_runs:
+            return set()
+        return set(
+            PaidCourseRun.objects.filter(
+                user=self.user,
+                course_run__in=self.course_runs,
+                order__state=OrderStatus.FULFILLED,
+            ).values_list("course_run_id", flat=True)
+        )
+
+    @cached_property
+    def discount_redemption_counts(self) -> dict:
+        """Fulfilled redemption counts (in total and for the user) keyed by discount id"""
+        if not self.basket_discounts:
+            return {}
+        return {
+            row["id"]: row
+            for row in Discount.objects.filter(
+                id__in=[
+                    basket_discount.redeemed_discount_id
+                    for basket_discount in self.basket_discounts
+                ]
+            )
+            .values("id")
+            .annotate(
+                total=Coalesce(
+                    Subquery(
+                        DiscountRedemptionCount.objects.filter(
+                            discount=OuterRef("pk")
+                        ).values("count")
+                    ),
+                    0,
+                ),
+                by_user=Coalesce(
+                    Subquery(
+                        UserDiscountRedemptionCount.objects.filter(
+                            discount=OuterRef("pk"), user=self.user
+                        ).values("count")
+                    ),
+                    0,
+                ),
+            )
+        }
+
+    @cached_property
+    def discount_product_ids(self) -> dict:
+        """Sets of the product ids that a discount is limited to, keyed by discount id"""
+        if not self.basket_discounts:
+            return {}
+        discount_product_ids = {}
+        for discount_id, product_id in DiscountProduct.objects.filter(
+            discount_id__in=[
+                basket_discount.redeemed_discount_id
+                for basket_discount in self.basket_discounts
+            ]
+        ).values_list("discount_id", "product_id"):
+            discount_product_ids.setdefault(discount_id, set()).add(product_id)
+        return discount_product_ids
+
+    def has_blocked_products(self) -> bool:
+        """Return true if any of the courses in the basket block the user's country"""
+        return any(run.course_id in self.blocked_course_ids for run in self.course_runs)
+
+    def has_purchased_same_courserun(self) -> bool:
+        """Return true if the user has already paid for any of the course runs in the basket"""
+        return any(run.id in self.paid_course_run_ids for run in self.course_runs)
+
+    def has_non_upgradable_courserun(self) -> bool:
+        """Return true if the upgrade deadline has passed for any of the course runs in the basket"""
+        return any(not run.is_upgradable for run in self.course_runs)
+
+    def is_discount_valid(self, discount) -> bool:
+        """
+        Check a discount in the basket against its redemption rules and product limits
+
+        Args:
+            discount (Discount): the discount to check
+
+        Returns:
+            bool: True if the discount can be used for this basket
+        """
+        counts = self.discount_redemption_counts.get(
+            discount.id, {"total": 0, "by_user": 0}
+        )
+        product_ids = self.discount_product_ids.get(discount.id)
+        if product_ids is not None and not product_ids.intersection(
+            product.id for product in self.products
+        ):
+            return False
+
+        return discount.check_redemption_rules(counts["total"], counts["by_user"])
+
+    def has_valid_discounts(self) -> bool:
+        """Return true if all of the discounts applied to the basket are valid"""
+        return all(
+            self.is_discount_valid(basket_discount.redeemed_discount)
+            for basket_discount in self.basket_discounts
+        )
@@ -0,0 +1,132 @@
+"""Tests for ecommerce.basket"""
+
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from mitol.common.utils import now_in_utc
+
+from courses.factories import BlockedCountryFactory, CourseRunFactory
+from courses.models import PaidCourseRun
+from ecommerce.basket import BasketEvaluation
+from ecommerce.constants import REDEMPTION_TYPE_ONE_TIME
+from ecommerce.factories import (
+    BasketFactory,
+    BasketItemFactory,
+    OrderFactory,
+    ProductFactory,
+    UnlimitedUseDiscountFactory,
+)
+from ecommerce.models import (
+    BasketDiscount,
+    DiscountProduct,
+    DiscountRedemption,
+    OrderStatus,
+)
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def basket():
+    """Return a basket"""
+    return BasketFactory.create()
+
+
+def add_basket_discount(basket, discount):
+    """Apply a discount to a basket"""
+    return BasketDiscount.objects.create(
+        redemption_date=now_in_utc(),
+        redeemed_by=basket.user,
+        redeemed_discount=discount,
+        redeemed_basket=basket,
+    )
+
+
+@pytest.mark.parametrize("blocked", [True, False])
+def test_has_blocked_products(basket, blocked):
+    """has_blocked_products should be true if a course in the basket blocks the user's country"""
+    item = BasketItemFactory.create(basket=basket)
+    BlockedCountryFactory.create(
+        course=item.product.purchasable_object.course,
+        country=basket.user.legal_address.country if blocked else "ZZ",
+    )
+    assert BasketEvaluation(basket).has_blocked_products() is blocked
+
+
+@pytest.mark.parametrize("order_state", [OrderStatus.FULFILLED, OrderStatus.PENDING])
+def test_has_purchased_same_courserun(basket, order_state):
+    """has_purchased_same_courserun should be true if the user has a fulfilled order for a run in the basket"""
+    item = BasketItemFactory.create(basket=basket)
+    PaidCourseRun.objects.create(
+        user=basket.user,
+        course_run=item.product.purchasable_object,
+        order=OrderFactory.create(purchaser=basket.user, state=order_state),
+    )
+    assert BasketEvaluation(basket).has_purchased_same_courserun() is (
+        order_state == OrderStatus.FULFILLED
+    )
+
+
+@pytest.mark.parametrize("upgradable", [True, False])
+def test_has_non_upgradable_courserun(basket, upgradable):
+    """has_non_upgradable_courserun should be true if the upgrade deadline of a run in the basket has passed"""
+    run = CourseRunFactory.create(
+        upgrade_deadline=now_in_utc() + timedelta(days=1 if upgradable else -1)
+    )
+    BasketItemFactory.create(
+        basket=basket, product=ProductFactory.create(purchasable_object=run)
+    )
+    assert BasketEvaluation(basket).has_non_upgradable_courserun() is not upgradable
+
+
+@pytest.mark.parametrize("redeemed", [True, False])
+def test_has_valid_discounts_redemptions(basket, redeemed):
+    """has_valid_discounts should be false if a one-time discount was already redeemed"""
+    BasketItemFactory.create(basket=basket)
+    discount = UnlimitedUseDiscountFactory.create(
+        redemption_type=REDEMPTION_TYPE_ONE_TIME
+    )
+    add_basket_discount(basket, discount)
+    if redeemed:
+        DiscountRedemption.objects.create(
+            redeemed_discount=discount,
+            redemption_date=now_in_utc(),
+            redeemed_order=OrderFactory.create(state=OrderStatus.FULFILLED),
+            redeemed_by=basket.user,
+        )
+    assert BasketEvaluation(basket).has_valid_discounts() is not redeemed
+
+
+@pytest.mark.parametrize("in_basket", [True, False])
+def test_has_valid_discounts_products(basket, in_basket):
+    """has_valid_discounts should be false if a discount is limited to products that are not in the basket"""
+    item = BasketItemFactory.create(basket=basket)
+    discount = UnlimitedUseDiscountFactory.create()
+    DiscountProduct.objects.create(
+        discount=discount,
+        product=item.product if in_basket else ProductFactory.create(),
+    )
+    add_basket_discount(basket, discount)
+    assert BasketEvaluation(basket).has_valid_discounts() is in_basket
+
+
+@pytest.mark.parametrize("item_count", [1, 4])
+def test_evaluation_query_count(basket, item_count):
+    """Evaluating a basket should run the same number of queries regardless of its size"""
+    for _ in range(item_count):
+        item = BasketItemFactory.create(basket=basket)
+        BlockedCountryFactory.create(
+            course=item.product.purchasable_object.course, country="ZZ"
+        )
+    add_basket_discount(basket, UnlimitedUseDiscountFactory.create())
+    basket.user.legal_address  # noqa: B018
+
+    with CaptureQueriesContext(connection) as queries:
+        evaluation = BasketEvaluation(basket)
+        assert evaluation.has_blocked_products() is False
+        assert evaluation.has_purchased_same_courserun() is False
+        evaluation.has_non_upgradable_courserun()
+        assert evaluation.has_valid_discounts() is True
+    assert len(queries) == 7
@@ -27,6 +27,10 @@ ALL_REDEMPTION_TYPES = [
 
 REDEMPTION_TYPES = list(zip(ALL_REDEMPTION_TYPES, ALL_REDEMPTION_TYPES))
 
+# How long a pending order's discount redemptions count against the discount's
+# limits while the learner is at the payment gateway
+DISCOUNT_REDEMPTION_RESERVATION_MINUTES = 30
+
 PAYMENT_TYPE_MARKETING = "marketing"
 PAYMENT_TYPE_SALES = "sales"
 PAYMENT_TYPE_FINANCIAL_ASSISTANCE = "financial-assistance"
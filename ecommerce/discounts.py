@@ -1,7 +1,11 @@
 import abc
+from collections import OrderedDict
 from dataclasses import dataclass
 from decimal import Decimal
+from threading import Lock
+from typing import Dict, Iterable  # noqa: UP035
 
+from django.contrib.contenttypes.models import ContentType
 from reversion.models import Version
 
 from ecommerce.constants import (
@@ -9,7 +13,22 @@ from ecommerce.constants import (
     DISCOUNT_TYPE_FIXED_PRICE,
     DISCOUNT_TYPE_PERCENT_OFF,
 )
-from ecommerce.models import Discount, Product
+from ecommerce.models import Discount, Line, Product
+
+PRODUCT_VERSION_CACHE_SIZE = 4096
+PRODUCT_VERSION_FIELDS = (
+    "id",
+    "content_type_id",
+    "object_id",
+    "price",
+    "description",
+    "is_active",
+)
+
+# Product field values keyed by Version id. Versions are never changed once they
+# are recorded, so entries don't need to be invalidated.
+_product_version_cache = OrderedDict()
+_product_version_cache_lock = Lock()
 
 
 def resolve_product_version(product: Product, product_version=None):
@@ -23,23 +42,74 @@ def resolve_product_version(product: Product, product_version=None):
     if product_version is None:
         return product
 
-    versions = Version.objects.get_for_object(product)
+    if product_version.object_id != str(
+        product.id
+    ) or product_version.content_type_id != (
+        ContentType.objects.get_for_model(Product).id
+    ):
+        raise TypeError("Invalid product version specified")  # noqa: EM101
+
+    return product_from_version(product_version)
 
-    if versions.count() == 0:
-        return product
 
-    for test_version in versions.all():
-        if test_version == product_version:
-            return Product(
-                id=test_version.field_dict["id"],
-                content_type_id=test_version.field_dict["content_type_id"],
-                object_id=test_version.field_dict["object_id"],
-                price=test_version.field_dict["price"],
-                description=test_version.field_dict["description"],
-                is_active=test_version.field_dict["is_active"],
-            )
-
-    raise TypeError("Invalid product version specified")  # noqa: EM101
+def _get_product_version_fields(product_version: Version) -> dict:
+    """Return the product field values stored in a Version, using the process cache"""
+    with _product_version_cache_lock:
+        fields = _product_version_cache.get(product_version.id)
+        if fields is not None:
+            _product_version_cache.move_to_end(product_version.id)
+            return fields
+
+    field_dict = product_version.field_dict
+    fields = {name: field_dict[name] for name in PRODUCT_VERSION_FIELDS}
+    with _product_version_cache_lock:
+        _product_version_cache[product_version.id] = fields
+        if len(_product_version_cache) > PRODUCT_VERSION_CACHE_SIZE:
+            _product_version_cache.popitem(last=False)
+    return fields
+
+
+def product_from_version(product_version: Version) -> Product:
+    """
+    Build an (unsaved) Product from the data stored in one of its reversion Versions.
+
+    Returns: Product; the product as it was when the version was recorded
+    """
+    return Product(**_get_product_version_fields(product_version))
+
+
+def products_from_lines(lines: Iterable[Line]) -> Dict[int, Product]:  # noqa: UP006
+    """
+    Build the versioned Products for a list of lines, loading the versions that are
+    not already cached with a single query.
+
+    Returns: dict; the products keyed by line id
+    """
+    lines = list(lines)
+    product_version_field = Line._meta.get_field("product_version")  # noqa: SLF001
+    with _product_version_cache_lock:
+        cached_fields = {
+            line.product_version_id: _product_version_cache[line.product_version_id]
+            for line in lines
+            if line.product_version_id in _product_version_cache
+        }
+    missing_ids = {
+        line.product_version_id
+        for line in lines
+        if line.product_version_id not in cached_fields
+        and not product_version_field.is_cached(line)
+    }
+    versions = Version.objects.in_bulk(missing_ids) if missing_ids else {}
+
+    products = {}
+    for line in lines:
+        if line.product_version_id in cached_fields:
+            products[line.id] = Product(**cached_fields[line.product_version_id])
+            continue
+        if line.product_version_id in versions:
+            line.product_version = versions[line.product_version_id]
+        products[line.id] = product_from_version(line.product_version)
+    return products
 
 
 @dataclass
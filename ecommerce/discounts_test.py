@@ -2,18 +2,27 @@ import random
 from decimal import Decimal
 
 import pytest
+import reversion
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from reversion.models import Version
 
 from ecommerce.discounts import (
     DiscountType,
     DollarsOffDiscount,
     FixedPriceDiscount,
     PercentDiscount,
+    product_from_version,
+    products_from_lines,
+    resolve_product_version,
 )
 from ecommerce.factories import (
     DiscountFactory,
+    LineFactory,
     ProductFactory,
     UnlimitedUseDiscountFactory,
 )
+from ecommerce.models import Line
 from users.factories import UserFactory
 
 pytestmark = [pytest.mark.django_db]
@@ -103,3 +112,61 @@ def test_discounted_price(products):
     )
 
     assert test_discounted_price == manually_discounted_prices
+
+
+def test_resolve_product_version():
+    """resolve_product_version should build the product as it was at the given version"""
+    with reversion.create_revision():
+        product = ProductFactory.create(price=Decimal("10.00"))
+    version = Version.objects.get_for_object(product).first()
+    with reversion.create_revision():
+        product.price = Decimal("20.00")
+        product.save()
+
+    assert resolve_product_version(product) == product
+    resolved = resolve_product_version(product, version)
+    assert resolved.id == product.id
+    assert resolved.price == Decimal("10.00")
+
+    with pytest.raises(TypeError):
+        resolve_product_version(ProductFactory.create(), version)
+
+
+def test_product_from_version_cached():
+    """product_from_version should only deserialize a version once, and return a new product each time"""
+    with reversion.create_revision():
+        product = ProductFactory.create()
+    version = Version.objects.get_for_object(product).first()
+
+    first = product_from_version(version)
+    version.serialized_data = "invalid"
+    second = product_from_version(version)
+    assert first is not second
+    assert second.price == product.price
+    assert second.purchasable_object == product.purchasable_object
+
+
+def test_products_from_lines():
+    """products_from_lines should load uncached versions for all lines with a single query"""
+    lines = []
+    for _ in range(3):
+        with reversion.create_revision():
+            product = ProductFactory.create()
+        lines.append(
+            LineFactory.create(
+                product_version=Version.objects.get_for_object(product).first()
+            )
+        )
+    lines = list(Line.objects.filter(id__in=[line.id for line in lines]))
+
+    with CaptureQueriesContext(connection) as queries:
+        products = products_from_lines(lines)
+    assert len(queries) == 1
+    for line in lines:
+        assert products[line.id].id == int(line.product_version.object_id)
+
+    lines = list(Line.objects.filter(id__in=[line.id for line in lines]))
+    with CaptureQueriesContext(connection) as queries:
+        assert products_from_lines(lines).keys() == products.keys()
+        assert lines[0].product.id == products[lines[0].id].id
+    assert len(queries) == 0
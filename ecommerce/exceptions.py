@@ -0,0 +1,13 @@
+"""
+Exceptions for ecommerce
+"""
+
+
+class DiscountRedemptionLimitError(Exception):
+    """
+    A discount can't be redeemed again because it reached its redemption limit
+    """
+
+    def __init__(self, discount_id):
+        self.discount_id = discount_id
+        super().__init__(f"Discount {discount_id} has no redemptions left")
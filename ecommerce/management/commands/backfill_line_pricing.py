@@ -0,0 +1,63 @@
+"""
+Stores the list price, discount amount and final price for order lines that were
+created before these prices were stored on the line.
+"""
+
+from django.core.management import BaseCommand
+from django.db.models import Prefetch
+
+from ecommerce.models import DiscountRedemption, Line
+
+
+class Command(BaseCommand):
+    """
+    Stores the prices of order lines that don't have them yet.
+    """
+
+    help = "Stores the prices of order lines that don't have them yet."
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="The number of lines to update at a time.",
+        )
+
+    def handle(self, *args, **kwargs):  # noqa: ARG002
+        batch_size = kwargs["batch_size"]
+        updated = 0
+        last_id = 0
+
+        while True:
+            lines = list(
+                Line.objects.filter(final_price__isnull=True, id__gt=last_id)
+                .select_related("product_version", "order")
+                .prefetch_related(
+                    Prefetch(
+                        "order__discounts",
+                        queryset=DiscountRedemption.objects.select_related(
+                            "redeemed_discount"
+                        ),
+                    )
+                )
+                .order_by("id")[:batch_size]
+            )
+            if not lines:
+                break
+
+            for line in lines:
+                line.set_pricing(
+                    [
+                        redemption.redeemed_discount
+                        for redemption in line.order.discounts.all()
+                    ]
+                )
+            Line.objects.bulk_update(
+                lines, ["list_price", "discount_amount", "final_price"]
+            )
+            updated += len(lines)
+            last_id = lines[-1].id
+            self.stdout.write(f"Updated prices for {updated} lines")
+
+        self.stdout.write(self.style.SUCCESS(f"Done, updated {updated} lines"))
@@ -0,0 +1,58 @@
+"""Tests for the backfill_line_pricing command"""
+
+from decimal import Decimal
+from io import StringIO
+
+import pytest
+import reversion
+from django.core.management import call_command
+from mitol.common.utils import now_in_utc
+from reversion.models import Version
+
+from ecommerce.constants import DISCOUNT_TYPE_PERCENT_OFF
+from ecommerce.factories import (
+    LineFactory,
+    OrderFactory,
+    ProductFactory,
+    UnlimitedUseDiscountFactory,
+)
+from ecommerce.models import DiscountRedemption, Line, OrderStatus
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_backfill_line_pricing():
+    """The command should store prices for lines that don't have them, using the order's discounts"""
+    discount = UnlimitedUseDiscountFactory.create(
+        discount_type=DISCOUNT_TYPE_PERCENT_OFF, amount=Decimal("10")
+    )
+    lines = []
+    for price in ["100.00", "50.00", "20.00"]:
+        with reversion.create_revision():
+            product = ProductFactory.create(price=Decimal(price))
+        order = OrderFactory.create(state=OrderStatus.FULFILLED)
+        DiscountRedemption.objects.create(
+            redeemed_discount=discount,
+            redemption_date=now_in_utc(),
+            redeemed_order=order,
+            redeemed_by=order.purchaser,
+        )
+        lines.append(
+            LineFactory.create(
+                order=order,
+                product_version=Version.objects.get_for_object(product).first(),
+            )
+        )
+
+    call_command("backfill_line_pricing", "--batch-size", "2", stdout=StringIO())
+
+    assert [
+        (line.list_price, line.discount_amount, line.final_price)
+        for line in Line.objects.filter(id__in=[line.id for line in lines]).order_by(
+            "id"
+        )
+    ] == [
+        (Decimal("100.00"), Decimal("10.00"), Decimal("90.00")),
+        (Decimal("50.00"), Decimal("5.00"), Decimal("45.00")),
+        (Decimal("20.00"), Decimal("2.00"), Decimal("18.00")),
+    ]
@@ -28,11 +28,9 @@ The payment type should be one of (`marketing`, `sales`, `financial-assistance`,
 
 """
 
-import csv
-
 from django.core.management import BaseCommand
 
-from ecommerce.api import generate_discount_code
+from ecommerce.api import generate_discount_code, write_discount_codes_csv
 
 
 class Command(BaseCommand):
@@ -117,20 +115,6 @@ class Command(BaseCommand):
             self.stderr.write(self.style.ERROR(e))
 
         with open("generated-codes.csv", mode="w") as output_file:  # noqa: PTH123
-            writer = csv.DictWriter(
-                output_file, ["code", "type", "amount", "expiration_date"]
-            )
-
-            writer.writeheader()
-
-            for code in generated_codes:
-                writer.writerow(
-                    {
-                        "code": code.discount_code,
-                        "type": code.discount_type,
-                        "amount": code.amount,
-                        "expiration_date": code.expiration_date,
-                    }
-                )
+            write_discount_codes_csv(generated_codes, output_file)
 
         self.stdout.write(self.style.SUCCESS(f"{len(generated_codes)} created."))
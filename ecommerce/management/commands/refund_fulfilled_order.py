@@ -17,6 +17,7 @@ this command comes in to clean up afterwards.)
 
 from django.core.management import BaseCommand
 from django.core.management.base import CommandError
+from django.db import transaction
 
 from courses.api import deactivate_run_enrollment
 from courses.models import CourseRunEnrollment
@@ -60,8 +61,10 @@ class Command(BaseCommand):
         except:  # noqa: E722
             raise CommandError("Couldn't find that order, or the order was ambiguous.")  # noqa: B904, EM101
 
-        order.state = OrderStatus.REFUNDED
-        order.save()
+        with transaction.atomic():
+            order.get_object_flow().count_discount_redemptions(-1)
+            order.state = OrderStatus.REFUNDED
+            order.save()
         sync_hubspot_deal(order)
 
         run_enrollments = (
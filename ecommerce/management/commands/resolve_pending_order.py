@@ -70,6 +70,7 @@ class Command(BaseCommand):
             fulfilled_count,
             cancel_count,
             error_count,
+            _,
         ) = check_and_process_pending_orders_for_resolution(pending_orders)
 
         self.stdout.write(
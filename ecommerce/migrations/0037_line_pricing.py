@@ -0,0 +1,33 @@
+# Generated by Django 4.2.18 on 2026-10-19 12:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("ecommerce", "0036_alter_order_state"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="line",
+            name="discount_amount",
+            field=models.DecimalField(
+                blank=True, decimal_places=2, max_digits=7, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="line",
+            name="final_price",
+            field=models.DecimalField(
+                blank=True, decimal_places=2, max_digits=7, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="line",
+            name="list_price",
+            field=models.DecimalField(
+                blank=True, decimal_places=2, max_digits=7, null=True
+            ),
+        ),
+    ]
@@ -0,0 +1,102 @@
+# Generated by Django 4.2.18 on 2026-10-19 12:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def count_fulfilled_redemptions(apps, schema_editor):
+    """Counts the existing redemptions in fulfilled orders"""
+    DiscountRedemption = apps.get_model("ecommerce", "DiscountRedemption")
+    DiscountRedemptionCount = apps.get_model("ecommerce", "DiscountRedemptionCount")
+    UserDiscountRedemptionCount = apps.get_model(
+        "ecommerce", "UserDiscountRedemptionCount"
+    )
+    redemptions = DiscountRedemption.objects.filter(redeemed_order__state="fulfilled")
+
+    DiscountRedemptionCount.objects.bulk_create(
+        DiscountRedemptionCount(
+            discount_id=row["redeemed_discount_id"], count=row["count"]
+        )
+        for row in redemptions.values("redeemed_discount_id").annotate(
+            count=models.Count("id")
+        )
+    )
+    UserDiscountRedemptionCount.objects.bulk_create(
+        UserDiscountRedemptionCount(
+            discount_id=row["redeemed_discount_id"],
+            user_id=row["redeemed_by_id"],
+            count=row["count"],
+        )
+        for row in redemptions.values(
+            "redeemed_discount_id", "redeemed_by_id"
+        ).annotate(count=models.Count("id"))
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("ecommerce", "0037_line_pricing"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DiscountRedemptionCount",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("count", models.PositiveIntegerField(default=0)),
+                (
+                    "discount",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="redemption_count",
+                        to="ecommerce.discount",
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="UserDiscountRedemptionCount",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("count", models.PositiveIntegerField(default=0)),
+                (
+                    "discount",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="user_redemption_counts",
+                        to="ecommerce.discount",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("discount", "user")},
+            },
+        ),
+        migrations.RunPython(count_fulfilled_redemptions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,105 @@
+# Generated by Django 4.2.18 on 2026-10-19 13:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def index_product_enrollability(apps, schema_editor):  # noqa: C901
+    """Fills the enrollability index for the existing products"""
+    ContentType = apps.get_model("contenttypes", "ContentType")
+    CourseRun = apps.get_model("courses", "CourseRun")
+    ProgramRun = apps.get_model("courses", "ProgramRun")
+    ProgramRequirement = apps.get_model("courses", "ProgramRequirement")
+    Product = apps.get_model("ecommerce", "Product")
+    ProductEnrollability = apps.get_model("ecommerce", "ProductEnrollability")
+
+    content_types = {
+        content_type.id: content_type.model
+        for content_type in ContentType.objects.filter(
+            app_label="courses", model__in=["courserun", "programrun"]
+        )
+    }
+    course_runs = CourseRun.objects.in_bulk()
+    program_runs = ProgramRun.objects.in_bulk()
+    required_course_ids = {}
+    for program_id, course_id in ProgramRequirement.objects.filter(
+        course__isnull=False
+    ).values_list("program_id", "course_id"):
+        required_course_ids.setdefault(program_id, set()).add(course_id)
+    course_enrollment_ends = {}
+    for run in course_runs.values():
+        if run.course_id not in course_enrollment_ends:
+            course_enrollment_ends[run.course_id] = run.enrollment_end
+        elif (
+            course_enrollment_ends[run.course_id] is not None
+            and run.enrollment_end is not None
+        ):
+            course_enrollment_ends[run.course_id] = max(
+                course_enrollment_ends[run.course_id], run.enrollment_end
+            )
+        else:
+            course_enrollment_ends[run.course_id] = None
+
+    rows = []
+    for product in Product.objects.all():
+        model = content_types.get(product.content_type_id)
+        is_enrollable = True
+        enrollable_until = None
+
+        if model == "courserun" and product.object_id in course_runs:
+            enrollable_until = course_runs[product.object_id].enrollment_end
+        elif model == "programrun" and product.object_id in program_runs:
+            run = program_runs[product.object_id]
+            enrollable_until = run.end_date
+            for course_id in required_course_ids.get(run.program_id, ()):
+                if course_id not in course_enrollment_ends:
+                    is_enrollable = False
+                    break
+                course_end = course_enrollment_ends[course_id]
+                if enrollable_until is None or (
+                    course_end is not None and course_end < enrollable_until
+                ):
+                    enrollable_until = course_end
+        else:
+            is_enrollable = False
+
+        rows.append(
+            ProductEnrollability(
+                product=product,
+                is_enrollable=is_enrollable,
+                enrollable_until=enrollable_until,
+            )
+        )
+
+    ProductEnrollability.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("courses", "0057_alter_program_end_date_alter_program_start_date"),
+        ("ecommerce", "0039_discount_code_batch"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProductEnrollability",
+            fields=[
+                (
+                    "product",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="enrollability",
+                        serialize=False,
+                        to="ecommerce.product",
+                    ),
+                ),
+                ("is_enrollable", models.BooleanField(default=True)),
+                (
+                    "enrollable_until",
+                    models.DateTimeField(blank=True, db_index=True, null=True),
+                ),
+            ],
+        ),
+        migrations.RunPython(index_product_enrollability, migrations.RunPython.noop),
+    ]
@@ -2,7 +2,8 @@ from __future__ import annotations
 
 import logging
 import uuid
-from datetime import datetime
+from collections import Counter
+from datetime import datetime, timedelta
 from decimal import Decimal
 from typing import List, Optional  # noqa: UP035
 
@@ -14,7 +15,8 @@ from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import ValidationError
 from django.db import models, transaction
-from django.db.models import TextChoices
+from django.db.models import F, TextChoices
+from django.db.models.functions import Greatest
 from django.utils.functional import cached_property
 from mitol.common.models import TimestampedModel
 from mitol.common.utils.datetime import now_in_utc
@@ -24,6 +26,7 @@ from viewflow.fsm import State
 
 from courses.models import CourseRun, PaidCourseRun
 from ecommerce.constants import (
+    DISCOUNT_REDEMPTION_RESERVATION_MINUTES,
     DISCOUNT_TYPE_DOLLARS_OFF,
     DISCOUNT_TYPE_FIXED_PRICE,
     DISCOUNT_TYPE_PERCENT_OFF,
@@ -37,6 +40,7 @@ from ecommerce.constants import (
     TRANSACTION_TYPE_REFUND,
     TRANSACTION_TYPES,
 )
+from ecommerce.exceptions import DiscountRedemptionLimitError
 from ecommerce.tasks import send_ecommerce_order_receipt, send_order_refund_email
 from main.settings import TIME_ZONE
 from openedx.constants import EDX_ENROLLMENT_VERIFIED_MODE
@@ -111,51 +115,30 @@ class Product(TimestampedModel):
         return f"#{self.id} {self.description} {self.price}"
 
 
-class Basket(TimestampedModel):
-    """Represents a User's basket."""
+class ProductEnrollability(models.Model):
+    """
+    Whether and until when a product can be enrolled in, denormalized from the
+    dates of its course or program run (and of the courses that a program
+    requires) so that products can be listed with a simple filter.
+    """
 
-    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="basket")
+    product = models.OneToOneField(
+        Product,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="enrollability",
+    )
+    is_enrollable = models.BooleanField(default=True)
+    enrollable_until = models.DateTimeField(null=True, blank=True, db_index=True)
 
-    def has_user_blocked_products(self, user):
-        """Return true if any of the courses in the basket block user's country"""
-        basket_items = self.basket_items.prefetch_related("product")
-        return any(
-            [  # noqa: C419
-                item.product.purchasable_object.course.is_country_blocked(user)
-                for item in basket_items
-            ]
-        )
+    def __str__(self):
+        return f"Product #{self.product_id} enrollable: {self.is_enrollable}, until {self.enrollable_until}"
 
-    def has_user_purchased_same_courserun(self, user):
-        """
-        Return true if any of the courses in the basket has already purchased
-        """
-        basket_items = self.basket_items.prefetch_related("product")
-        for item in basket_items:
-            purchased_object = item.product.purchasable_object
-            if isinstance(purchased_object, CourseRun):  # noqa: SIM102
-                # PaidCourseRun should only contain fulfilled orders
-                if PaidCourseRun.fulfilled_paid_course_run_exists(
-                    user, purchased_object
-                ):
-                    return True
-
-        return False
-
-    def has_user_purchased_non_upgradable_courserun(self):
-        """
-        Return true if any of the courses in the basket can not be Upgraded/Purchased because of past upgrade_deadline
-        """
-        basket_items = self.basket_items.prefetch_related("product")
-        for item in basket_items:
-            purchased_object = item.product.purchasable_object
-            # If the upgrade_deadline has passed for a course it should not be purchased if it was in basket
-            return (
-                isinstance(purchased_object, CourseRun)
-                and not purchased_object.is_upgradable
-            )
 
-        return False
+class Basket(TimestampedModel):
+    """Represents a User's basket."""
+
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="basket")
 
     def compare_to_order(self, order):  # noqa: C901
         """
@@ -258,6 +241,13 @@ class Discount(TimestampedModel):
         help_text="If set, this discount code will not be redeemable after this date.",
     )
     is_bulk = models.BooleanField(default=False)
+    batch = models.ForeignKey(
+        "DiscountCodeBatch",
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="discounts",
+    )
 
     def __str__(self):
         return f"{self.amount} {self.discount_type} {self.redemption_type} - {self.discount_code}"
@@ -293,6 +283,24 @@ class Discount(TimestampedModel):
     def is_redeemed(self):
         return DiscountRedemption.objects.filter(redeemed_discount=self).exists()
 
+    def get_fulfilled_redemption_count(self, user: Optional[User] = None) -> int:
+        """
+        Returns the number of times the discount has been redeemed in fulfilled
+        orders, read from the redemption counters.
+
+        Args:
+            - user (User): if set, only count the redemptions by this user.
+        Returns:
+            - int
+        """
+        if user is None:
+            counters = DiscountRedemptionCount.objects.filter(discount=self)
+        else:
+            counters = UserDiscountRedemptionCount.objects.filter(
+                discount=self, user=user
+            )
+        return counters.values_list("count", flat=True).first() or 0
+
     def check_validity(self, user: User):
         """
         Enforces the redemption rules for a given discount.
@@ -302,38 +310,68 @@ class Discount(TimestampedModel):
         Returns:
             - boolean
         """
-        if (
-            self.redemption_type == REDEMPTION_TYPE_ONE_TIME
-            and DiscountRedemption.objects.filter(
-                redeemed_discount=self,
-                redeemed_order__state=OrderStatus.FULFILLED,
-            ).count()
-            > 0
-        ):
-            return False
+        redemption_count = (
+            self.get_fulfilled_redemption_count()
+            if self.redemption_limit is not None
+            else 0
+        )
+        user_redemption_count = (
+            self.get_fulfilled_redemption_count(user)
+            if self.user_redemption_limit is not None
+            else 0
+        )
+        return self.check_redemption_rules(redemption_count, user_redemption_count)
 
-        if (
-            self.redemption_type == REDEMPTION_TYPE_ONE_TIME_PER_USER
-            and DiscountRedemption.objects.filter(
-                redeemed_discount=self,
-                redeemed_order__state=OrderStatus.FULFILLED,
-                redeemed_by=user,
-            ).count()
-            > 0
-        ):
-            return False
+    @property
+    def redemption_limit(self) -> Optional[int]:
+        """The number of fulfilled redemptions allowed in total, or None if unlimited"""
+        if self.redemption_type == REDEMPTION_TYPE_ONE_TIME:
+            return 1
+        return self.max_redemptions or None
 
-        if (
-            self.max_redemptions > 0
-            and DiscountRedemption.objects.filter(
-                redeemed_discount=self,
-                redeemed_order__state=OrderStatus.FULFILLED,
-            ).count()
-            >= self.max_redemptions
-        ):
-            return False
+    @property
+    def user_redemption_limit(self) -> Optional[int]:
+        """The number of fulfilled redemptions allowed for each user, or None if unlimited"""
+        if self.redemption_type == REDEMPTION_TYPE_ONE_TIME_PER_USER:
+            return 1
+        return None
+
+    def is_within_redemption_limits(
+        self, redemption_count: int, user_redemption_count: int
+    ) -> bool:
+        """
+        Returns True if the discount can be redeemed again, given its fulfilled
+        redemption counts.
 
-        return self.valid_now()
+        Args:
+            - redemption_count (int): The number of fulfilled redemptions in total.
+            - user_redemption_count (int): The number of fulfilled redemptions by the user.
+        Returns:
+            - boolean
+        """
+        limit = self.redemption_limit
+        user_limit = self.user_redemption_limit
+        return (limit is None or redemption_count < limit) and (
+            user_limit is None or user_redemption_count < user_limit
+        )
+
+    def check_redemption_rules(
+        self, redemption_count: int, user_redemption_count: int
+    ) -> bool:
+        """
+        Enforces the redemption rules for a discount against its fulfilled redemption
+        counts, so that counts that were loaded in bulk can be checked too.
+
+        Args:
+            - redemption_count (int): The number of fulfilled redemptions in total.
+            - user_redemption_count (int): The number of fulfilled redemptions by the user.
+        Returns:
+            - boolean
+        """
+        return (
+            self.is_within_redemption_limits(redemption_count, user_redemption_count)
+            and self.valid_now()
+        )
 
     def check_validity_with_products(self, products: list):
         """
@@ -434,6 +472,39 @@ class UserDiscount(TimestampedModel):
         return f"{self.discount} {self.user}"
 
 
+class DiscountCodeBatchStatus(TextChoices):
+    PENDING = "pending"
+    PROCESSING = "processing"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class DiscountCodeBatch(TimestampedModel):
+    """
+    A batch of discount codes that is generated in the background. The
+    parameters are the keyword arguments for ecommerce.api.generate_discount_code.
+    """
+
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        null=True,
+        on_delete=models.SET_NULL,
+        related_name="+",
+    )
+    parameters = models.JSONField()
+    status = models.CharField(
+        max_length=20,
+        choices=DiscountCodeBatchStatus.choices,
+        default=DiscountCodeBatchStatus.PENDING,
+    )
+    count = models.PositiveIntegerField()
+    generated_count = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True, default="")
+
+    def __str__(self):
+        return f"Discount code batch {self.id}: {self.generated_count}/{self.count} {self.status}"
+
+
 class OrderStatus(TextChoices):
     PENDING = "pending"
     FULFILLED = "fulfilled"
@@ -462,7 +533,12 @@ class OrderFlow:
 
     @state.on_success()
     def _on_transition_success(self, descriptor, source, target, **kwargs):  # noqa: ARG002
-        self.order.save()
+        with transaction.atomic():
+            # fulfill counts the order's redemptions itself, so that it can refuse
+            # the order before anything is recorded
+            if source == OrderStatus.FULFILLED and target != OrderStatus.FULFILLED:
+                self.count_discount_redemptions(-1)
+            self.order.save()
 
     @state.transition(source=State.ANY, target=OrderStatus.CANCELED)
     def cancel(self):
@@ -532,6 +608,18 @@ class OrderFlow:
 
         return refund_transaction
 
+    def count_discount_redemptions(self, delta, *, enforce_limits=False):
+        """
+        Adds delta to the redemption counters of the discounts redeemed in the order.
+        This is called when the order moves into or out of the fulfilled state, since
+        redemptions only count against a discount while their order is fulfilled.
+        """
+        update_discount_redemption_counts(
+            DiscountRedemption.objects.filter(redeemed_order=self.order),
+            delta,
+            enforce_limits=enforce_limits,
+        )
+
     def create_transaction(self, payment_data):
         log = logging.getLogger(__name__)  # noqa: F841
         transaction_id = payment_data.get("transaction_id")
@@ -574,16 +662,21 @@ class OrderFlow:
         target=OrderStatus.FULFILLED,
     )
     def fulfill(self, payment_data, already_enrolled=False):  # noqa: FBT002
-        # record the transaction
-        self.create_transaction(payment_data)
+        with transaction.atomic():
+            # count the order's discounts first, so an order whose discounts were
+            # used up meanwhile is refused before anything is recorded
+            self.count_discount_redemptions(1, enforce_limits=True)
 
-        # if user already enrolled from management command it'll not recreate
-        if not already_enrolled:
-            # create enrollments for what the learner has paid for
-            self.create_enrollments()
+            # record the transaction
+            self.create_transaction(payment_data)
+
+            # if user already enrolled from management command it'll not recreate
+            if not already_enrolled:
+                # create enrollments for what the learner has paid for
+                self.create_enrollments()
 
-        # record all the courseruns in the order
-        self.create_paid_courseruns()
+            # record all the courseruns in the order
+            self.create_paid_courseruns()
 
         # No email is required as this order is generated from management command
         if not already_enrolled:
@@ -634,6 +727,47 @@ class Order(TimestampedModel):
     def is_fulfilled(self):
         return self.state == OrderStatus.FULFILLED
 
+    def reserve_discount_redemptions(self):
+        """
+        Raises DiscountRedemptionLimitError if a discount redeemed in this order has
+        no redemptions left. Besides the fulfilled orders, the other pending orders
+        that redeemed the discount in the last DISCOUNT_REDEMPTION_RESERVATION_MINUTES
+        count against it, since their learners may be paying for them.
+
+        The discounts are locked until the surrounding transaction commits, so
+        concurrent checkouts with the same discount are checked one at a time and
+        each sees the redemptions of the others.
+        """
+        redemptions = list(self.discounts.all())
+        discounts = {
+            discount.id: discount
+            for discount in Discount.objects.select_for_update()
+            .filter(
+                id__in={redemption.redeemed_discount_id for redemption in redemptions}
+            )
+            .order_by("id")
+        }
+        reserved_since = now_in_utc() - timedelta(
+            minutes=DISCOUNT_REDEMPTION_RESERVATION_MINUTES
+        )
+        for redemption in redemptions:
+            discount = discounts[redemption.redeemed_discount_id]
+            if discount.redemption_limit is None and (
+                discount.user_redemption_limit is None
+            ):
+                continue
+            reserved = DiscountRedemption.objects.filter(
+                redeemed_discount=discount,
+                redeemed_order__state=OrderStatus.PENDING,
+                redemption_date__gte=reserved_since,
+            ).exclude(redeemed_order=self)
+            if not discount.is_within_redemption_limits(
+                discount.get_fulfilled_redemption_count() + reserved.count(),
+                discount.get_fulfilled_redemption_count(redemption.redeemed_by)
+                + reserved.filter(redeemed_by=redemption.redeemed_by).count(),
+            ):
+                raise DiscountRedemptionLimitError(discount.id)
+
     def _generate_reference_number(self):
         return f"{REFERENCE_NUMBER_PREFIX}{settings.ENVIRONMENT}-{self.id}"
 
@@ -733,7 +867,9 @@ class PendingOrder(Order):
                         redeemed_discount=discount,
                     )
 
-        # Create or get Line for each product.  Calculate the Order total based on Lines and discount.
+        # Create or get Line for each product, and store its prices with the discounts
+        # that were just applied. Calculate the Order total based on Lines and discount.
+        applied_discounts = [discount for discount in discounts or [] if discount]
         total = 0
         for i, product in enumerate(products):
             line, _ = order.lines.get_or_create(
@@ -745,6 +881,8 @@ class PendingOrder(Order):
                     quantity=1,
                 ),
             )
+            line.set_pricing(applied_discounts)
+            line.save(update_fields=["list_price", "discount_amount", "final_price"])
             total += line.discounted_price
 
         order.total_price_paid = total
@@ -898,6 +1036,19 @@ class Line(TimestampedModel):
         "purchased_content_type", "purchased_object_id"
     )
 
+    # Prices stored when the order is created, so they don't need to be recalculated
+    # from the product version and discounts. These are null for older orders that
+    # haven't been backfilled.
+    list_price = models.DecimalField(
+        max_digits=7, decimal_places=2, null=True, blank=True
+    )
+    discount_amount = models.DecimalField(
+        max_digits=7, decimal_places=2, null=True, blank=True
+    )
+    final_price = models.DecimalField(
+        max_digits=7, decimal_places=2, null=True, blank=True
+    )
+
     class Meta:
         constraints = [
             models.UniqueConstraint(
@@ -917,7 +1068,9 @@ class Line(TimestampedModel):
     @property
     def unit_price(self):
         """Return the price of the product"""
-        return self.product_version.field_dict["price"]
+        if self.list_price is not None:
+            return self.list_price
+        return self.product.price
 
     @cached_property
     def total_price(self):
@@ -927,30 +1080,55 @@ class Line(TimestampedModel):
     @cached_property
     def discounted_price(self):
         """Return the price of the product with discounts"""
-        from ecommerce.discounts import DiscountType
+        if self.final_price is not None:
+            return self.final_price
 
-        discounts = [
-            discount_redemption.redeemed_discount
-            for discount_redemption in self.order.discounts.all()
-        ]
+        return self.calculate_discounted_price(
+            [
+                discount_redemption.redeemed_discount
+                for discount_redemption in self.order.discounts.all()
+            ]
+        )
+
+    def calculate_discounted_price(self, discounts: List[Discount]) -> Decimal:  # noqa: UP006
+        """
+        Calculate the price of the line with the best of the given discounts applied
+
+        Args:
+            discounts (List[Discount]): the discounts applied to the order
+
+        Returns:
+            Decimal: the discounted price of the line
+        """
+        from ecommerce.discounts import DiscountType
 
         return (
             DiscountType.get_discounted_price(
                 discounts,
-                Product.all_objects.get(pk=self.product_version.object_id),
-                product_version=self.product_version,
+                self.product,
             ).quantize(Decimal("0.01"))
             * self.quantity
         )
 
+    def set_pricing(self, discounts: List[Discount]):  # noqa: UP006
+        """
+        Calculate and set the stored prices of the line (without saving it)
+
+        Args:
+            discounts (List[Discount]): the discounts applied to the order
+        """
+        self.list_price = self.product.price
+        self.final_price = self.calculate_discounted_price(discounts)
+        self.discount_amount = self.list_price * self.quantity - self.final_price
+        self.__dict__.pop("discounted_price", None)
+        self.__dict__.pop("total_price", None)
+
     @cached_property
     def product(self):
-        from ecommerce.discounts import resolve_product_version
+        """Return the product as it was at the version that was purchased"""
+        from ecommerce.discounts import products_from_lines
 
-        return resolve_product_version(
-            Product.all_objects.get(pk=self.product_version.field_dict["id"]),
-            self.product_version,
-        )
+        return products_from_lines([self])[self.id]
 
     def __str__(self):
         return f"{self.product_version}"
@@ -1053,5 +1231,147 @@ class DiscountRedemption(TimestampedModel):
         Order, on_delete=models.CASCADE, related_name="discounts"
     )
 
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            previous = (
+                DiscountRedemption.objects.filter(
+                    pk=self.pk, redeemed_order__state=OrderStatus.FULFILLED
+                )
+                .values("redeemed_discount_id", "redeemed_by_id")
+                .first()
+                if self.pk
+                else None
+            )
+            super().save(*args, **kwargs)
+
+            # move the redemption in the counters if it was or now is counted
+            # for a different discount or user
+            current = (
+                {
+                    "redeemed_discount_id": self.redeemed_discount_id,
+                    "redeemed_by_id": self.redeemed_by_id,
+                }
+                if Order.objects.filter(
+                    pk=self.redeemed_order_id, state=OrderStatus.FULFILLED
+                ).exists()
+                else None
+            )
+            if previous == current:
+                return
+            if previous is not None:
+                update_discount_redemption_counts([DiscountRedemption(**previous)], -1)
+            if current is not None:
+                update_discount_redemption_counts([self], 1)
+
     def __str__(self):
         return f"{self.redemption_date}: {self.redeemed_discount}, {self.redeemed_by}"
+
+
+class DiscountRedemptionCount(models.Model):
+    """
+    The number of redemptions of a discount in fulfilled orders
+    """
+
+    discount = models.OneToOneField(
+        Discount, on_delete=models.CASCADE, related_name="redemption_count"
+    )
+    count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.discount}: {self.count} redemptions"
+
+
+class UserDiscountRedemptionCount(models.Model):
+    """
+    The number of redemptions of a discount by a user in fulfilled orders
+    """
+
+    discount = models.ForeignKey(
+        Discount, on_delete=models.CASCADE, related_name="user_redemption_counts"
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="+",
+    )
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ("discount", "user")
+
+    def __str__(self):
+        return f"{self.discount}, {self.user}: {self.count} redemptions"
+
+
+def _add_to_redemption_count(
+    queryset, lookup: dict, amount: int, limit: Optional[int] = None
+):
+    """
+    Adds amount to the counter matching lookup. Counters are created for
+    increments only, so that a decrement can't recreate the counter of a discount
+    that is being deleted.
+
+    An increment that would take the counter over limit raises
+    DiscountRedemptionLimitError. The check is part of the UPDATE, so concurrent
+    increments can't both pass it.
+    """
+    if amount > 0:
+        if limit is not None and amount > limit:
+            raise DiscountRedemptionLimitError(lookup["discount_id"])
+        counter, created = queryset.get_or_create(**lookup, defaults={"count": amount})
+        if created:
+            return
+        if limit is not None:
+            if not queryset.filter(pk=counter.pk, count__lte=limit - amount).update(
+                count=F("count") + amount
+            ):
+                raise DiscountRedemptionLimitError(lookup["discount_id"])
+            return
+        lookup = {"pk": counter.pk}
+    queryset.filter(**lookup).update(count=Greatest(F("count") + amount, 0))
+
+
+def update_discount_redemption_counts(
+    redemptions, delta: int, *, enforce_limits: bool = False
+):
+    """
+    Adds delta to the fulfilled redemption counters of the discounts and users of
+    the given redemptions. The counters are updated in place in the database, so
+    concurrent updates don't overwrite each other.
+
+    Args:
+        - redemptions (iterable of DiscountRedemption): the redemptions to count
+        - delta (int): 1 if the redemptions now count, -1 if they no longer do
+        - enforce_limits (bool): if set, increments that would exceed a discount's
+            redemption limits raise DiscountRedemptionLimitError, which rolls back
+            the surrounding transaction (e.g. OrderFlow.fulfill)
+    """
+    totals = Counter()
+    user_totals = Counter()
+    for redemption in redemptions:
+        totals[redemption.redeemed_discount_id] += delta
+        user_totals[(redemption.redeemed_discount_id, redemption.redeemed_by_id)] += (
+            delta
+        )
+
+    discounts = Discount.objects.in_bulk(totals.keys()) if enforce_limits else {}
+    with transaction.atomic():
+        # update the counters in a fixed order so concurrent updates can't deadlock
+        for discount_id, amount in sorted(totals.items()):
+            _add_to_redemption_count(
+                DiscountRedemptionCount.objects,
+                {"discount_id": discount_id},
+                amount,
+                limit=discounts[discount_id].redemption_limit
+                if enforce_limits
+                else None,
+            )
+        for (discount_id, user_id), amount in sorted(user_totals.items()):
+            _add_to_redemption_count(
+                UserDiscountRedemptionCount.objects,
+                {"discount_id": discount_id, "user_id": user_id},
+                amount,
+                limit=discounts[discount_id].user_redemption_limit
+                if enforce_limits
+                else None,
+            )
@@ -10,10 +10,12 @@ from mitol.common.utils import now_in_utc
 from reversion.models import Version
 
 from ecommerce.constants import (
+    DISCOUNT_REDEMPTION_RESERVATION_MINUTES,
     DISCOUNT_TYPE_DOLLARS_OFF,
     DISCOUNT_TYPE_FIXED_PRICE,
     DISCOUNT_TYPE_PERCENT_OFF,
 )
+from ecommerce.exceptions import DiscountRedemptionLimitError
 from ecommerce.factories import (
     BasketFactory,
     BasketItemFactory,
@@ -164,6 +166,203 @@ def test_set_limit_discount_multiple_users(users, set_limited_use_discount):
     assert set_limited_use_discount.check_validity(user) is False
 
 
+@pytest.mark.parametrize("transition", ["cancel", "errored", "refund"])
+def test_redemption_counts_follow_order_state(
+    mocker, user, onetime_per_user_discount, transition
+):
+    """
+    Redemptions should be counted once their order is fulfilled, and no longer
+    counted once it leaves the fulfilled state or the redemption is deleted.
+    """
+    mocker.patch("ecommerce.models.send_order_refund_email")
+    order = OrderFactory.create(purchaser=user, state=OrderStatus.PENDING)
+    redemption = DiscountRedemption.objects.create(
+        redeemed_discount=onetime_per_user_discount,
+        redemption_date=now_in_utc(),
+        redeemed_order=order,
+        redeemed_by=user,
+    )
+    assert onetime_per_user_discount.get_fulfilled_redemption_count() == 0
+
+    order_flow = order.get_object_flow()
+    order_flow.fulfill({"amount": 0}, already_enrolled=True)
+    assert onetime_per_user_discount.get_fulfilled_redemption_count() == 1
+    assert onetime_per_user_discount.get_fulfilled_redemption_count(user) == 1
+    assert onetime_per_user_discount.check_validity(user) is False
+
+    order.save()
+    assert onetime_per_user_discount.get_fulfilled_redemption_count() == 1
+
+    if transition == "refund":
+        order_flow.refund(api_response_data={"id": "refund"}, amount=0, reason="refund")
+    else:
+        getattr(order_flow, transition)()
+    assert onetime_per_user_discount.get_fulfilled_redemption_count() == 0
+    assert onetime_per_user_discount.get_fulfilled_redemption_count(user) == 0
+    assert onetime_per_user_discount.check_validity(user) is True
+
+    other_order = OrderFactory.create(purchaser=user, state=OrderStatus.FULFILLED)
+    redemption.redeemed_order = other_order
+    redemption.save()
+    assert onetime_per_user_discount.get_fulfilled_redemption_count() == 1
+    redemption.delete()
+    assert onetime_per_user_discount.get_fulfilled_redemption_count() == 0
+    assert onetime_per_user_discount.get_fulfilled_redemption_count(user) == 0
+
+
+def test_order_save_is_a_plain_save(django_assert_num_queries, user):
+    """Saving an existing order shouldn't look up its state or its redemptions"""
+    order = OrderFactory.create(purchaser=user, state=OrderStatus.PENDING)
+    order.state = OrderStatus.FULFILLED
+
+    with django_assert_num_queries(1):
+        order.save()
+
+
+def test_fulfillment_enforces_redemption_limit(user, onetime_discount):
+    """
+    Fulfilling an order should not take a discount over its redemption limit, even
+    if the order was placed while the discount was still valid.
+    """
+    orders = OrderFactory.create_batch(2, purchaser=user, state=OrderStatus.PENDING)
+    for order in orders:
+        DiscountRedemption.objects.create(
+            redeemed_discount=onetime_discount,
+            redemption_date=now_in_utc(),
+            redeemed_order=order,
+            redeemed_by=user,
+        )
+
+    orders[0].get_object_flow().fulfill({"amount": 0}, already_enrolled=True)
+    with pytest.raises(DiscountRedemptionLimitError):
+        orders[1].get_object_flow().fulfill({"amount": 0}, already_enrolled=True)
+
+    orders[1].refresh_from_db()
+    assert orders[1].state == OrderStatus.PENDING
+    assert orders[1].transactions.count() == 0
+    assert onetime_discount.get_fulfilled_redemption_count() == 1
+
+
+@pytest.mark.parametrize(
+    ("minutes_ago", "same_order", "order_state", "is_reserved"),
+    [
+        (5, False, OrderStatus.PENDING, True),
+        (5, True, OrderStatus.PENDING, False),
+        (5, False, OrderStatus.CANCELED, False),
+        (
+            DISCOUNT_REDEMPTION_RESERVATION_MINUTES + 5,
+            False,
+            OrderStatus.PENDING,
+            False,
+        ),
+    ],
+)
+def test_reserve_discount_redemptions(  # noqa: PLR0913
+    user, onetime_discount, minutes_ago, same_order, order_state, is_reserved
+):
+    """
+    A pending order's redemptions should count against a discount for a while, so
+    other orders can't be sent to payment with the discount meanwhile
+    """
+    order = OrderFactory.create(purchaser=user, state=OrderStatus.PENDING)
+    DiscountRedemption.objects.create(
+        redeemed_discount=onetime_discount,
+        redemption_date=now_in_utc(),
+        redeemed_order=order,
+        redeemed_by=user,
+    )
+    DiscountRedemption.objects.create(
+        redeemed_discount=onetime_discount,
+        redemption_date=now_in_utc() - timedelta(minutes=minutes_ago),
+        redeemed_order=order if same_order else OrderFactory.create(state=order_state),
+        redeemed_by=UserFactory.create(),
+    )
+
+    if is_reserved:
+        with pytest.raises(DiscountRedemptionLimitError):
+            order.reserve_discount_redemptions()
+    else:
+        order.reserve_discount_redemptions()
+
+
+def test_fulfill_checks_redemption_limit_before_enrolling(
+    mocker, user, onetime_per_user_discount
+):
+    """The fulfill transition should refuse an order before enrolling the user if its discount was used up"""
+    perform_discount_redemption(user, onetime_per_user_discount)
+    order = OrderFactory.create(purchaser=user, state=OrderStatus.PENDING)
+    DiscountRedemption.objects.create(
+        redeemed_discount=onetime_per_user_discount,
+        redemption_date=now_in_utc(),
+        redeemed_order=order,
+        redeemed_by=user,
+    )
+    mock_enroll = mocker.patch("ecommerce.models.OrderFlow.create_enrollments")
+
+    with pytest.raises(DiscountRedemptionLimitError):
+        order.get_object_flow().fulfill({"amount": 0})
+
+    mock_enroll.assert_not_called()
+    assert order.transactions.count() == 0
+
+
+def test_redemption_counts_follow_redemption_changes(user, unlimited_discount):
+    """Changing the discount or user of a counted redemption should move its count"""
+    order = OrderFactory.create(purchaser=user, state=OrderStatus.FULFILLED)
+    redemption = DiscountRedemption.objects.create(
+        redeemed_discount=unlimited_discount,
+        redemption_date=now_in_utc(),
+        redeemed_order=order,
+        redeemed_by=user,
+    )
+    other_discount = UnlimitedUseDiscountFactory.create()
+    other_user = UserFactory.create()
+
+    redemption.redeemed_discount = other_discount
+    redemption.redeemed_by = other_user
+    redemption.save()
+    assert unlimited_discount.get_fulfilled_redemption_count() == 0
+    assert unlimited_discount.get_fulfilled_redemption_count(user) == 0
+    assert other_discount.get_fulfilled_redemption_count() == 1
+    assert other_discount.get_fulfilled_redemption_count(user) == 0
+    assert other_discount.get_fulfilled_redemption_count(other_user) == 1
+
+    redemption.save()
+    assert other_discount.get_fulfilled_redemption_count() == 1
+
+
+def test_check_validity_query_count(django_assert_num_queries, user, onetime_discount):
+    """Checking a discount should read the counters instead of counting redemptions"""
+    for _ in range(3):
+        perform_discount_redemption(UserFactory.create(), onetime_discount)
+
+    with django_assert_num_queries(1):
+        assert onetime_discount.check_validity(user) is False
+
+
+@pytest.mark.parametrize(
+    ("factory", "redemption_count", "user_redemption_count", "is_valid"),
+    [
+        (OneTimeDiscountFactory, 0, 0, True),
+        (OneTimeDiscountFactory, 1, 0, False),
+        (OneTimePerUserDiscountFactory, 5, 0, True),
+        (OneTimePerUserDiscountFactory, 5, 1, False),
+        (UnlimitedUseDiscountFactory, 100, 100, True),
+        (SetLimitDiscountFactory, 0, 0, True),
+        (SetLimitDiscountFactory, 100, 0, False),
+    ],
+)
+def test_check_redemption_rules(
+    factory, redemption_count, user_redemption_count, is_valid
+):
+    """check_redemption_rules should apply the redemption rules to the given counts"""
+    discount = factory.build()
+    assert (
+        discount.check_redemption_rules(redemption_count, user_redemption_count)
+        is is_valid
+    )
+
+
 def test_basket_discount_conversion(user, unlimited_discount):
     """
     Tests converting discounts applied to baskets to discounts applied to
@@ -618,3 +817,33 @@ def test_discount_expires_before_activation(unlimited_discount):
 
     test_discount.expiration_date = None
     test_discount.save()
+
+
+def test_pending_order_stores_line_pricing(basket):
+    """Creating a PendingOrder should store the prices of its lines with the discounts that were applied"""
+    with reversion.create_revision():
+        product = ProductFactory.create(price=Decimal("100.00"))
+    BasketItem.objects.create(product=product, basket=basket, quantity=1)
+
+    order = PendingOrder.create_from_basket(basket)
+    line = Line.objects.get(order=order)
+    assert line.list_price == Decimal("100.00")
+    assert line.discount_amount == Decimal("0.00")
+    assert line.final_price == Decimal("100.00")
+
+    discount = UnlimitedUseDiscountFactory.create(
+        discount_type=DISCOUNT_TYPE_DOLLARS_OFF, amount=Decimal("25.00")
+    )
+    BasketDiscount.objects.create(
+        redemption_date=now_in_utc(),
+        redeemed_by=basket.user,
+        redeemed_discount=discount,
+        redeemed_basket=basket,
+    )
+    order = PendingOrder.create_from_basket(basket)
+    line = Line.objects.get(order=order)
+    assert line.list_price == Decimal("100.00")
+    assert line.discount_amount == Decimal("25.00")
+    assert line.final_price == Decimal("75.00")
+    assert line.discounted_price == Decimal("75.00")
+    assert order.total_price_paid == Decimal("75.00")
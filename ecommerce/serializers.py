@@ -37,7 +37,13 @@ class ProgramRunProductPurchasableObjectSerializer(serializers.ModelSerializer):
 
 class CoursePageObjectField(serializers.RelatedField):
     def to_representation(self, value):
-        return CoursePageSerializer(instance=value).data
+        """Serialize the course page, reusing the data from the context if it was already serialized"""
+        course_pages = self.context.get("course_pages")
+        if course_pages is None:
+            return CoursePageSerializer(instance=value).data
+        if value.id not in course_pages:
+            course_pages[value.id] = CoursePageSerializer(instance=value).data
+        return course_pages[value.id]
 
 
 class CourseProductPurchasableObjectSerializer(serializers.ModelSerializer):
@@ -72,9 +78,13 @@ class ProductPurchasableObjectField(serializers.RelatedField):
     def to_representation(self, value):
         """Serialize the purchasable object using a serializer that matches the model type (either a Program Run or a Course Run)"""
         if isinstance(value, ProgramRun):
-            return ProgramRunProductPurchasableObjectSerializer(instance=value).data
+            return ProgramRunProductPurchasableObjectSerializer(
+                instance=value, context=self.context
+            ).data
         elif isinstance(value, CourseRun):
-            return CourseRunProductPurchasableObjectSerializer(instance=value).data
+            return CourseRunProductPurchasableObjectSerializer(
+                instance=value, context=self.context
+            ).data
         raise Exception(  # noqa: TRY002
             "Unexpected to find type for Product.purchasable_object:",  # noqa: EM101
             value.__class__,
@@ -255,11 +265,7 @@ class LineSerializer(serializers.ModelSerializer):
     product = serializers.SerializerMethodField()
 
     def get_product(self, instance):
-        product = models.Product.all_objects.get(
-            pk=instance.product_version.field_dict["id"]
-        )
-
-        return ProductSerializer(instance=product).data
+        return ProductSerializer(instance=instance.product, context=self.context).data
 
     class Meta:
         fields = [
@@ -294,20 +300,25 @@ class OrderSerializer(serializers.ModelSerializer):
 
     def get_refunds(self, instance):
         refunds = []
-        for transaction in (
-            models.Transaction.objects.filter(order=instance)
-            .filter(transaction_type=TRANSACTION_TYPE_REFUND)
-            .all()
-        ):
-            refunds.append(  # noqa: PERF401
-                {"amount": transaction.amount, "date": transaction.created_on}
-            )
+        for transaction in instance.transactions.all():
+            if transaction.transaction_type == TRANSACTION_TYPE_REFUND:
+                refunds.append(  # noqa: PERF401
+                    {"amount": transaction.amount, "date": transaction.created_on}
+                )
 
         return refunds
 
+    def get_latest_transaction(self, instance):
+        """Get the most recent transaction of the order, if there is one"""
+        return max(
+            instance.transactions.all(),
+            key=lambda transaction: transaction.created_on,
+            default=None,
+        )
+
     def get_transactions(self, instance):
         """Get transaction information if it exists"""
-        transaction = instance.transactions.order_by("-created_on").first()
+        transaction = self.get_latest_transaction(instance)
         if transaction:
             data = {
                 "card_number": None,
@@ -342,7 +353,7 @@ class OrderSerializer(serializers.ModelSerializer):
 
     def get_street_address(self, instance):
         """Get the address information from the transaction"""
-        transaction = instance.transactions.order_by("-created_on").first()
+        transaction = self.get_latest_transaction(instance)
         if transaction:
             street_address = {
                 "line": [],
@@ -405,12 +416,10 @@ class OrderHistorySerializer(serializers.ModelSerializer):
         titles = []
 
         for line in instance.lines.all():
-            product = models.Product.all_objects.get(
-                pk=line.product_version.field_dict["id"]
-            )
-            if product.content_type.model == "courserun":
+            product = line.product
+            if isinstance(product.purchasable_object, CourseRun):
                 titles.append(product.purchasable_object.course.title)
-            elif product.content_type.model == "programrun":
+            elif isinstance(product.purchasable_object, ProgramRun):
                 titles.append(product.description)
             else:
                 titles.append(f"No Title - {product.id}")
@@ -502,6 +511,22 @@ class BulkDiscountSerializer(serializers.Serializer):
     prefix = serializers.CharField(max_length=63, required=False)
 
 
+class DiscountCodeBatchSerializer(serializers.ModelSerializer):
+    """Serializer for the progress of a batch of discount codes"""
+
+    class Meta:
+        model = models.DiscountCodeBatch
+        fields = [
+            "id",
+            "status",
+            "count",
+            "generated_count",
+            "error",
+            "created_on",
+            "updated_on",
+        ]
+
+
 class UserDiscountSerializer(serializers.ModelSerializer):
     class Meta:
         model = models.UserDiscount
@@ -651,7 +676,7 @@ class TransactionOrderSerializer(serializers.ModelSerializer):
 
 class TransactionLineSerializer(serializers.BaseSerializer):
     def to_representation(self, instance):
-        coupon_redemption = instance.order.discounts.first()
+        coupon_redemption = next(iter(instance.order.discounts.all()), None)
         discount = 0.0
 
         if coupon_redemption:
@@ -1,10 +1,23 @@
 """Signals for ecommerce models"""
 
-from django.db.models.signals import post_save
+from django.contrib.contenttypes.models import ContentType
+from django.db.models.signals import post_delete, post_save
 from django.db.transaction import on_commit
 from django.dispatch import receiver
 
-from ecommerce.models import Product
+from courses.models import CourseRun, ProgramRequirement, ProgramRun
+from ecommerce.api import (
+    update_course_product_enrollability,
+    update_product_enrollability,
+    update_program_product_enrollability,
+)
+from ecommerce.models import (
+    DiscountRedemption,
+    Order,
+    OrderStatus,
+    Product,
+    update_discount_redemption_counts,
+)
 from hubspot_sync.task_helpers import sync_hubspot_product
 
 
@@ -14,3 +27,82 @@ def sync_product(sender, instance, created, **kwargs):  # pylint:disable=unused-
     Sync product to hubspot
     """
     on_commit(lambda: sync_hubspot_product(instance))
+
+
+def _is_fulfilled_redemption(redemption):
+    """Return True if the redemption belongs to a fulfilled order"""
+    return Order.objects.filter(
+        pk=redemption.redeemed_order_id, state=OrderStatus.FULFILLED
+    ).exists()
+
+
+@receiver(
+    post_delete,
+    sender=DiscountRedemption,
+    dispatch_uid="discount_redemption_post_delete",
+)
+def uncount_discount_redemption(sender, instance, **kwargs):  # pylint:disable=unused-argument  # noqa: ARG001
+    """
+    Stop counting a redemption of a fulfilled order that is deleted
+    """
+    if _is_fulfilled_redemption(instance):
+        update_discount_redemption_counts([instance], -1)
+
+
+@receiver(post_save, sender=Product, dispatch_uid="product_enrollability_post_save")
+def index_product_enrollability(sender, instance, **kwargs):  # pylint:disable=unused-argument  # noqa: ARG001
+    """
+    Update the enrollability index for a saved product
+    """
+    update_product_enrollability([instance])
+
+
+@receiver(post_save, sender=CourseRun, dispatch_uid="courserun_enrollability_post_save")
+@receiver(
+    post_delete, sender=CourseRun, dispatch_uid="courserun_enrollability_post_delete"
+)
+def index_course_run_enrollability(sender, instance, **kwargs):  # pylint:disable=unused-argument  # noqa: ARG001
+    """
+    Update the enrollability index for the products of the course's runs, and of
+    the program runs whose programs require the course, once the transaction commits
+    """
+    course_id = instance.course_id
+    on_commit(lambda: update_course_product_enrollability([course_id]))
+
+
+@receiver(
+    post_save, sender=ProgramRun, dispatch_uid="programrun_enrollability_post_save"
+)
+@receiver(
+    post_delete,
+    sender=ProgramRun,
+    dispatch_uid="programrun_enrollability_post_delete",
+)
+def index_program_run_enrollability(sender, instance, **kwargs):  # pylint:disable=unused-argument  # noqa: ARG001
+    """
+    Update the enrollability index for the products of a program run
+    """
+    update_product_enrollability(
+        Product.all_objects.filter(
+            content_type=ContentType.objects.get_for_model(ProgramRun),
+            object_id=instance.id,
+        )
+    )
+
+
+@receiver(
+    post_save,
+    sender=ProgramRequirement,
+    dispatch_uid="programrequirement_enrollability_post_save",
+)
+@receiver(
+    post_delete,
+    sender=ProgramRequirement,
+    dispatch_uid="programrequirement_enrollability_post_delete",
+)
+def index_program_requirement_enrollability(sender, instance, **kwargs):  # pylint:disable=unused-argument  # noqa: ARG001
+    """
+    Update the enrollability index for the products of a program whose
+    requirements changed
+    """
+    update_program_product_enrollability([instance.program_id])
@@ -47,15 +47,55 @@ def send_order_refund_email(order_id):
     send_ecommerce_refund_message(order)
 
 
-@app.task(acks_late=True)
-def process_pending_order_resolutions():
+@app.task(bind=True, acks_late=True)
+def process_pending_order_resolutions(self):
+    """
+    Task to check pending orders for resolution. Fulfillments are queued as
+    separate tasks, and the counts are reported as the task's progress.
+    """
     from ecommerce.api import check_and_process_pending_orders_for_resolution
 
-    check_and_process_pending_orders_for_resolution()
+    def report_progress(**counts):
+        if not self.request.called_directly:
+            self.update_state(state="PROGRESS", meta=counts)
+
+    fulfilled, canceled, errored, queued = (
+        check_and_process_pending_orders_for_resolution(
+            fulfill_in_background=True, progress=report_progress
+        )
+    )
+
+    return {
+        "fulfilled": fulfilled,
+        "canceled": canceled,
+        "errored": errored,
+        "queued": queued,
+    }
+
+
+@app.task(acks_late=True)
+def perform_pending_order_resolution(order_id, payload):
+    """
+    Task to fulfill or cancel a single pending order
+
+    Args:
+       order_id (int): Id of the order
+       payload (dict): The transaction from the payment gateway
+    """
+    from ecommerce.api import resolve_pending_order
+
+    resolve_pending_order(order_id, payload)
 
 
 @app.task(acks_late=True)
 def perform_check_for_duplicate_discount_redemptions():
     from ecommerce.api import check_for_duplicate_discount_redemptions
 
-    check_for_duplicate_discount_redemptions()
+    return len(check_for_duplicate_discount_redemptions())
+
+
+@app.task(acks_late=True)
+def generate_discount_code_batch(batch_id):
+    from ecommerce.api import process_discount_code_batch
+
+    process_discount_code_batch(batch_id)
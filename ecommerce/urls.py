@@ -14,6 +14,7 @@ from ecommerce.views.v0 import (  # noqa: E402
     CheckoutCallbackView,
     CheckoutInterstitialView,
     CheckoutProductView,
+    DiscountCodeBatchViewSet,
     DiscountViewSet,
     NestedDiscountProductViewSet,
     NestedDiscountRedemptionViewSet,
@@ -36,6 +37,9 @@ router.register(r"products", ProductViewSet, basename="products_api")
 router.register(r"checkout", CheckoutApiViewSet, basename="checkout_api")
 router.register(r"orders/history", OrderHistoryViewSet, basename="orderhistory_api")
 router.register(r"discounts/user", UserDiscountViewSet, basename="userdiscounts_api")
+router.register(
+    r"discounts/batches", DiscountCodeBatchViewSet, basename="discount_batches_api"
+)
 
 discountsRouter = router.register(  # noqa: N816
     r"discounts", DiscountViewSet, basename="discounts_api"
@@ -8,6 +8,7 @@ from distutils.util import strtobool  # noqa: F401
 import django_filters
 from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.cache import caches
 from django.core.exceptions import ObjectDoesNotExist
 from django.db import transaction
 from django.db.models import Count, Q
@@ -36,7 +37,7 @@ from rest_framework.viewsets import (
 )
 from rest_framework_extensions.mixins import NestedViewSetMixin
 
-from courses.models import Course, CourseRun, Program, ProgramRun
+from courses.models import CourseRun, Program, ProgramRun
 from ecommerce import api
 from ecommerce.constants import PAYMENT_TYPE_FINANCIAL_ASSISTANCE
 from ecommerce.discounts import DiscountType
@@ -45,6 +46,8 @@ from ecommerce.models import (
     BasketDiscount,
     BasketItem,
     Discount,
+    DiscountCodeBatch,
+    DiscountCodeBatchStatus,
     DiscountProduct,
     DiscountRedemption,
     Order,
@@ -58,6 +61,7 @@ from ecommerce.serializers import (
     BasketSerializer,
     BasketWithProductSerializer,
     BulkDiscountSerializer,
+    DiscountCodeBatchSerializer,
     DiscountProductSerializer,
     DiscountRedemptionSerializer,
     DiscountSerializer,
@@ -137,56 +141,30 @@ class ProductViewSet(ReadOnlyModelViewSet):
     def get_queryset(self):
         now = now_in_utc()
 
-        unenrollable_courserun_ids = CourseRun.objects.filter(
-            enrollment_end__lt=now
-        ).values_list("id", flat=True)
-
-        unenrollable_course_ids = (
-            Course.objects.annotate(
-                num_runs=Count(
-                    "courseruns", filter=~Q(courseruns__in=unenrollable_courserun_ids)
-                )
-            )
-            .filter(num_runs=0)
-            .values_list("id", flat=True)
-        )
-
-        unenrollable_program_ids = (
-            Program.objects.annotate(
-                valid_runs=Count(
-                    "programruns",
-                    filter=Q(programruns__end_date__gt=now)
-                    | Q(programruns__end_date=None),
-                )
-            )
-            .filter(
-                Q(programruns__isnull=True)
-                | Q(valid_runs=0)
-                | Q(all_requirements__course__in=unenrollable_course_ids)
-            )
-            .values_list("id", flat=True)
-            .distinct()
-        )
-
-        unenrollable_programrun_ids = ProgramRun.objects.filter(
-            Q(program__in=unenrollable_program_ids) | Q(end_date__lt=now)
-        )
-
         return (
-            Product.objects.exclude(
-                (
-                    Q(object_id__in=unenrollable_courserun_ids)
-                    & Q(content_type__model="courserun")
-                )
-                | (
-                    Q(object_id__in=unenrollable_programrun_ids)
-                    & Q(content_type__model="programrun")
-                )
+            Product.objects.filter(enrollability__is_enrollable=True)
+            .filter(
+                Q(enrollability__enrollable_until__isnull=True)
+                | Q(enrollability__enrollable_until__gte=now)
             )
             .select_related("content_type")
             .prefetch_related("purchasable_object")
         )
 
+    def list(self, request, *args, **kwargs):
+        """
+        List the enrollable products. The list doesn't depend on the user, so
+        each page is cached for everyone until a product or run changes.
+        """
+        cache_key = api.get_product_list_cache_key(request)
+        data = caches["redis"].get(cache_key)
+
+        if data is None:
+            data = super().list(request, *args, **kwargs).data
+            caches["redis"].set(cache_key, data, settings.PRODUCT_LIST_CACHE_TIMEOUT)
+
+        return Response(data)
+
 
 class BasketViewSet(
     NestedViewSetMixin, mixins.ListModelMixin, mixins.RetrieveModelMixin, GenericViewSet
@@ -289,6 +267,19 @@ class DiscountViewSet(ModelViewSet):
         otherSerializer = BulkDiscountSerializer(data=request.data)
 
         if otherSerializer.is_valid():
+            if (
+                otherSerializer.validated_data.get("count", 1)
+                > settings.DISCOUNT_CODE_BATCH_ASYNC_THRESHOLD
+            ):
+                # large batches are generated in the background - the batch can
+                # be polled for progress and the codes downloaded when it's done
+                batch = api.create_discount_code_batch(request.user, {**request.data})
+
+                return Response(
+                    DiscountCodeBatchSerializer(batch).data,
+                    status=status.HTTP_202_ACCEPTED,
+                )
+
             generated_codes = api.generate_discount_code(**request.data)
 
             discounts = DiscountSerializer(generated_codes, many=True)
@@ -298,6 +289,38 @@ class DiscountViewSet(ModelViewSet):
         raise ParseError(f"Batch creation failed: {otherSerializer.errors}")  # noqa: EM102
 
 
+class DiscountCodeBatchViewSet(ReadOnlyModelViewSet):
+    """API view set for batches of discount codes generated in the background"""
+
+    queryset = DiscountCodeBatch.objects.order_by("-created_on").all()
+    serializer_class = DiscountCodeBatchSerializer
+    authentication_classes = (SessionAuthentication, TokenAuthentication)
+    permission_classes = (IsAuthenticated, IsAdminUser)
+    pagination_class = RefinePagination
+
+    @action(url_name="codes", detail=True, methods=["get"])
+    def codes(self, request, pk=None):  # noqa: ARG002
+        """
+        Download the codes in a completed batch as a CSV file.
+        """
+        batch = self.get_object()
+
+        if batch.status != DiscountCodeBatchStatus.COMPLETED:
+            return Response(
+                {"detail": f"The batch is {batch.status}."},
+                status=status.HTTP_409_CONFLICT,
+            )
+
+        response = HttpResponse(content_type="text/csv")
+        response["Content-Disposition"] = (
+            f'attachment; filename="discount-codes-{batch.id}.csv"'
+        )
+        api.write_discount_codes_csv(
+            batch.discounts.order_by("id").iterator(chunk_size=2000), response
+        )
+        return response
+
+
 class NestedDiscountProductViewSet(NestedViewSetMixin, ModelViewSet):
     """API view set for Discounts"""
 
@@ -821,17 +844,38 @@ class OrderHistoryViewSet(ReadOnlyModelViewSet):
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        return (
+        return api.with_order_details(
             Order.objects.filter(purchaser=self.request.user)
             .filter(state__in=[OrderStatus.FULFILLED, OrderStatus.REFUNDED])
             .order_by("-created_on")
-            .all()
+            # The serializer includes the purchaser's groups and permissions (depth=1)
+            .prefetch_related("purchaser__groups", "purchaser__user_permissions")
         )
 
+    def get_serializer_context(self):
+        """Share serialized course pages between the orders in a response"""
+        return {**super().get_serializer_context(), "course_pages": {}}
+
+    def paginate_queryset(self, queryset):
+        """Load the line products for the orders on the page in bulk"""
+        page = super().paginate_queryset(queryset)
+        api.prefetch_order_products(page if page is not None else queryset)
+        return page
+
+    def get_object(self):
+        order = super().get_object()
+        api.prefetch_order_products([order])
+        return order
+
 
 class OrderReceiptView(RetrieveAPIView):
     serializer_class = OrderSerializer
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        return Order.objects.filter(purchaser=self.request.user).all()
+        return api.with_order_details(Order.objects.filter(purchaser=self.request.user))
+
+    def get_object(self):
+        order = super().get_object()
+        api.prefetch_order_products([order])
+        return order
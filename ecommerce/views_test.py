@@ -8,13 +8,17 @@ import pytest
 import pytz
 import reversion
 from django.conf import settings
+from django.db import connection
 from django.forms.models import model_to_dict
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from mitol.common.utils.datetime import now_in_utc
 from rest_framework import status
+from reversion.models import Version
 
 from courses.factories import CourseRunFactory, ProgramRunFactory
 from courses.models import PaidCourseRun
+from ecommerce.api import process_discount_code_batch
 from ecommerce.constants import (
     DISCOUNT_TYPE_PERCENT_OFF,
     PAYMENT_TYPE_CUSTOMER_SUPPORT,
@@ -22,17 +26,25 @@ from ecommerce.constants import (
     REDEMPTION_TYPE_ONE_TIME,
 )
 from ecommerce.discounts import DiscountType
+from ecommerce.exceptions import DiscountRedemptionLimitError
 from ecommerce.factories import (
     BasketFactory,
     BasketItemFactory,
     DiscountFactory,
+    LineFactory,
+    OrderFactory,
     ProductFactory,
+    TransactionFactory,
+    UnlimitedUseDiscountFactory,
 )
 from ecommerce.models import (
     Basket,
     BasketItem,
     Discount,
+    DiscountCodeBatch,
+    DiscountCodeBatchStatus,
     DiscountProduct,
+    DiscountRedemption,
     Order,
     OrderStatus,
     PendingOrder,
@@ -51,6 +63,7 @@ from main import features
 from main.constants import (
     USER_MSG_COOKIE_NAME,
     USER_MSG_TYPE_COURSE_NON_UPGRADABLE,
+    USER_MSG_TYPE_DISCOUNT_INVALID,
     USER_MSG_TYPE_ENROLL_DUPLICATED,
     USER_MSG_TYPE_PAYMENT_ACCEPTED_NOVALUE,
 )
@@ -101,6 +114,52 @@ def test_list_products(user_drf_client, products):
         assert_drf_json_equal(resp_product, ProductSerializer(product).data)
 
 
+def test_list_products_enrollable(user_drf_client, django_capture_on_commit_callbacks):
+    """Products for runs that can't be enrolled in anymore shouldn't be listed"""
+    now = now_in_utc()
+    open_product = ProductFactory.create(
+        purchasable_object=CourseRunFactory.create(
+            enrollment_end=now + timedelta(days=1)
+        )
+    )
+    ProductFactory.create(
+        purchasable_object=CourseRunFactory.create(
+            enrollment_end=now - timedelta(days=1)
+        )
+    )
+    closing_run = CourseRunFactory.create(enrollment_end=now + timedelta(days=1))
+    ProductFactory.create(purchasable_object=closing_run)
+    program_run = ProgramRunFactory.create(end_date=now + timedelta(days=10))
+    program_run.program.add_requirement(
+        CourseRunFactory.create(enrollment_end=now - timedelta(days=1)).course
+    )
+    ProductFactory.create(purchasable_object=program_run)
+
+    closing_run.enrollment_end = now - timedelta(hours=1)
+    with django_capture_on_commit_callbacks(execute=True):
+        closing_run.save()
+
+    resp = user_drf_client.get(reverse("products_api-list"), {"l": 10, "o": 0})
+
+    assert [product["id"] for product in resp.json()["results"]] == [open_product.id]
+
+
+def test_list_products_cached(user_drf_client, products):
+    """The product list should be served from the cache until a product changes"""
+    url = reverse("products_api-list")
+    first_resp = user_drf_client.get(url, {"l": 10, "o": 0})
+
+    with CaptureQueriesContext(connection) as queries:
+        assert user_drf_client.get(url, {"l": 10, "o": 0}).json() == first_resp.json()
+    assert len(queries) == 0
+
+    products[0].delete()
+
+    assert len(user_drf_client.get(url, {"l": 10, "o": 0}).json()["results"]) == (
+        len(products) - 1
+    )
+
+
 def test_get_products(user_drf_client, products):
     product = products[random.randrange(0, len(products))]  # noqa: S311
 
@@ -1044,6 +1103,57 @@ def test_start_checkout_with_zero_value(settings, user, user_client, products):
     )
 
 
+def test_start_checkout_with_zero_value_used_up_discount(
+    settings, mocker, user, user_client, products
+):
+    """
+    Check that the checkout sends the user back to the cart if the discount of a zero
+    value basket is used up by another order while this one is being fulfilled
+    """
+    settings.OPENEDX_SERVICE_WORKER_API_TOKEN = "mock_api_token"  # noqa: S105
+    discount = DiscountFactory.create(
+        discount_type=DISCOUNT_TYPE_PERCENT_OFF, amount=100
+    )
+    test_redeem_discount(user, user_client, products, [discount], False, False)  # noqa: FBT003
+    mocker.patch(
+        "ecommerce.api.fulfill_completed_order",
+        side_effect=DiscountRedemptionLimitError(discount.id),
+    )
+
+    resp = user_client.get(reverse("checkout_interstitial_page"))
+
+    assert resp.status_code == 302
+    assert resp.url == reverse("cart")
+    assert resp.cookies[USER_MSG_COOKIE_NAME].value == encode_json_cookie_value(
+        {"type": USER_MSG_TYPE_DISCOUNT_INVALID}
+    )
+    assert Order.objects.filter(purchaser=user).get().state == OrderStatus.PENDING
+
+
+def test_start_checkout_with_reserved_discount(user, user_client, products):
+    """
+    Check that the checkout sends the user back to the cart, before sending them to
+    pay, if another learner is paying for an order with the same one-time discount
+    """
+    discount = DiscountFactory.create(redemption_type=REDEMPTION_TYPE_ONE_TIME)
+    test_redeem_discount(user, user_client, products, [discount], False, False)  # noqa: FBT003
+    DiscountRedemption.objects.create(
+        redeemed_discount=discount,
+        redemption_date=now_in_utc(),
+        redeemed_order=OrderFactory.create(state=OrderStatus.PENDING),
+        redeemed_by=UserFactory.create(),
+    )
+
+    resp = user_client.get(reverse("checkout_interstitial_page"))
+
+    assert resp.status_code == 302
+    assert resp.url == reverse("cart")
+    assert resp.cookies[USER_MSG_COOKIE_NAME].value == encode_json_cookie_value(
+        {"type": USER_MSG_TYPE_DISCOUNT_INVALID}
+    )
+    assert not Order.objects.filter(purchaser=user).exists()
+
+
 @pytest.mark.parametrize("use_redemption_type_flags", [True, False])
 def test_bulk_discount_create(admin_drf_client, use_redemption_type_flags):
     """
@@ -1083,6 +1193,57 @@ def test_bulk_discount_create(admin_drf_client, use_redemption_type_flags):
     assert discounts[0].is_bulk
 
 
+def test_bulk_discount_create_in_background(
+    mocker, settings, admin_drf_client, django_capture_on_commit_callbacks
+):
+    """
+    Batches over the threshold should be generated in the background, and their
+    codes downloaded as a CSV file once they're done.
+    """
+    settings.DISCOUNT_CODE_BATCH_ASYNC_THRESHOLD = 2
+    mock_task = mocker.patch("ecommerce.api.generate_discount_code_batch")
+
+    with django_capture_on_commit_callbacks(execute=True):
+        resp = admin_drf_client.post(
+            reverse("discounts_api-create_batch"),
+            {
+                "discount_type": DISCOUNT_TYPE_PERCENT_OFF,
+                "payment_type": PAYMENT_TYPE_CUSTOMER_SUPPORT,
+                "count": 3,
+                "amount": 50,
+                "prefix": "Background-Code-",
+            },
+        )
+
+    assert resp.status_code == status.HTTP_202_ACCEPTED
+    batch = DiscountCodeBatch.objects.get(pk=resp.json()["id"])
+    assert resp.json()["status"] == DiscountCodeBatchStatus.PENDING
+    assert not Discount.objects.filter(
+        discount_code__startswith="Background-Code-"
+    ).exists()
+    mock_task.delay.assert_called_once_with(batch.id)
+
+    codes_url = reverse("discount_batches_api-codes", kwargs={"pk": batch.id})
+    assert admin_drf_client.get(codes_url).status_code == status.HTTP_409_CONFLICT
+
+    process_discount_code_batch(batch.id)
+
+    resp = admin_drf_client.get(
+        reverse("discount_batches_api-detail", kwargs={"pk": batch.id})
+    )
+    assert resp.json()["status"] == DiscountCodeBatchStatus.COMPLETED
+    assert resp.json()["generated_count"] == 3
+
+    resp = admin_drf_client.get(codes_url)
+    assert resp.status_code == status.HTTP_200_OK
+    assert resp["Content-Type"] == "text/csv"
+    rows = resp.content.decode().splitlines()
+    assert rows[0] == "code,type,amount,expiration_date"
+    assert sorted(row.split(",")[0] for row in rows[1:]) == sorted(
+        batch.discounts.values_list("discount_code", flat=True)
+    )
+
+
 def test_checkout_interstitial_google_analytics_object(
     settings, user, user_client, products
 ):
@@ -1107,3 +1268,74 @@ def test_checkout_interstitial_google_analytics_object(
         assert isinstance(item["discount"], float)
         assert isinstance(item["price"], float)
         assert isinstance(item["quantity"], int)
+
+
+def create_fulfilled_order(user, runs):
+    """Create a fulfilled order with a discount, a payment, and a line for each run"""
+    order = OrderFactory.create(purchaser=user, state=OrderStatus.FULFILLED)
+    for run in runs:
+        with reversion.create_revision():
+            product = ProductFactory.create(purchasable_object=run)
+        LineFactory.create(
+            order=order,
+            purchased_object=run,
+            product_version=Version.objects.get_for_object(product).first(),
+        )
+    DiscountRedemption.objects.create(
+        redeemed_discount=UnlimitedUseDiscountFactory.create(),
+        redemption_date=now_in_utc(),
+        redeemed_order=order,
+        redeemed_by=user,
+    )
+    TransactionFactory.create(
+        order=order,
+        transaction_id=uuid.uuid4().hex,
+        data={"req_card_number": "xxxx1111"},
+    )
+    return order
+
+
+def test_order_history_query_count(user, user_drf_client):
+    """The number of queries for the order history should not depend on the number of orders"""
+    run = CourseRunFactory.create()
+    create_fulfilled_order(user, [run])
+    # Make a request first so that per-process caches (e.g. the Site) are populated
+    user_drf_client.get(reverse("orderhistory_api-list"))
+    with CaptureQueriesContext(connection) as single_order_queries:
+        resp = user_drf_client.get(reverse("orderhistory_api-list"))
+    assert resp.status_code == status.HTTP_200_OK
+    assert resp.json()["count"] == 1
+
+    for _ in range(3):
+        create_fulfilled_order(user, [CourseRunFactory.create()])
+    # Creating course pages expires the cached financial assistance form URLs
+    user_drf_client.get(reverse("orderhistory_api-list"))
+    with CaptureQueriesContext(connection) as multiple_order_queries:
+        resp = user_drf_client.get(reverse("orderhistory_api-list"))
+    assert resp.status_code == status.HTTP_200_OK
+    assert resp.json()["count"] == 4
+    assert resp.json()["results"][-1]["titles"] == [run.course.title]
+    assert len(multiple_order_queries) == len(single_order_queries)
+
+
+def test_order_receipt_query_count(user, user_drf_client):
+    """The number of queries for a receipt should not depend on the number of lines"""
+    run = CourseRunFactory.create()
+    single_line_order = create_fulfilled_order(user, [run])
+    multiple_line_order = create_fulfilled_order(user, CourseRunFactory.create_batch(3))
+
+    query_counts = []
+    # Make a request first so that per-process caches (e.g. the Site) are populated
+    user_drf_client.get(
+        reverse("order_receipt_api", kwargs={"pk": single_line_order.id})
+    )
+    for order in [single_line_order, multiple_line_order]:
+        with CaptureQueriesContext(connection) as queries:
+            resp = user_drf_client.get(
+                reverse("order_receipt_api", kwargs={"pk": order.id})
+            )
+        assert resp.status_code == status.HTTP_200_OK
+        assert len(resp.json()["lines"]) == order.lines.count()
+        assert resp.json()["transactions"]["card_number"] == "xxxx1111"
+        query_counts.append(len(queries))
+    assert query_counts[0] == query_counts[1]
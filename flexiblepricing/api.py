@@ -7,14 +7,23 @@ from datetime import datetime
 from typing import Union
 
 import pytz
+from django.conf import settings
 from django.contrib.auth.models import AnonymousUser
 from django.contrib.contenttypes.models import ContentType
+from django.core.cache import caches
 from django.core.exceptions import ImproperlyConfigured
 from django.db import transaction
-from django.db.models import Q
 from django.utils.text import slugify
 
-from courses.models import Course, CourseRun, Program, ProgramRun
+from courses.models import (
+    Course,
+    CourseRun,
+    Program,
+    ProgramRequirement,
+    ProgramRequirementNodeType,
+    ProgramRun,
+    RelatedProgram,
+)
 from flexiblepricing.constants import (
     COUNTRY,
     DEFAULT_INCOME_THRESHOLD,
@@ -39,6 +48,9 @@ from main.settings import TIME_ZONE
 IncomeThreshold = namedtuple("IncomeThreshold", ["country", "income"])  # noqa: PYI024
 log = logging.getLogger(__name__)
 
+FLEXIBLE_PRICE_CACHE_KEY = "flexible_prices_{user_id}"
+FLEXIBLE_PRICE_PROGRAMS_CACHE_KEY = "flexible_price_programs"
+
 
 def parse_country_income_thresholds(csv_path):
     """
@@ -225,6 +237,171 @@ def determine_income_usd(original_income, original_currency):
     return income_usd  # noqa: RET504
 
 
+def get_eligible_courseware_keys(courseware):
+    """
+    Returns the content type and id of the courseware(s) eligible for a flexible
+    pricing tier, in the same order as get_ordered_eligible_coursewares, without
+    loading the programs themselves.
+
+    Args:
+        courseware (CourseRun / Course / ProgramRun / Program): the courseware to check
+    Returns:
+        list of (int, int): content type ids and object ids of the eligible coursewares
+    """
+    if isinstance(courseware, CourseRun):
+        return get_eligible_courseware_keys(courseware.course)
+    if isinstance(courseware, Course):
+        return get_bulk_eligible_courseware_keys([courseware])[courseware.id]
+    if isinstance(courseware, ProgramRun) and courseware.program_id is not None:
+        program_content_type_id = ContentType.objects.get_for_model(Program).id
+        _, related_program_pairs = get_flexible_price_programs()
+        return [
+            (program_content_type_id, courseware.program_id),
+            *_get_related_program_keys(
+                [courseware.program_id],
+                related_program_pairs,
+                program_content_type_id,
+            ),
+        ]
+    return [(ContentType.objects.get_for_model(courseware).id, courseware.id)]
+
+
+def get_bulk_eligible_courseware_keys(courses):
+    """
+    Returns the keys of the coursewares eligible for a flexible pricing tier (as
+    returned by get_eligible_courseware_keys) for several courses at once, using the
+    cached programs from get_flexible_price_programs.
+
+    Args:
+        courses (iterable of Course): the courses to check
+    Returns:
+        dict: lists of (content type id, object id) keyed by course id
+    """
+    program_content_type_id = ContentType.objects.get_for_model(Program).id
+    course_content_type_id = ContentType.objects.get_for_model(Course).id
+    programs_by_course_id, related_program_pairs = get_flexible_price_programs()
+    return {
+        course.id: [
+            *[
+                (program_content_type_id, program_id)
+                for program_id in programs_by_course_id.get(course.id, [])
+            ],
+            (course_content_type_id, course.id),
+            *_get_related_program_keys(
+                programs_by_course_id.get(course.id, []),
+                related_program_pairs,
+                program_content_type_id,
+            ),
+        ]
+        for course in courses
+    }
+
+
+def get_flexible_price_programs():
+    """
+    Returns the programs that decide which coursewares are eligible for a flexible
+    pricing tier: the ids of the programs that require each course, and the pairs of
+    related programs. These are loaded with two queries and cached until a program
+    requirement or related program changes.
+
+    Returns:
+        tuple of (dict, list): lists of program ids keyed by course id, and
+            (first program id, second program id) pairs of related programs
+    """
+    programs = caches["redis"].get(FLEXIBLE_PRICE_PROGRAMS_CACHE_KEY)
+    if programs is None:
+        programs_by_course_id = {}
+        for course_id, program_id in (
+            ProgramRequirement.objects.filter(
+                node_type=ProgramRequirementNodeType.COURSE,
+            )
+            .distinct("course_id", "program_id")
+            .order_by("course_id", "program_id")
+            .values_list("course_id", "program_id")
+        ):
+            programs_by_course_id.setdefault(course_id, []).append(program_id)
+        programs = (
+            programs_by_course_id,
+            list(
+                RelatedProgram.objects.order_by("id").values_list(
+                    "first_program_id", "second_program_id"
+                )
+            ),
+        )
+        caches["redis"].set(
+            FLEXIBLE_PRICE_PROGRAMS_CACHE_KEY,
+            programs,
+            settings.FLEXIBLE_PRICE_CACHE_TIMEOUT,
+        )
+    return programs
+
+
+def clear_flexible_price_programs_cache():
+    """
+    Removes the cached programs that decide the coursewares eligible for a flexible
+    pricing tier
+    """
+    caches["redis"].delete(FLEXIBLE_PRICE_PROGRAMS_CACHE_KEY)
+
+
+def _get_related_program_keys(program_ids, related_program_pairs, content_type_id):
+    """Returns the keys of the programs related to the programs, in order"""
+    keys = []
+    for program_id in program_ids:
+        for first_program_id, second_program_id in related_program_pairs:
+            if first_program_id == program_id:
+                keys.append((content_type_id, second_program_id))
+            elif second_program_id == program_id:
+                keys.append((content_type_id, first_program_id))
+    return keys
+
+
+def get_approved_flexible_prices(user):
+    """
+    Returns the user's approved flexible prices for current tiers, with their
+    tiers and discounts, keyed by the content type and id of their courseware.
+    These are loaded with one query and cached until one of them changes.
+
+    Args:
+        user (User): the user to get flexible prices for
+    Returns:
+        dict: FlexiblePrice objects keyed by (content type id, object id)
+    """
+    cache_key = FLEXIBLE_PRICE_CACHE_KEY.format(user_id=user.id)
+    flexible_prices = caches["redis"].get(cache_key)
+    if flexible_prices is None:
+        flexible_prices = {
+            (
+                flexible_price.courseware_content_type_id,
+                flexible_price.courseware_object_id,
+            ): flexible_price
+            for flexible_price in FlexiblePrice.objects.filter(
+                user=user,
+                status__in=[
+                    FlexiblePriceStatus.APPROVED,
+                    FlexiblePriceStatus.AUTO_APPROVED,
+                ],
+                tier__current=True,
+            ).select_related("tier__discount")
+        }
+        caches["redis"].set(
+            cache_key, flexible_prices, settings.FLEXIBLE_PRICE_CACHE_TIMEOUT
+        )
+    return flexible_prices
+
+
+def clear_flexible_price_cache(user_ids):
+    """
+    Removes the cached flexible prices of users
+
+    Args:
+        user_ids (iterable of int): the ids of the users to clear
+    """
+    caches["redis"].delete_many(
+        [FLEXIBLE_PRICE_CACHE_KEY.format(user_id=user_id) for user_id in user_ids]
+    )
+
+
 def determine_courseware_flexible_price_discount(product, user):
     """
     Determine discount of a product
@@ -246,44 +423,21 @@ def determine_courseware_flexible_price_discount(product, user):
     if not user.is_authenticated or not product:
         return None
 
-    for eligible_courseware in get_ordered_eligible_coursewares(
-        product.purchasable_object
-    ):
-        content_type = ContentType.objects.get_for_model(eligible_courseware)
-        flexible_price = (
-            FlexiblePrice.objects.filter(
-                courseware_content_type=content_type,
-                courseware_object_id=eligible_courseware.id,
-                user=user,
-            )
-            .filter(
-                (
-                    Q(tier__discount__activation_date=None)
-                    | Q(
-                        tier__discount__activation_date__lte=datetime.now(
-                            pytz.timezone(TIME_ZONE)
-                        )
-                    )
-                )
-                & (
-                    Q(tier__discount__expiration_date=None)
-                    | Q(
-                        tier__discount__expiration_date__gte=datetime.now(
-                            pytz.timezone(TIME_ZONE)
-                        )
-                    )
-                )
-            )
-            .first()
-        )
+    flexible_prices = get_approved_flexible_prices(user)
+    if not flexible_prices:
+        return None
+
+    now = datetime.now(pytz.timezone(TIME_ZONE))
+    for key in get_eligible_courseware_keys(product.purchasable_object):
+        flexible_price = flexible_prices.get(key)
+        if flexible_price is None:
+            continue
 
-        if (
-            flexible_price
-            and flexible_price.tier.current
-            and flexible_price.status
-            in (FlexiblePriceStatus.APPROVED, FlexiblePriceStatus.AUTO_APPROVED)
+        discount = flexible_price.tier.discount
+        if (discount.activation_date is None or discount.activation_date <= now) and (
+            discount.expiration_date is None or discount.expiration_date >= now
         ):
-            return flexible_price.tier.discount
+            return discount
 
     return None
 
@@ -305,23 +459,13 @@ def is_courseware_flexible_price_approved(course_run, user):
     if isinstance(user, AnonymousUser):
         return False
 
-    for eligible_courseware in get_ordered_eligible_coursewares(course_run):
-        content_type = ContentType.objects.get_for_model(eligible_courseware)
-        flexible_price = FlexiblePrice.objects.filter(
-            courseware_content_type=content_type,
-            courseware_object_id=eligible_courseware.id,
-            user=user,
-        ).first()
-
-        if (
-            flexible_price
-            and flexible_price.tier.current
-            and flexible_price.status
-            in (FlexiblePriceStatus.APPROVED, FlexiblePriceStatus.AUTO_APPROVED)
-        ):
-            return True
+    flexible_prices = get_approved_flexible_prices(user)
+    if not flexible_prices:
+        return False
 
-    return False
+    return any(
+        key in flexible_prices for key in get_eligible_courseware_keys(course_run)
+    )
 
 
 @transaction.atomic()
@@ -11,7 +11,9 @@ import pytz
 from django.contrib.auth.models import AnonymousUser
 from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.utils.text import slugify
 from factory import fuzzy
 from mitol.common.utils.datetime import now_in_utc
@@ -39,6 +41,8 @@ from flexiblepricing.api import (
     determine_courseware_flexible_price_discount,
     determine_income_usd,
     determine_tier_courseware,
+    get_bulk_eligible_courseware_keys,
+    get_eligible_courseware_keys,
     import_country_income_thresholds,
     is_courseware_flexible_price_approved,
     parse_country_income_thresholds,
@@ -733,3 +737,109 @@ def test_create_finaid_form(courseware_type, force_course, gen_slug, gen_title):
         assert generated_page.selected_program == courseware.programs[0]
     else:
         assert generated_page.selected_program == courseware
+
+
+def test_flexible_price_discount_cache():
+    """
+    determine_courseware_flexible_price_discount should load the user's flexible
+    prices once, and load them again when one of them changes
+    """
+    program = ProgramFactory.create()
+    related_program = ProgramFactory.create()
+    program.add_related_program(related_program)
+    course = CourseFactory.create()
+    program.add_requirement(course)
+    product = ProductFactory.create(
+        purchasable_object=CourseRunFactory.create(course=course)
+    )
+    program_run_product = ProductFactory.create(
+        purchasable_object=ProgramRunFactory.create(program=program)
+    )
+    flexible_price = FlexiblePriceFactory.create(
+        courseware_object=related_program,
+        status=FlexiblePriceStatus.PENDING_MANUAL_APPROVAL,
+    )
+    user = flexible_price.user
+
+    assert determine_courseware_flexible_price_discount(product, user) is None
+    with CaptureQueriesContext(connection) as queries:
+        assert determine_courseware_flexible_price_discount(product, user) is None
+        assert is_courseware_flexible_price_approved(course, user) is False
+    assert len(queries) == 0
+
+    flexible_price.status = FlexiblePriceStatus.APPROVED
+    flexible_price.save()
+
+    assert (
+        determine_courseware_flexible_price_discount(product, user)
+        == flexible_price.tier.discount
+    )
+    assert (
+        determine_courseware_flexible_price_discount(program_run_product, user)
+        == flexible_price.tier.discount
+    )
+    assert is_courseware_flexible_price_approved(course, user) is True
+
+    flexible_price.tier.current = False
+    flexible_price.tier.save()
+
+    assert determine_courseware_flexible_price_discount(product, user) is None
+
+
+@pytest.mark.django_db
+def test_get_bulk_eligible_courseware_keys():
+    """
+    get_bulk_eligible_courseware_keys should return the same keys as
+    get_eligible_courseware_keys for each course, from programs that are loaded
+    in two queries and then cached
+    """
+    program = ProgramFactory.create()
+    related_program = ProgramFactory.create()
+    program.add_related_program(related_program)
+    courses = CourseFactory.create_batch(3)
+    for course in courses[:2]:
+        program.add_requirement(course)
+    related_program.add_requirement(courses[1])
+
+    with CaptureQueriesContext(connection) as queries:
+        keys = get_bulk_eligible_courseware_keys(courses)
+    assert len(queries) == 2
+    with CaptureQueriesContext(connection) as queries:
+        assert keys == {
+            course.id: get_eligible_courseware_keys(course) for course in courses
+        }
+    assert len(queries) == 0
+    assert keys[courses[2].id] == [
+        (ContentType.objects.get_for_model(Course).id, courses[2].id)
+    ]
+
+
+@pytest.mark.django_db
+def test_eligible_courseware_keys_program_changes():
+    """
+    The cached programs of get_eligible_courseware_keys should be cleared when
+    program requirements or related programs change
+    """
+    program_content_type_id = ContentType.objects.get_for_model(Program).id
+    course = CourseFactory.create()
+    program = ProgramFactory.create()
+    related_program = ProgramFactory.create()
+    assert get_eligible_courseware_keys(course) == [
+        (ContentType.objects.get_for_model(Course).id, course.id)
+    ]
+
+    program.add_requirement(course)
+    program.add_related_program(related_program)
+
+    assert get_eligible_courseware_keys(course) == [
+        (program_content_type_id, program.id),
+        (ContentType.objects.get_for_model(Course).id, course.id),
+        (program_content_type_id, related_program.id),
+    ]
+
+    program.related_programs_qs.delete()
+
+    assert get_eligible_courseware_keys(course)[-1] == (
+        ContentType.objects.get_for_model(Course).id,
+        course.id,
+    )
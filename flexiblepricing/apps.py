@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class FlexiblepricingConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "flexiblepricing"
+
+    def ready(self):
+        """Application is ready"""
+        import flexiblepricing.signals  # noqa: F401
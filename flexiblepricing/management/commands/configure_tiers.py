@@ -32,7 +32,8 @@ from ecommerce.constants import (
     REDEMPTION_TYPE_UNLIMITED,
 )
 from ecommerce.models import Discount
-from flexiblepricing.models import FlexiblePriceTier
+from flexiblepricing.api import clear_flexible_price_cache
+from flexiblepricing.models import FlexiblePrice, FlexiblePriceTier
 
 
 class Command(BaseCommand):
@@ -164,7 +165,7 @@ class Command(BaseCommand):
                         {
                             "tier": {"threshold": row["threshold"]},
                             "discount": {
-                                "discount_code": f"{discount_abbrev}-fa-tier{idx+1}-{current_year}",
+                                "discount_code": f"{discount_abbrev}-fa-tier{idx + 1}-{current_year}",
                                 "discount_type": row["type"],
                                 "amount": row["value"],
                             },
@@ -244,6 +245,11 @@ class Command(BaseCommand):
         unmatched_discounts_qset = Discount.objects.filter(
             discount_code__startswith=f"{discount_abbrev}-fa-tier"
         ).exclude(id__in=[discount.id for discount in matched_discounts])
+        affected_user_ids = list(
+            FlexiblePrice.objects.filter(
+                tier__discount__in=unmatched_discounts_qset
+            ).values_list("user_id", flat=True)
+        )
 
         unmatched_discounts = unmatched_discounts_qset.update(expiration_date=last_year)
 
@@ -254,5 +260,6 @@ class Command(BaseCommand):
             courseware_content_type=content_type,
             discount__in=unmatched_discounts_qset.all(),
         ).update(current=False)
+        clear_flexible_price_cache(affected_user_ids)
 
         self.stdout.write(f"{unmatched_tiers} tiers deactivated")
@@ -0,0 +1,91 @@
+"""Signals for flexible pricing"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from courses.models import ProgramRequirement, RelatedProgram
+from ecommerce.models import Discount
+from flexiblepricing.api import (
+    clear_flexible_price_cache,
+    clear_flexible_price_programs_cache,
+)
+from flexiblepricing.models import FlexiblePrice, FlexiblePriceTier
+
+
+@receiver(
+    post_save,
+    sender=FlexiblePrice,
+    dispatch_uid="flexible_price_post_save",
+)
+@receiver(
+    post_delete,
+    sender=FlexiblePrice,
+    dispatch_uid="flexible_price_post_delete",
+)
+def clear_user_flexible_prices(sender, instance, **kwargs):  # pylint:disable=unused-argument  # noqa: ARG001
+    """
+    Clear the cached flexible prices of the user when one of theirs changes.
+    """
+    clear_flexible_price_cache([instance.user_id])
+
+
+@receiver(
+    post_save,
+    sender=FlexiblePriceTier,
+    dispatch_uid="flexible_price_tier_post_save",
+)
+def clear_tier_flexible_prices(sender, instance, created, **kwargs):  # pylint:disable=unused-argument  # noqa: ARG001
+    """
+    Clear the cached flexible prices of the users assigned to a tier when it changes.
+    """
+    if not created:
+        clear_flexible_price_cache(
+            FlexiblePrice.objects.filter(tier=instance).values_list(
+                "user_id", flat=True
+            )
+        )
+
+
+@receiver(
+    post_save,
+    sender=Discount,
+    dispatch_uid="flexible_price_discount_post_save",
+)
+def clear_discount_flexible_prices(sender, instance, created, **kwargs):  # pylint:disable=unused-argument  # noqa: ARG001
+    """
+    Clear the cached flexible prices of the users whose tier uses a discount when it changes.
+    """
+    if not created:
+        clear_flexible_price_cache(
+            FlexiblePrice.objects.filter(tier__discount=instance).values_list(
+                "user_id", flat=True
+            )
+        )
+
+
+@receiver(
+    post_save,
+    sender=ProgramRequirement,
+    dispatch_uid="flexible_price_program_requirement_post_save",
+)
+@receiver(
+    post_delete,
+    sender=ProgramRequirement,
+    dispatch_uid="flexible_price_program_requirement_post_delete",
+)
+@receiver(
+    post_save,
+    sender=RelatedProgram,
+    dispatch_uid="flexible_price_related_program_post_save",
+)
+@receiver(
+    post_delete,
+    sender=RelatedProgram,
+    dispatch_uid="flexible_price_related_program_post_delete",
+)
+def clear_flexible_price_programs(sender, instance, **kwargs):  # pylint:disable=unused-argument  # noqa: ARG001
+    """
+    Clear the cached programs that decide the coursewares eligible for flexible
+    pricing when a program requirement or related program changes.
+    """
+    clear_flexible_price_programs_cache()
@@ -0,0 +1,73 @@
+import { useApiUrl, useDataProvider, useOne } from "@pankod/refine-core";
+import {
+  Row,
+  Col,
+  Button,
+  Card,
+  Progress,
+} from "@pankod/refine-antd";
+
+import fileDownload from 'js-file-download';
+
+import type { IDiscountCodeBatch } from "interfaces"
+
+const BATCH_POLL_INTERVAL = 5000;
+
+const isBatchRunning = (batch: IDiscountCodeBatch) => batch.status === 'pending' || batch.status === 'processing';
+
+interface IBulkDiscountBatchProps {
+  batch: IDiscountCodeBatch;
+}
+
+export const BulkDiscountBatch = (props: IBulkDiscountBatchProps) => {
+  const apiUrl = useApiUrl();
+  const dataProvider = useDataProvider();
+
+  // large batches are generated in the background, so poll until it's done
+  const { data } = useOne<IDiscountCodeBatch>({
+    resource: 'discounts/batches',
+    id: props.batch.id,
+    queryOptions: {
+      refetchInterval: (result) => isBatchRunning(result?.data ?? props.batch) ? BATCH_POLL_INTERVAL : false,
+    },
+  });
+  const batch = data?.data ?? props.batch;
+
+  const deliverData = async () => {
+    const { data } = await dataProvider().custom!({
+      url: `${apiUrl}/discounts/batches/${batch.id}/codes/`,
+      method: 'get',
+    });
+    fileDownload(data as any, "MITx Online Generated Codes.csv");
+  }
+
+  return (<>
+    <Card>
+      <h2>Discounts {batch.status === 'completed' ? 'Created' : 'Requested'}</h2>
+
+      <Row>
+        <Col span={24}>
+          {batch.status === 'failed' ?
+            (<p>The discounts couldn't be created: {batch.error}</p>) :
+            (<p>{batch.generated_count} of {batch.count} discounts were created.{isBatchRunning(batch) ? ' This page updates as the rest are created.' : null}</p>)}
+          <p><a href="#" onClick={() => { window.location.reload(); }}>Create More</a></p>
+        </Col>
+      </Row>
+
+      <Row>
+        <Col span={24}>
+          <Progress
+            percent={batch.count ? Math.floor(100 * batch.generated_count / batch.count) : 0}
+            status={batch.status === 'failed' ? 'exception' : (isBatchRunning(batch) ? 'active' : 'success')}
+          />
+        </Col>
+      </Row>
+
+      <Row justify="end">
+        <Col>
+          <Button onClick={deliverData} disabled={batch.status !== 'completed'}>Download as CSV</Button>
+        </Col>
+      </Row>
+    </Card>
+  </>);
+}
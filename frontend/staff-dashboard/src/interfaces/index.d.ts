@@ -53,6 +53,16 @@ export interface IBulkDiscount {
     expires: Date;
 }
 
+export interface IDiscountCodeBatch {
+    id: number;
+    status: string;
+    count: number;
+    generated_count: number;
+    error: string|null;
+    created_on: Date;
+    updated_on: Date;
+}
+
 export interface IDiscountRedemption {
     redemption_date: string;
     redeemed_by: Object;
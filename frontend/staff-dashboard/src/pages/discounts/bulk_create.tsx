@@ -3,6 +3,7 @@ import {
     Create,
  } from "@pankod/refine-antd";
 import { BulkDiscountForm } from "components/discounts/bulk_discounts";
+import { BulkDiscountBatch } from "components/discounts/bulk_discount_batch";
 import { BulkDiscountResults } from "components/discounts/bulk_discount_results";
 import { IBulkDiscount } from "interfaces";
 
@@ -13,9 +14,16 @@ export const BulkDiscountCreate = () => {
       action: 'create',
     });
 
-    return mutationResult && mutationResult.isSuccess ?
-      (<BulkDiscountResults data={mutationResult.data.data} />) :
-      (<Create title="Create Bulk Discounts" saveButtonProps={saveButtonProps}>
+    if (!(mutationResult && mutationResult.isSuccess)) {
+      return (<Create title="Create Bulk Discounts" saveButtonProps={saveButtonProps}>
         <BulkDiscountForm formProps={formProps} />
       </Create>);
+    }
+
+    // large batches are accepted (202) and return the batch to poll instead of the codes
+    const result: any = mutationResult.data.data;
+
+    return Array.isArray(result) ?
+      (<BulkDiscountResults data={result} />) :
+      (<BulkDiscountBatch batch={result} />);
 };
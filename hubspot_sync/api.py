@@ -1,16 +1,27 @@
 """Generate Hubspot message bodies for various model objects"""
 
+import hashlib
+import json
 import logging
 import re
+from collections import namedtuple
 from decimal import Decimal
-from typing import List  # noqa: UP035
+from typing import Dict, Iterable, List, Optional  # noqa: UP035
 
 from django.contrib.contenttypes.models import ContentType
-from django.db.models import Q
+from django.core.cache import caches
+from django.db.models import (
+    Exists,
+    OuterRef,
+    Prefetch,
+    QuerySet,
+    prefetch_related_objects,
+)
 from hubspot.crm.objects import (
     SimplePublicObject,
     SimplePublicObjectInput,
 )
+from mitol.common.utils.collections import chunks
 from mitol.common.utils.datetime import now_in_utc
 from mitol.hubspot_api.api import (
     HubspotAssociationType,
@@ -22,18 +33,31 @@ from mitol.hubspot_api.api import (
     find_product,
     format_app_id,
     get_all_objects,
-    get_line_items_for_deal,
     make_object_properties_message,
     transform_object_properties,
     upsert_object_request,
 )
 from mitol.hubspot_api.models import HubspotObject
 
+from courses.models import CourseRunCertificate, ProgramCertificate, ProgramRun
 from ecommerce.models import Line, Order, Product
+from hubspot_sync.models import HubspotObjectPayloadHash
 from users.models import User
 
 log = logging.getLogger(__name__)
 
+SYNC_CHECKPOINT_CACHE_KEY = "hubspot_sync_checkpoint_{model}_{mode}"
+DEAL_SYNC_PENDING_CACHE_KEY = "hubspot_sync_deal_pending_{order_id}"
+# Lets a new deal sync be scheduled if a pending task was lost without running
+DEAL_SYNC_PENDING_TIMEOUT = 300
+RECONCILIATION_READ_CHUNK_SIZE = 1000
+RECONCILIATION_WRITE_CHUNK_SIZE = 1000
+
+HubspotIdReconciliation = namedtuple(  # noqa: PYI024
+    "HubspotIdReconciliation",
+    ["model_name", "matched", "missing", "duplicates", "unmatched"],
+)
+
 
 def make_contact_create_message_list_from_user_ids(
     user_ids: List[int],  # noqa: UP006
@@ -48,7 +72,7 @@ def make_contact_create_message_list_from_user_ids(
         List[SimplePublicObjectInput]: List of input objects for upserting User data to Hubspot
     """
     users = list(
-        User.objects.filter(id__in=user_ids).order_by("id")
+        get_users_for_sync(user_ids).order_by("id")
     )  # Sorted to support unit test.
     message_list = []
     for user in users:
@@ -70,10 +94,12 @@ def make_contact_update_message_list_from_user_ids(
         List[dict]: List of dictionaries containing User properties.
     """
     chunk_dictionary = dict(chunk)
-    users = User.objects.filter(id__in=chunk_dictionary.keys())
+    users = get_users_for_sync(chunk_dictionary.keys()).in_bulk()
     request_input = []
     for user_id, hubspot_id in chunk_dictionary.items():
-        user = users.filter(id=user_id).first()
+        user = users.get(user_id)
+        if user is None:
+            continue
         request_input.append(
             {
                 "id": hubspot_id,
@@ -138,10 +164,13 @@ def make_deal_create_message_list_from_order_ids(
     Returns:
         List[SimplePublicObjectInput]: List of input objects for upserting Order data to Hubspot
     """
-    orders = Order.objects.filter(id__in=order_ids)
+    from hubspot_sync.serializers import HubspotBatchContext
+
+    orders = list(get_orders_for_sync(order_ids))
+    batch = HubspotBatchContext.for_orders(orders)
     message_list = []
     for order in orders:
-        message_list.append(make_deal_sync_message_from_order(order))  # noqa: PERF401
+        message_list.append(make_deal_sync_message_from_order(order, batch=batch))  # noqa: PERF401
     return message_list
 
 
@@ -157,33 +186,43 @@ def make_deal_update_message_list_from_order_ids(
     Returns:
         List[dict]: List of dictionaries containing Order properties.
     """
+    from hubspot_sync.serializers import HubspotBatchContext
+
     chunk_dictionary = dict(chunk)
-    orders = Order.objects.filter(id__in=chunk_dictionary.keys())
+    orders = get_orders_for_sync(chunk_dictionary.keys()).in_bulk()
+    batch = HubspotBatchContext.for_orders(orders.values())
     request_input = []
     for order_id, hubspot_id in chunk_dictionary.items():
-        order = orders.filter(id=order_id).first()
+        order = orders.get(order_id)
+        if order is None:
+            continue
         request_input.append(
             {
                 "id": hubspot_id,
-                "properties": make_deal_sync_message_from_order(order).properties,
+                "properties": make_deal_sync_message_from_order(
+                    order, batch=batch
+                ).properties,
             }
         )
     return request_input
 
 
-def make_deal_sync_message_from_order(order: Order) -> SimplePublicObjectInput:
+def make_deal_sync_message_from_order(
+    order: Order, batch=None
+) -> SimplePublicObjectInput:
     """
     Create a hubspot sync message for an Order.
 
     Args:
         order (Order): Order object.
+        batch (HubspotBatchContext): Optional data preloaded for a batch of orders.
 
     Returns:
         SimplePublicObjectInput: input object for upserting Order data to Hubspot
     """
     from hubspot_sync.serializers import OrderToDealSerializer
 
-    properties = OrderToDealSerializer(order).data
+    properties = OrderToDealSerializer(order, context={"batch": batch}).data
     return make_object_properties_message(properties)
 
 
@@ -199,10 +238,13 @@ def make_line_item_create_messages_list_from_line_ids(
     Returns:
         List[SimplePublicObjectInput]: List of input objects for upserting Line data to Hubspot
     """
-    lines = Line.objects.filter(id__in=line_ids)
+    from hubspot_sync.serializers import HubspotBatchContext
+
+    lines = list(get_lines_for_sync(line_ids))
+    batch = HubspotBatchContext.for_lines(lines)
     message_list = []
     for line in lines:
-        message_list.append(make_line_item_sync_message_from_line(line))  # noqa: PERF401
+        message_list.append(make_line_item_sync_message_from_line(line, batch=batch))  # noqa: PERF401
     return message_list
 
 
@@ -218,33 +260,43 @@ def make_line_item_update_message_list_from_line_ids(
     Returns:
         List[dict]: List of dictionaries containing Line properties.
     """
+    from hubspot_sync.serializers import HubspotBatchContext
+
     chunk_dictionary = dict(chunk)
-    lines = Line.objects.filter(id__in=chunk_dictionary.keys())
+    lines = get_lines_for_sync(chunk_dictionary.keys()).in_bulk()
+    batch = HubspotBatchContext.for_lines(list(lines.values()))
     request_input = []
     for line_id, hubspot_id in chunk_dictionary.items():
-        line = lines.filter(id=line_id).first()
+        line = lines.get(line_id)
+        if line is None:
+            continue
         request_input.append(
             {
                 "id": hubspot_id,
-                "properties": make_line_item_sync_message_from_line(line).properties,
+                "properties": make_line_item_sync_message_from_line(
+                    line, batch=batch
+                ).properties,
             }
         )
     return request_input
 
 
-def make_line_item_sync_message_from_line(line: Line) -> SimplePublicObjectInput:
+def make_line_item_sync_message_from_line(
+    line: Line, batch=None
+) -> SimplePublicObjectInput:
     """
     Create a hubspot sync input object for a Line.
 
     Args:
         line (Line): Line object.
+        batch (HubspotBatchContext): Optional data preloaded for a batch of lines.
 
     Returns:
         SimplePublicObjectInput: input object for upserting Line data to Hubspot
     """
     from hubspot_sync.serializers import LineSerializer
 
-    properties = LineSerializer(line).data
+    properties = LineSerializer(line, context={"batch": batch}).data
     return make_object_properties_message(properties)
 
 
@@ -261,7 +313,7 @@ def make_product_create_message_list_from_product_ids(
         List[SimplePublicObjectInput]: List of input objects for createing Product data to Hubspot.
     """
     message_list = []
-    products = Product.objects.filter(id__in=product_ids)
+    products = get_products_for_sync(product_ids)
     for product in products:
         message_list.append(make_product_sync_message_from_product(product))  # noqa: PERF401
     return message_list
@@ -280,10 +332,12 @@ def make_product_update_message_list_from_product_ids(
         List[dict]: List of dictionaries containing Product properties.
     """
     chunk_dictionary = dict(chunk)
-    products = Product.objects.filter(id__in=chunk_dictionary.keys())
+    products = get_products_for_sync(chunk_dictionary.keys()).in_bulk()
     request_input = []
     for product_id, hubspot_id in chunk_dictionary.items():
-        product = products.filter(id=product_id).first()
+        product = products.get(product_id)
+        if product is None:
+            continue
         request_input.append(
             {
                 "id": hubspot_id,
@@ -311,6 +365,314 @@ def make_product_sync_message_from_product(product: Product) -> SimplePublicObje
     return make_object_properties_message(properties)
 
 
+def get_users_for_sync(user_ids: Iterable[int]) -> QuerySet:
+    """
+    Return a queryset of Users with the related data needed for Hubspot serialization prefetched
+
+    Args:
+        user_ids (Iterable[int]): User ids
+
+    Returns:
+        QuerySet: Users with legal address, profile and active certificates prefetched
+    """
+    return (
+        User.objects.filter(id__in=user_ids)
+        .select_related("legal_address", "user_profile")
+        .prefetch_related(
+            Prefetch(
+                "courseruncertificate_set",
+                queryset=CourseRunCertificate.objects.select_related("course_run"),
+                to_attr="active_course_run_certificates",
+            ),
+            Prefetch(
+                "programcertificate_set",
+                queryset=ProgramCertificate.objects.select_related("program"),
+                to_attr="active_program_certificates",
+            ),
+        )
+    )
+
+
+def get_orders_for_sync(order_ids: Iterable[int]) -> QuerySet:
+    """
+    Return a queryset of Orders with the related data needed for Hubspot serialization prefetched
+
+    Args:
+        order_ids (Iterable[int]): Order ids
+
+    Returns:
+        QuerySet: Orders; lines, products and discounts are preloaded by HubspotBatchContext
+    """
+    return Order.objects.filter(id__in=order_ids)
+
+
+def get_lines_for_sync(line_ids: Iterable[int]) -> QuerySet:
+    """
+    Return a queryset of Lines with the related data needed for Hubspot serialization prefetched
+
+    Args:
+        line_ids (Iterable[int]): Line ids
+
+    Returns:
+        QuerySet: Lines with their order, purchaser and product version selected
+    """
+    return Line.objects.filter(id__in=line_ids).select_related(
+        "order__purchaser", "product_version"
+    )
+
+
+def get_products_for_sync(product_ids: Iterable[int]) -> QuerySet:
+    """
+    Return a queryset of Products with the related data needed for Hubspot serialization prefetched
+
+    Args:
+        product_ids (Iterable[int]): Product ids
+
+    Returns:
+        QuerySet: Products with their purchasable objects prefetched
+    """
+    return Product.objects.filter(id__in=product_ids).prefetch_related(
+        "purchasable_object"
+    )
+
+
+def hash_hubspot_payload(properties: dict) -> str:
+    """
+    Compute a stable hash of the properties sent to Hubspot for an object
+
+    Args:
+        properties (dict): The Hubspot object properties
+
+    Returns:
+        str: A sha256 hex digest of the serialized properties
+    """
+    serialized = json.dumps(properties, sort_keys=True, default=str)
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+
+def get_payload_hashes(
+    content_type: ContentType,
+    hubspot_ids: Iterable[str],
+) -> Dict[str, str]:  # noqa: UP006
+    """
+    Get the stored payload hashes for a list of Hubspot ids
+
+    Args:
+        content_type (ContentType): The content type of the synced objects
+        hubspot_ids (Iterable[str]): Hubspot object ids
+
+    Returns:
+        dict: Stored payload hashes keyed by Hubspot id
+    """
+    return dict(
+        HubspotObjectPayloadHash.objects.filter(
+            hubspot_object__content_type=content_type,
+            hubspot_object__hubspot_id__in=hubspot_ids,
+        ).values_list("hubspot_object__hubspot_id", "payload_hash")
+    )
+
+
+def save_payload_hashes(
+    content_type: ContentType,
+    payload_hashes: Dict[str, str],  # noqa: UP006
+):
+    """
+    Store the hashes of payloads that were successfully sent to Hubspot
+
+    Args:
+        content_type (ContentType): The content type of the synced objects
+        payload_hashes (dict): Payload hashes keyed by Hubspot id
+    """
+    if not payload_hashes:
+        return
+    payload_hashes = {
+        str(hubspot_id): payload_hash
+        for hubspot_id, payload_hash in payload_hashes.items()
+    }
+    hubspot_objects = HubspotObject.objects.filter(
+        content_type=content_type, hubspot_id__in=payload_hashes.keys()
+    ).values_list("id", "hubspot_id")
+    HubspotObjectPayloadHash.objects.bulk_create(
+        [
+            HubspotObjectPayloadHash(
+                hubspot_object_id=hubspot_object_id,
+                payload_hash=payload_hashes[hubspot_id],
+            )
+            for hubspot_object_id, hubspot_id in hubspot_objects
+        ],
+        update_conflicts=True,
+        unique_fields=["hubspot_object"],
+        update_fields=["payload_hash", "updated_on"],
+    )
+
+
+def filter_unchanged_update_inputs(
+    content_type: ContentType,
+    inputs: List[dict],  # noqa: UP006
+) -> tuple[List[dict], Dict[str, str]]:  # noqa: UP006
+    """
+    Remove batch update inputs whose properties match the payload last sent to Hubspot
+
+    Args:
+        content_type (ContentType): The content type of the synced objects
+        inputs (List[dict]): Batch update inputs with "id" and "properties" keys
+
+    Returns:
+        tuple(list, dict): The changed inputs, and their new payload hashes keyed by Hubspot id
+    """
+    stored_hashes = get_payload_hashes(content_type, [item["id"] for item in inputs])
+    changed_inputs = []
+    new_hashes = {}
+    for item in inputs:
+        payload_hash = hash_hubspot_payload(item["properties"])
+        if stored_hashes.get(item["id"]) != payload_hash:
+            changed_inputs.append(item)
+            new_hashes[item["id"]] = payload_hash
+    return changed_inputs, new_hashes
+
+
+def get_unsynced_objects(content_type: ContentType) -> QuerySet:
+    """
+    Get the objects of a content type that do not have a HubspotObject yet
+
+    Args:
+        content_type (ContentType): The content type of the objects
+
+    Returns:
+        QuerySet: Unsynced objects, found with an anti-join against HubspotObject
+    """
+    model = content_type.model_class()
+    unsynced_objects = model.objects.exclude(
+        Exists(
+            HubspotObject.objects.filter(
+                content_type=content_type, object_id=OuterRef("pk")
+            )
+        )
+    )
+    if model is User:
+        unsynced_objects = unsynced_objects.filter(
+            is_active=True, email__contains="@"
+        ).exclude(social_auth__isnull=True)
+    return unsynced_objects
+
+
+def get_unsynced_object_ids_page(
+    content_type: ContentType, after_id: int, page_size: int
+) -> List[int]:  # noqa: UP006
+    """
+    Get the next page of unsynced object ids, ordered by id
+
+    Args:
+        content_type (ContentType): The content type of the objects
+        after_id (int): Only return ids greater than this one
+        page_size (int): Maximum number of ids to return
+
+    Returns:
+        List[int]: Object ids
+    """
+    return list(
+        get_unsynced_objects(content_type)
+        .filter(id__gt=after_id)
+        .order_by("id")
+        .values_list("id", flat=True)
+        .distinct()[:page_size]
+    )
+
+
+def get_synced_object_ids_page(
+    content_type: ContentType, after_id: int, page_size: int
+) -> List[tuple[int, str]]:  # noqa: UP006
+    """
+    Get the next page of synced (object id, hubspot id) pairs, ordered by object id
+
+    Args:
+        content_type (ContentType): The content type of the objects
+        after_id (int): Only return object ids greater than this one
+        page_size (int): Maximum number of pairs to return
+
+    Returns:
+        List[tuple(int, str)]: (object id, hubspot id) pairs
+    """
+    return list(
+        HubspotObject.objects.filter(content_type=content_type, object_id__gt=after_id)
+        .order_by("object_id")
+        .values_list("object_id", "hubspot_id")[:page_size]
+    )
+
+
+def _sync_checkpoint_key(content_type: ContentType, create: bool) -> str:  # noqa: FBT001
+    """Return the cache key for a sync checkpoint"""
+    return SYNC_CHECKPOINT_CACHE_KEY.format(
+        model=content_type.model, mode="create" if create else "update"
+    )
+
+
+def get_sync_checkpoint(content_type: ContentType, create: bool) -> int:  # noqa: FBT001
+    """
+    Get the last object id that a full sync of a content type finished processing
+
+    Args:
+        content_type (ContentType): The content type being synced
+        create (bool): Whether the sync creates or updates Hubspot objects
+
+    Returns:
+        int: The last processed object id, or 0 if there is no checkpoint
+    """
+    return caches["redis"].get(_sync_checkpoint_key(content_type, create), None) or 0
+
+
+def set_sync_checkpoint(content_type: ContentType, create: bool, after_id: int):  # noqa: FBT001
+    """
+    Record the last object id that a full sync of a content type finished processing
+
+    Args:
+        content_type (ContentType): The content type being synced
+        create (bool): Whether the sync creates or updates Hubspot objects
+        after_id (int): The last processed object id
+    """
+    caches["redis"].set(
+        _sync_checkpoint_key(content_type, create), after_id, timeout=None
+    )
+
+
+def clear_sync_checkpoint(content_type: ContentType, create: bool):  # noqa: FBT001
+    """
+    Remove the checkpoint for a full sync of a content type
+
+    Args:
+        content_type (ContentType): The content type being synced
+        create (bool): Whether the sync creates or updates Hubspot objects
+    """
+    caches["redis"].delete(_sync_checkpoint_key(content_type, create))
+
+
+def set_deal_sync_pending(order_id: int) -> bool:
+    """
+    Mark a deal sync as pending for an order, unless one is pending already
+
+    Args:
+        order_id (int): The id of the order to sync
+
+    Returns:
+        bool: True if no sync was pending and one should be scheduled
+    """
+    return caches["redis"].add(
+        DEAL_SYNC_PENDING_CACHE_KEY.format(order_id=order_id),
+        True,  # noqa: FBT003
+        timeout=DEAL_SYNC_PENDING_TIMEOUT,
+    )
+
+
+def clear_deal_sync_pending(order_id: int):
+    """
+    Clear the pending deal sync for an order, so that later changes schedule a new sync
+
+    Args:
+        order_id (int): The id of the order being synced
+    """
+    caches["redis"].delete(DEAL_SYNC_PENDING_CACHE_KEY.format(order_id=order_id))
+
+
 def format_product_name(product: Product) -> str:
     """
     Get the Product name as it should appear in Hubspot
@@ -327,162 +689,364 @@ def format_product_name(product: Product) -> str:
     return f"{product_obj.title}: {title_suffix} [{format_app_id(product.id)}]"
 
 
-def sync_contact_hubspot_ids_to_db():
+def prefetch_purchasable_objects(products: List[Product]):  # noqa: UP006
     """
-    Create HubspotObjects for all contacts in Hubspot
+    Load the purchasable objects (and the programs of program runs) for a list of
+    products in bulk, so that format_product_name does not query for each product.
+
+    Args:
+        products (List[Product]): The products
+    """
+    prefetch_related_objects(products, "purchasable_object")
+    program_runs = [
+        product.purchasable_object
+        for product in products
+        if isinstance(product.purchasable_object, ProgramRun)
+    ]
+    prefetch_related_objects(program_runs, "program")
+
+
+def _pick_hubspot_id(
+    hubspot_ids: List[str],  # noqa: UP006
+    existing_hubspot_id: Optional[str],  # noqa: FA100
+) -> str:
+    """Pick one of several matching hubspot ids, preferring the one already stored"""
+    if existing_hubspot_id in hubspot_ids:
+        return existing_hubspot_id
+    return hubspot_ids[0]
+
+
+def _get_existing_hubspot_ids(model) -> Dict[int, str]:  # noqa: UP006
+    """
+    Return the stored hubspot ids for a model, keyed by object id
+
+    Args:
+        model (Model): The model class
 
     Returns:
-        bool: True if hubspot id matches found for all Users
+        dict: Hubspot ids keyed by object id
     """
-    contacts = get_all_objects(
-        HubspotObjectType.CONTACTS.value, properties=["email", "hs_additional_emails"]
-    )
-    content_type = ContentType.objects.get_for_model(User)
-    for contact in contacts:
-        user = User.objects.filter(email__iexact=contact.properties["email"]).first()
-        if not user and contact.properties["hs_additional_emails"]:
-            alt_email_q = Q()
-            for alt_email in contact.properties["hs_additional_emails"].split(";"):
-                alt_email_q |= Q(email__iexact=alt_email)
-            user = User.objects.filter(alt_email_q).first()
-        if user:
-            HubspotObject.objects.update_or_create(
-                content_type=content_type,
-                object_id=user.id,
-                defaults={"hubspot_id": contact.id},
-            )
-    return (
-        User.objects.count()
-        == HubspotObject.objects.filter(content_type=content_type).count()
+    return dict(
+        HubspotObject.objects.filter(
+            content_type=ContentType.objects.get_for_model(model)
+        ).values_list("object_id", "hubspot_id")
     )
 
 
-def sync_product_hubspot_ids_to_db() -> bool:
+def _save_hubspot_id_matches(
+    content_type: ContentType,
+    existing: Dict[int, str],  # noqa: UP006
+    matched: Dict[int, str],  # noqa: UP006
+    duplicates: Dict[str, List[str]],  # noqa: UP006
+) -> Dict[int, str]:  # noqa: UP006
     """
-    Create HubspotObjects for products, return True if all products have hubspot ids
+    Write HubspotObjects for matched objects with batched upserts
+
+    Matches for a hubspot id that is already stored for a different object are not
+    written, and are added to the duplicates instead.
+
+    Args:
+        content_type (ContentType): The content type of the matched objects
+        existing (dict): The stored hubspot ids keyed by object id
+        matched (dict): Hubspot ids keyed by object id
+        duplicates (dict): Lists of conflicting hubspot ids keyed by match key
 
     Returns:
-        bool: True if hubspot id matches found for all Products
+        dict: The matches that were saved or already stored
     """
-    content_type = ContentType.objects.get_for_model(Product)
-    product_mapping = {}
-    for product in Product.objects.all():
-        product_mapping.setdefault(format_product_name(product), []).append(product.id)
-    products = get_all_objects(HubspotObjectType.PRODUCTS.value)
-    for product in products:
-        matching_products = product_mapping.get(product.properties["name"])
-        if not matching_products:
+    owners = {hubspot_id: object_id for object_id, hubspot_id in existing.items()}
+    saved = {}
+    to_write = []
+    for object_id, hubspot_id in matched.items():
+        owner = owners.get(hubspot_id)
+        if owner is not None and owner != object_id:
+            duplicates.setdefault(f"{content_type.model} {object_id}", []).append(
+                hubspot_id
+            )
             continue
-        if len(matching_products) > 1:
-            # Narrow down by price
-            matched_subquery = HubspotObject.objects.filter(
-                content_type=content_type
-            ).values_list("object_id", flat=True)
-            matching_product = (
-                Product.objects.exclude(id__in=matched_subquery)
-                .filter(
-                    id__in=matching_products,
-                    price=Decimal(product.properties["price"]),
+        saved[object_id] = hubspot_id
+        if existing.get(object_id) != hubspot_id:
+            to_write.append(
+                HubspotObject(
+                    content_type=content_type,
+                    object_id=object_id,
+                    hubspot_id=hubspot_id,
                 )
-                .order_by("-created_on")
-                .values_list("id", flat=True)
-                .first()
             )
-        else:
-            matching_product = matching_products[0]
-        if matching_product:
-            HubspotObject.objects.update_or_create(
-                content_type=content_type,
-                object_id=matching_product,
-                defaults={"hubspot_id": product.id},
+    for chunk in chunks(to_write, chunk_size=RECONCILIATION_WRITE_CHUNK_SIZE):
+        HubspotObject.objects.bulk_create(
+            chunk,
+            update_conflicts=True,
+            unique_fields=["object_id", "content_type"],
+            update_fields=["hubspot_id"],
+        )
+    return saved
+
+
+def _reconcile(
+    model,
+    existing: Dict[int, str],  # noqa: UP006
+    matched: Dict[int, str],  # noqa: UP006
+    duplicates: Dict[str, List[str]],  # noqa: UP006
+    unmatched: List[str],  # noqa: UP006
+) -> HubspotIdReconciliation:
+    """
+    Save the matches for a model and build the reconciliation report
+
+    Args:
+        model (Model): The model class that was matched
+        existing (dict): The stored hubspot ids keyed by object id, as loaded before matching
+        matched (dict): Hubspot ids keyed by object id
+        duplicates (dict): Lists of conflicting hubspot ids keyed by match key
+        unmatched (list): Hubspot ids that did not match any object
+
+    Returns:
+        HubspotIdReconciliation: The reconciliation report
+    """
+    content_type = ContentType.objects.get_for_model(model)
+    saved = _save_hubspot_id_matches(content_type, existing, matched, duplicates)
+    missing = list(
+        model.objects.exclude(
+            Exists(
+                HubspotObject.objects.filter(
+                    content_type=content_type, object_id=OuterRef("pk")
+                )
             )
-    return (
-        Product.objects.count()
-        == HubspotObject.objects.filter(content_type=content_type).count()
+        )
+        .order_by("id")
+        .values_list("id", flat=True)
+    )
+    return HubspotIdReconciliation(
+        model_name=content_type.model,
+        matched=saved,
+        missing=missing,
+        duplicates=duplicates,
+        unmatched=unmatched,
     )
 
 
-def sync_deal_hubspot_ids_to_db() -> bool:
+def reconcile_contact_hubspot_ids() -> HubspotIdReconciliation:
     """
-    Create Hubspot objects for orders and lines, return True if all orders
-    (and optionally lines) have hubspot ids
+    Match all Hubspot contacts to Users by email (or by additional email if there is
+    no User with the primary email), and store their hubspot ids
+
+    Returns:
+        HubspotIdReconciliation: The reconciliation report
+    """
+    primary_index = {}
+    additional_emails = {}
+    for contact in get_all_objects(
+        HubspotObjectType.CONTACTS.value, properties=["email", "hs_additional_emails"]
+    ):
+        email = (contact.properties.get("email") or "").lower()
+        primary_index.setdefault(email, []).append(contact.id)
+        if contact.properties.get("hs_additional_emails"):
+            additional_emails[contact.id] = [
+                alt_email.lower()
+                for alt_email in contact.properties["hs_additional_emails"].split(";")
+            ]
+
+    user_ids_by_email = {}
+    for user_id, email in (
+        User.objects.order_by("-id").values_list("id", "email").iterator()
+    ):
+        # Descending, so the lowest id is kept for case-insensitive duplicates
+        user_ids_by_email[email.lower()] = user_id
+    existing = _get_existing_hubspot_ids(User)
+
+    matched = {}
+    duplicates = {}
+    unmatched_contacts = []
+    for email, hubspot_ids in primary_index.items():
+        user_id = user_ids_by_email.get(email)
+        if user_id is None:
+            unmatched_contacts.extend(hubspot_ids)
+            continue
+        if len(hubspot_ids) > 1:
+            duplicates[email] = hubspot_ids
+        matched[user_id] = _pick_hubspot_id(hubspot_ids, existing.get(user_id))
+
+    unmatched = []
+    for hubspot_id in unmatched_contacts:
+        alt_user_ids = sorted(
+            user_ids_by_email[alt_email]
+            for alt_email in additional_emails.get(hubspot_id, [])
+            if alt_email in user_ids_by_email
+        )
+        alt_user_ids = [user_id for user_id in alt_user_ids if user_id not in matched]
+        if alt_user_ids:
+            matched[alt_user_ids[0]] = hubspot_id
+        else:
+            unmatched.append(hubspot_id)
+    return _reconcile(User, existing, matched, duplicates, unmatched)
+
+
+def reconcile_product_hubspot_ids() -> HubspotIdReconciliation:
+    """
+    Match all Hubspot products to active Products by name (and by price if several
+    products have the same name), and store their hubspot ids
 
     Returns:
-        bool: True if matches found for all Orders (and optionally their lines)
+        HubspotIdReconciliation: The reconciliation report
     """
-    ct_order = ContentType.objects.get_for_model(Order)
-    deals = get_all_objects(
+    hubspot_index = {}
+    for hs_product in get_all_objects(HubspotObjectType.PRODUCTS.value):
+        hubspot_index.setdefault(hs_product.properties["name"], []).append(hs_product)
+
+    products = list(Product.objects.order_by("-created_on"))
+    prefetch_purchasable_objects(products)
+    product_index = {}
+    for product in products:
+        product_index.setdefault(format_product_name(product), []).append(product)
+    existing = _get_existing_hubspot_ids(Product)
+
+    matched = {}
+    duplicates = {}
+    unmatched = []
+    for name, hs_products in hubspot_index.items():
+        local_products = product_index.get(name)
+        if not local_products:
+            unmatched.extend(hs_product.id for hs_product in hs_products)
+        elif len(local_products) == 1:
+            product = local_products[0]
+            hubspot_ids = [hs_product.id for hs_product in hs_products]
+            if len(hubspot_ids) > 1:
+                duplicates[name] = hubspot_ids
+            matched[product.id] = _pick_hubspot_id(
+                hubspot_ids, existing.get(product.id)
+            )
+        else:
+            # Narrow down by price, newest product first
+            for hs_product in hs_products:
+                product = next(
+                    (
+                        product
+                        for product in local_products
+                        if product.id not in matched
+                        and product.price == Decimal(hs_product.properties["price"])
+                    ),
+                    None,
+                )
+                if product:
+                    matched[product.id] = hs_product.id
+                else:
+                    unmatched.append(hs_product.id)
+    return _reconcile(Product, existing, matched, duplicates, unmatched)
+
+
+def reconcile_deal_hubspot_ids() -> HubspotIdReconciliation:
+    """
+    Match all Hubspot deals to Orders by deal name and amount, and store their hubspot ids
+
+    Returns:
+        HubspotIdReconciliation: The reconciliation report
+    """
+    hubspot_index = {}
+    unmatched = []
+    for deal in get_all_objects(
         HubspotObjectType.DEALS.value, properties=["dealname", "amount"]
-    )
-    lines_synced = True
-    for deal in deals:
-        deal_name = deal.properties["dealname"]
-        deal_price = Decimal(deal.properties["amount"] or "0.00")
+    ):
         try:
-            object_id = int(deal_name.split("-")[-1])
+            order_id = int(deal.properties["dealname"].split("-")[-1])
         except ValueError:
             # this isn't a deal that can be synced, ie "AMx Run 3 - SPIN MASTER"
             continue
-        order = Order.objects.filter(id=object_id, total_price_paid=deal_price).first()
-        content_type = ct_order
-        if order:
-            HubspotObject.objects.update_or_create(
-                content_type=content_type,
-                object_id=order.id,
-                defaults={"hubspot_id": deal.id},
+        hubspot_index.setdefault(order_id, []).append(
+            (deal.id, Decimal(deal.properties["amount"] or "0.00"))
+        )
+
+    existing = _get_existing_hubspot_ids(Order)
+    matched = {}
+    duplicates = {}
+    for chunk in chunks(
+        hubspot_index.keys(), chunk_size=RECONCILIATION_READ_CHUNK_SIZE
+    ):
+        order_prices = dict(
+            Order.objects.filter(id__in=chunk).values_list("id", "total_price_paid")
+        )
+        for order_id in chunk:
+            deals = hubspot_index[order_id]
+            hubspot_ids = [
+                deal_id
+                for deal_id, amount in deals
+                if order_id in order_prices and order_prices[order_id] == amount
+            ]
+            unmatched.extend(
+                deal_id for deal_id, _ in deals if deal_id not in hubspot_ids
             )
-            if not sync_deal_line_hubspot_ids_to_db(order, deal.id):
-                lines_synced = False
-    return (Order.objects.count()) == HubspotObject.objects.filter(
-        content_type=ct_order
-    ).count() and lines_synced
+            if not hubspot_ids:
+                continue
+            if len(hubspot_ids) > 1:
+                duplicates[f"MITXONLINE-ORDER-{order_id}"] = hubspot_ids
+            matched[order_id] = _pick_hubspot_id(hubspot_ids, existing.get(order_id))
+    return _reconcile(Order, existing, matched, duplicates, unmatched)
 
 
-def sync_deal_line_hubspot_ids_to_db(order, hubspot_order_id) -> bool:
+def reconcile_line_hubspot_ids() -> HubspotIdReconciliation:
     """
-    Create HubspotObjects for all of a deal's line items, return True if matches found for all lines
+    Match all Hubspot line items to Lines by unique_app_id, and store their hubspot ids
 
-    Args:
-        order(Order): The order to sync Hubspot line items for
-        hubspot_order_id(str): The Hubspot deal id
+    Returns:
+        HubspotIdReconciliation: The reconciliation report
+    """
+    hubspot_index = {}
+    for line_item in get_all_objects(
+        HubspotObjectType.LINES.value, properties=["unique_app_id"]
+    ):
+        hubspot_index.setdefault(line_item.properties.get("unique_app_id"), []).append(
+            line_item.id
+        )
+
+    existing = _get_existing_hubspot_ids(Line)
+    matched = {}
+    duplicates = {}
+    for line_id in Line.objects.values_list("id", flat=True).iterator():
+        unique_app_id = format_app_id(line_id)
+        hubspot_ids = hubspot_index.pop(unique_app_id, None)
+        if not hubspot_ids:
+            continue
+        if len(hubspot_ids) > 1:
+            duplicates[unique_app_id] = hubspot_ids
+        matched[line_id] = _pick_hubspot_id(hubspot_ids, existing.get(line_id))
+    unmatched = [
+        hubspot_id
+        for hubspot_ids in hubspot_index.values()
+        for hubspot_id in hubspot_ids
+    ]
+    return _reconcile(Line, existing, matched, duplicates, unmatched)
+
+
+def sync_contact_hubspot_ids_to_db() -> bool:
+    """
+    Create HubspotObjects for all contacts in Hubspot
 
     Returns:
-        bool: True if matches found for all the order lines
+        bool: True if hubspot id matches found for all Users
+    """
+    return not reconcile_contact_hubspot_ids().missing
+
 
+def sync_product_hubspot_ids_to_db() -> bool:
     """
-    line_items = get_line_items_for_deal(hubspot_order_id)
-    order_line = order.lines.first()
+    Create HubspotObjects for products, return True if all products have hubspot ids
 
-    matches = 0
-    expected_matches = order.lines.count()
-    if len(line_items) == 1:
-        HubspotObject.objects.update_or_create(
-            content_type=ContentType.objects.get_for_model(order_line),
-            object_id=order_line.id,
-            defaults={"hubspot_id": line_items[0].id},
-        )
-        matches += 1
-    else:  # Multiple lines, need to match by product and quantity
-        for line in line_items:
-            hs_product = HubspotObject.objects.filter(
-                hubspot_id=line.properties["hs_product_id"],
-                content_type=ContentType.objects.get_for_model(Product),
-            ).first()
-            if hs_product:
-                product_id = hs_product.object_id
-                matching_line = Line.objects.filter(
-                    order=order,
-                    product_version__object_id=product_id,
-                    quantity=int(line.properties["quantity"]),
-                ).first()
-                if matching_line:
-                    HubspotObject.objects.update_or_create(
-                        content_type=ContentType.objects.get_for_model(Line),
-                        object_id=matching_line.id,
-                        defaults={"hubspot_id": line.id},
-                    )
-                    matches += 1
-    return matches == expected_matches
+    Returns:
+        bool: True if hubspot id matches found for all Products
+    """
+    return not reconcile_product_hubspot_ids().missing
+
+
+def sync_deal_hubspot_ids_to_db() -> bool:
+    """
+    Create Hubspot objects for orders and lines, return True if all orders
+    and lines have hubspot ids
+
+    Returns:
+        bool: True if matches found for all Orders and their lines
+    """
+    orders_synced = not reconcile_deal_hubspot_ids().missing
+    lines_synced = not reconcile_line_hubspot_ids().missing
+    return orders_synced and lines_synced
 
 
 def get_hubspot_id_for_object(  # noqa: C901
@@ -576,6 +1140,9 @@ def sync_line_item_with_hubspot(line: Line) -> SimplePublicObject:
     result = upsert_object_request(
         content_type, HubspotObjectType.LINES.value, object_id=line.id, body=body
     )
+    save_payload_hashes(
+        content_type, {result.id: hash_hubspot_payload(body.properties)}
+    )
     # Associate the parent deal with the line item
     associate_objects_request(
         HubspotObjectType.LINES.value,
@@ -607,6 +1174,9 @@ def sync_deal_with_hubspot(order: Order) -> SimplePublicObject:
     result = upsert_object_request(
         content_type, HubspotObjectType.DEALS.value, object_id=order.id, body=body
     )
+    save_payload_hashes(
+        content_type, {result.id: hash_hubspot_payload(body.properties)}
+    )
     # Create association between deal and contact
     associate_objects_request(
         HubspotObjectType.DEALS.value,
@@ -634,9 +1204,13 @@ def sync_product_with_hubspot(product: Product) -> SimplePublicObject:
     body = make_product_sync_message_from_product(product)
     content_type = ContentType.objects.get_for_model(Product)
 
-    return upsert_object_request(
+    result = upsert_object_request(
         content_type, HubspotObjectType.PRODUCTS.value, object_id=product.id, body=body
     )
+    save_payload_hashes(
+        content_type, {result.id: hash_hubspot_payload(body.properties)}
+    )
+    return result
 
 
 def sync_contact_with_hubspot(user: User):
@@ -661,6 +1235,9 @@ def sync_contact_with_hubspot(user: User):
         object_id=user.id,
         body=body,
     )
+    save_payload_hashes(
+        content_type, {result.id: hash_hubspot_payload(body.properties)}
+    )
     user.hubspot_sync_datetime = now_in_utc()
     user.save(update_fields=["hubspot_sync_datetime"])
 
@@ -22,6 +22,7 @@ from ecommerce.models import Product
 from hubspot_sync import api
 from hubspot_sync.api import get_hubspot_id_for_object
 from hubspot_sync.conftest import FAKE_HUBSPOT_ID
+from hubspot_sync.models import HubspotObjectPayloadHash
 from hubspot_sync.serializers import (
     LineSerializer,
     OrderToDealSerializer,
@@ -160,6 +161,11 @@ def test_sync_contact_with_hubspot(mock_hubspot_api):
     )
     user.refresh_from_db()
     assert user.hubspot_sync_datetime is not None
+    assert HubspotObjectPayloadHash.objects.get(
+        hubspot_object__object_id=user.id, hubspot_object__content_type__model="user"
+    ).payload_hash == api.hash_hubspot_payload(
+        api.make_contact_sync_message_from_user(user).properties
+    )
 
 
 def test_sync_contact_with_hubspot_error(mocker, mock_hubspot_api):
@@ -378,78 +384,103 @@ def test_sync_deal_hubspot_ids_to_hubspot(
             "amount": "400.00",
         }
     )
-    hs_products = [
-        HubspotObjectFactory.create(
-            content_object=Product.objects.get(pk=line.product_version.object_id),
-            content_type=ContentType.objects.get_for_model(Product),
-            object_id=Product.objects.get(pk=line.product_version.object_id).id,
-        )
-        for line in lines
-    ]
     line_items = [
         SimplePublicObjectFactory(
-            properties={"hs_product_id": hsp.hubspot_id, "quantity": 1}
+            properties={"unique_app_id": api.format_app_id(line.id)}
         )
-        for hsp in hs_products[0:line_matches]
+        for line in lines[0:line_matches]
     ]
     mock_hubspot_api.return_value.crm.objects.basic_api.get_page.side_effect = [
         mocker.Mock(results=deals, paging=None),  # deals
+        mocker.Mock(results=line_items, paging=None),  # line items
     ]
-    mock_hubspot_api.return_value.crm.deals.associations_api.get_all.side_effect = [
-        *[mocker.Mock(results=[SimplePublicObjectFactory()]) for _ in line_items],
-        mocker.Mock(results=[]),
-    ]  # associations
-    mock_hubspot_api.return_value.crm.line_items.basic_api.get_by_id.side_effect = [
-        SimplePublicObjectFactory(properties={"hs_product_id": hsp.hubspot_id})
-        for hsp in hs_products[0:line_matches]
-    ]  # line_item details
     assert api.sync_deal_hubspot_ids_to_db() is (match_all_lines and match_all_deals)
     assert (
         HubspotObject.objects.filter(content_type__model="order").count()
         == deal_matches
     )
-    assert HubspotObject.objects.filter(content_type__model="line").count() == min(
-        deal_matches, line_matches
+    assert (
+        HubspotObject.objects.filter(content_type__model="line").count() == line_matches
     )
 
 
-@pytest.mark.parametrize("match_lines,quantity", [[True, 2], [False, 3]])  # noqa: PT006, PT007
-def test_sync_deal_line_hubspot_ids_to_hubspot_two_lines(
-    mocker, mock_hubspot_api, match_lines, quantity
-):
-    """Matches should be made correctly for an order with 2 lines"""
-    order = OrderFactory.create()
-    with reversion.create_revision():
-        product = ProductFactory.create()
-    version = Version.objects.get_for_object(product).first()
-    hs_order = HubspotObjectFactory.create(
-        content_object=order,
-        content_type=ContentType.objects.get_for_model(order),
-        object_id=order.id,
-    )
-    hs_product = HubspotObjectFactory.create(
-        content_object=product,
-        content_type=ContentType.objects.get_for_model(Product),
-        object_id=product.id,
+def test_reconcile_contact_hubspot_ids_report(mocker, mock_hubspot_api):
+    """reconcile_contact_hubspot_ids should report matched, missing, duplicate, and unmatched contacts"""
+    users = UserFactory.create_batch(3)
+    contacts = [
+        SimplePublicObjectFactory(id="1", properties={"email": users[0].email}),
+        SimplePublicObjectFactory(id="2", properties={"email": users[0].email}),
+        SimplePublicObjectFactory(id="3", properties={"email": users[1].email}),
+        SimplePublicObjectFactory(id="4", properties={"email": "nobody@fake.edu"}),
+    ]
+    mock_hubspot_api.return_value.crm.objects.basic_api.get_page.side_effect = [
+        mocker.Mock(results=contacts, paging=None)
+    ]
+    report = api.reconcile_contact_hubspot_ids()
+    assert report.model_name == "user"
+    assert report.matched == {users[0].id: "1", users[1].id: "3"}
+    assert report.missing == [users[2].id]
+    assert report.duplicates == {users[0].email.lower(): ["1", "2"]}
+    assert report.unmatched == ["4"]
+
+
+def test_reconcile_contact_hubspot_ids_existing(mocker, mock_hubspot_api):
+    """reconcile_contact_hubspot_ids should keep stored ids and not reassign ids owned by another user"""
+    users = UserFactory.create_batch(2)
+    content_type = ContentType.objects.get_for_model(users[0])
+    HubspotObjectFactory.create(
+        content_object=users[0],
+        content_type=content_type,
+        object_id=users[0].id,
+        hubspot_id="2",
     )
-    lines = (  # noqa: F841
-        LineFactory.create(order=order, product_version=version, quantity=1),
-        LineFactory.create(order=order, product_version=version, quantity=quantity),
+    HubspotObjectFactory.create(
+        content_object=users[1],
+        content_type=content_type,
+        object_id=users[1].id,
+        hubspot_id="3",
     )
-    lines_response = [
-        SimplePublicObjectFactory(
-            properties={"hs_product_id": hs_product.hubspot_id, "quantity": 1},
-        ),
+    contacts = [
+        SimplePublicObjectFactory(id="1", properties={"email": users[0].email}),
+        SimplePublicObjectFactory(id="2", properties={"email": users[0].email}),
+        SimplePublicObjectFactory(id="2", properties={"email": users[1].email}),
+    ]
+    mock_hubspot_api.return_value.crm.objects.basic_api.get_page.side_effect = [
+        mocker.Mock(results=contacts, paging=None)
+    ]
+    report = api.reconcile_contact_hubspot_ids()
+    assert report.matched == {users[0].id: "2"}
+    assert report.missing == []
+    assert report.duplicates[f"user {users[1].id}"] == ["2"]
+    assert set(
+        HubspotObject.objects.filter(content_type=content_type).values_list(
+            "object_id", "hubspot_id"
+        )
+    ) == {(users[0].id, "2"), (users[1].id, "3")}
+
+
+def test_reconcile_deal_hubspot_ids_read_chunks(mocker, mock_hubspot_api):
+    """reconcile_deal_hubspot_ids should match orders across several read chunks"""
+    mocker.patch("hubspot_sync.api.RECONCILIATION_READ_CHUNK_SIZE", 2)
+    orders = OrderFactory.create_batch(3)
+    deals = [
         SimplePublicObjectFactory(
-            properties={"hs_product_id": hs_product.hubspot_id, "quantity": 2},
-        ),
+            properties={
+                "dealname": f"MITXONLINE-ORDER-{order.id}",
+                "amount": str(order.total_price_paid),
+            }
+        )
+        for order in orders
     ]
-    mocker.patch(
-        "hubspot_sync.api.get_line_items_for_deal", return_value=lines_response
-    )
-    assert (
-        api.sync_deal_line_hubspot_ids_to_db(order, hs_order.hubspot_id) is match_lines
-    )
+    mock_hubspot_api.return_value.crm.objects.basic_api.get_page.side_effect = [
+        mocker.Mock(results=deals, paging=None)
+    ]
+    report = api.reconcile_deal_hubspot_ids()
+    assert report.matched == {
+        order.id: deals[idx].id for idx, order in enumerate(orders)
+    }
+    assert report.missing == []
+    assert report.unmatched == []
 
 
 @pytest.mark.parametrize("error", [True, False])
@@ -473,3 +504,40 @@ def test_get_hubspot_id_raises(mocker, user):
         get_hubspot_id_for_object(user, raise_error=True)
     mock_log.assert_called_once()
     assert f"Hubspot id could not be found for user for id {user.id}" == str(exc.value)
+
+
+def test_hash_hubspot_payload():
+    """hash_hubspot_payload should return the same hash regardless of property order"""
+    assert api.hash_hubspot_payload(
+        {"name": "Test", "price": "10.00"}
+    ) == api.hash_hubspot_payload({"price": "10.00", "name": "Test"})
+    assert api.hash_hubspot_payload(
+        {"name": "Test", "price": "10.00"}
+    ) != api.hash_hubspot_payload({"name": "Test", "price": "20.00"})
+
+
+def test_save_and_filter_payload_hashes():
+    """filter_unchanged_update_inputs should only return inputs with changed payloads"""
+    content_type = ContentType.objects.get_for_model(Product)
+    hs_objects = [
+        HubspotObjectFactory.create(
+            content_type=content_type, object_id=product.id, content_object=product
+        )
+        for product in ProductFactory.create_batch(3)
+    ]
+    inputs = [
+        {"id": hs_object.hubspot_id, "properties": {"name": f"Product {idx}"}}
+        for idx, hs_object in enumerate(hs_objects)
+    ]
+    changed, payload_hashes = api.filter_unchanged_update_inputs(content_type, inputs)
+    assert changed == inputs
+    api.save_payload_hashes(content_type, payload_hashes)
+    assert HubspotObjectPayloadHash.objects.count() == 3
+
+    inputs[1]["properties"]["name"] = "Renamed product"
+    changed, payload_hashes = api.filter_unchanged_update_inputs(content_type, inputs)
+    assert changed == [inputs[1]]
+    assert list(payload_hashes.keys()) == [hs_objects[1].hubspot_id]
+    api.save_payload_hashes(content_type, payload_hashes)
+    assert HubspotObjectPayloadHash.objects.count() == 3
+    assert api.filter_unchanged_update_inputs(content_type, inputs) == ([], {})
@@ -10,6 +10,7 @@ from mitol.common.utils import now_in_utc
 from mitol.hubspot_api.api import HubspotObjectType
 
 from ecommerce.models import Line, Order, Product
+from hubspot_sync.api import get_sync_checkpoint
 from hubspot_sync.tasks import batch_upsert_associations, batch_upsert_hubspot_objects
 from users.models import User
 
@@ -21,11 +22,31 @@ class Command(BaseCommand):
 
     create = None
     object_ids = None
+    resume = False
     help = (
         "Sync all Users, Products, Orders, Lines with Hubspot. Hubspot API key must be set and Hubspot settings"
         "must be configured with configure_hubspot_settings"
     )
 
+    def get_after_id(self, model):
+        """
+        Get the id to resume a full sync of a model from, if resuming
+
+        Args:
+            model (Model): The model class being synced
+
+        Returns:
+            int: The checkpointed object id, or None to start from the beginning
+        """
+        if not self.resume or self.object_ids:
+            return None
+        after_id = get_sync_checkpoint(
+            ContentType.objects.get_for_model(model), self.create
+        )
+        if after_id:
+            self.stdout.write(f"  Resuming after {model.__name__} id {after_id}\n")
+        return after_id
+
     def sync_contacts(self):
         """
         Sync all users with contacts in hubspot
@@ -37,6 +58,7 @@ class Command(BaseCommand):
             User._meta.app_label,  # noqa: SLF001
             self.create,
             object_ids=self.object_ids,
+            after_id=self.get_after_id(User),
         )
         start = now_in_utc()
         task.get()
@@ -56,6 +78,7 @@ class Command(BaseCommand):
             Product._meta.app_label,  # noqa: SLF001
             self.create,
             object_ids=self.object_ids,
+            after_id=self.get_after_id(Product),
         )
         start = now_in_utc()
         task.get()
@@ -75,6 +98,7 @@ class Command(BaseCommand):
             Order._meta.app_label,  # noqa: SLF001
             self.create,
             object_ids=self.object_ids,
+            after_id=self.get_after_id(Order),
         )
         start = now_in_utc()
         task.get()
@@ -94,6 +118,7 @@ class Command(BaseCommand):
             Line._meta.app_label,  # noqa: SLF001
             self.create,
             object_ids=self.object_ids,
+            after_id=self.get_after_id(Line),
         )
         start = now_in_utc()
         task.get()
@@ -170,6 +195,12 @@ class Command(BaseCommand):
             action="store_true",
             help="Sync all order associations",
         )
+        parser.add_argument(
+            "--resume",
+            dest="resume",
+            action="store_true",
+            help="Resume full syncs from the last checkpoint of a previous, interrupted run",
+        )
         parser.add_argument(
             "mode",
             type=str,
@@ -184,6 +215,7 @@ class Command(BaseCommand):
             sys.exit(1)
         self.create = options["mode"].lower() == "create"
         self.object_ids = options["ids"]
+        self.resume = options["resume"]
 
         sys.stdout.write("Syncing with hubspot...\n")
         if not (
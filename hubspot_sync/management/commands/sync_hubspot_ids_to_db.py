@@ -5,17 +5,15 @@ Management command to sync hubspot ids to database
 import sys
 from typing import List  # noqa: UP035
 
-from django.contrib.contenttypes.models import ContentType
 from django.core.management import BaseCommand
-from mitol.hubspot_api.models import HubspotObject
 
-from ecommerce.models import Line, Order, Product
 from hubspot_sync.api import (
-    sync_contact_hubspot_ids_to_db,
-    sync_deal_hubspot_ids_to_db,
-    sync_product_hubspot_ids_to_db,
+    HubspotIdReconciliation,
+    reconcile_contact_hubspot_ids,
+    reconcile_deal_hubspot_ids,
+    reconcile_line_hubspot_ids,
+    reconcile_product_hubspot_ids,
 )
-from users.models import User
 
 
 def format_missing(missing: List[int]) -> str:  # noqa: UP006
@@ -30,69 +28,53 @@ class Command(BaseCommand):
 
     help = "Management command to sync hubspot ids to database"
 
+    def write_report(self, report: HubspotIdReconciliation):
+        """
+        Write the matched, missing, duplicate, and unmatched results of a reconciliation
+        """
+        sys.stdout.write(f"Matched {len(report.matched)} {report.model_name} objects\n")
+        if report.missing:
+            sys.stderr.write(
+                f"{len(report.missing)} {report.model_name} objects could not be matched with hubspot ids:{format_missing(report.missing)}"
+            )
+        if report.duplicates:
+            sys.stderr.write(
+                f"{len(report.duplicates)} {report.model_name} objects have duplicate hubspot ids:\n"
+            )
+            for key, hubspot_ids in report.duplicates.items():
+                sys.stderr.write(f" {key}: {','.join(hubspot_ids)}\n")
+            sys.stderr.write("\n")
+        if report.unmatched:
+            sys.stderr.write(
+                f"{len(report.unmatched)} hubspot {report.model_name} objects did not match anything:\n {','.join(report.unmatched)}\n\n"
+            )
+        if not report.missing:
+            sys.stdout.write(
+                f"All {report.model_name} objects matched with hubspot ids\n\n"
+            )
+
     def sync_contacts(self):
         """
         Get hubspot ids for all Users
         """
         sys.stdout.write("Syncing user hubspot ids to database...\n")
-        result = sync_contact_hubspot_ids_to_db()
-        missing = User.objects.exclude(
-            id__in=HubspotObject.objects.filter(
-                content_type=ContentType.objects.get_for_model(User)
-            ).values_list("object_id", flat=True)
-        ).values_list("username", flat=True)
-        if not result and missing.count() > 0:
-            sys.stderr.write(
-                f"Some users could not be matched with hubspot ids:\n {','.join([username for username in missing])}\n\n"  # noqa: C416
-            )
-        else:
-            sys.stdout.write("All users matched with hubspot ids\n\n")
+        self.write_report(reconcile_contact_hubspot_ids())
 
     def sync_products(self):
         """
         Get hubspot ids for all products
         """
         sys.stdout.write("Syncing product hubspot ids to database...\n")
-        result = sync_product_hubspot_ids_to_db()
-        missing = Product.objects.exclude(
-            id__in=HubspotObject.objects.filter(
-                content_type=ContentType.objects.get_for_model(Product)
-            ).values_list("object_id", flat=True)
-        ).values_list("id", flat=True)
-        if not result and missing.count() > 0:
-            sys.stderr.write(
-                f"Some products could not be matched with hubspot ids:{format_missing(missing)}"
-            )
-        else:
-            sys.stdout.write("All products matched with hubspot ids\n\n")
+        self.write_report(reconcile_product_hubspot_ids())
 
     def sync_deals(self):
         """
         Get hubspot ids for all deals and lines
         """
         sys.stdout.write("Syncing deal hubspot ids to database...\n")
-        result = sync_deal_hubspot_ids_to_db()
-        if not result:
-            orders = Order.objects.exclude(
-                id__in=HubspotObject.objects.filter(
-                    content_type=ContentType.objects.get_for_model(Order)
-                ).values_list("object_id", flat=True)
-            ).values_list("id", flat=True)
-            if orders.count() > 0:
-                sys.stderr.write(
-                    f"Some Orders could not be matched with hubspot ids:{format_missing(orders)}\n\n"
-                )
-            lines = Line.objects.exclude(
-                id__in=HubspotObject.objects.filter(
-                    content_type=ContentType.objects.get_for_model(Line)
-                ).values_list("object_id", flat=True)
-            ).values_list("id", flat=True)
-            if lines.count() > 0:
-                sys.stderr.write(
-                    f"Some Lines could not be matched with hubspot ids:{format_missing(lines)}\n\n"
-                )
-        else:
-            sys.stdout.write("All orders and lines matched with hubspot ids\n\n")
+        self.write_report(reconcile_deal_hubspot_ids())
+        sys.stdout.write("Syncing line hubspot ids to database...\n")
+        self.write_report(reconcile_line_hubspot_ids())
 
     def sync_all(self):
         """
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.18 on 2026-10-19 11:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    initial = True
+
+    dependencies = [
+        ("hubspot_api", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="HubspotObjectPayloadHash",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_on", models.DateTimeField(auto_now_add=True)),
+                ("updated_on", models.DateTimeField(auto_now=True)),
+                ("payload_hash", models.CharField(max_length=64)),
+                (
+                    "hubspot_object",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="sync_payload",
+                        to="hubspot_api.hubspotobject",
+                    ),
+                ),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+    ]
@@ -0,0 +1,20 @@
+"""Models for hubspot_sync"""
+
+from django.db import models
+from mitol.common.models import TimestampedModel
+from mitol.hubspot_api.models import HubspotObject
+
+
+class HubspotObjectPayloadHash(TimestampedModel):
+    """
+    Stores a hash of the properties most recently sent to Hubspot for a synced object,
+    so that batch updates can skip objects whose serialized payload has not changed.
+    """
+
+    hubspot_object = models.OneToOneField(
+        HubspotObject, on_delete=models.CASCADE, related_name="sync_payload"
+    )
+    payload_hash = models.CharField(max_length=64)
+
+    def __str__(self):
+        return f"Payload hash for Hubspot object {self.hubspot_object_id}"
@@ -3,15 +3,26 @@
 from decimal import Decimal
 
 from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
 from mitol.hubspot_api.api import format_app_id
+from mitol.hubspot_api.models import HubspotObject
 from rest_framework import serializers
 
-from courses.models import CourseRunCertificate, CourseRunEnrollment, ProgramCertificate
+from courses.models import (
+    CourseRun,
+    CourseRunCertificate,
+    CourseRunEnrollment,
+    ProgramCertificate,
+)
 from ecommerce import models
 from ecommerce.constants import DISCOUNT_TYPE_DOLLARS_OFF, DISCOUNT_TYPE_PERCENT_OFF
-from ecommerce.discounts import resolve_product_version
+from ecommerce.discounts import product_from_version
 from ecommerce.models import Product
-from hubspot_sync.api import format_product_name, get_hubspot_id_for_object
+from hubspot_sync.api import (
+    format_product_name,
+    get_hubspot_id_for_object,
+    prefetch_purchasable_objects,
+)
 from main.utils import format_decimal
 from users.serializers import UserSerializer
 
@@ -35,6 +46,128 @@ ORDER_STATUS_MAPPING = {
 }
 
 
+class HubspotBatchContext:
+    """
+    Data preloaded for serializing a batch of Lines or Orders for Hubspot, so that
+    each object in the batch can be serialized without running its own queries.
+
+    Pass an instance to the serializers as context={"batch": batch_context}.
+    """
+
+    def __init__(self):
+        self.products = {}  # product version id -> Product as of that version
+        self.hubspot_product_ids = {}  # product id -> hubspot id
+        self.enrollments = {}  # (user id, course run id) -> CourseRunEnrollment
+        self.order_lines = {}  # order id -> first Line of the order
+        self.order_discounts = {}  # order id -> first redeemed Discount
+
+    @classmethod
+    def for_lines(cls, lines):
+        """
+        Preload the data needed to serialize a list of Lines
+
+        Args:
+            lines (list of Line): Lines, ideally with order__purchaser and product_version selected
+
+        Returns:
+            HubspotBatchContext: the preloaded data
+        """
+        batch = cls()
+        batch.load_products([line.product_version for line in lines])
+        batch.load_hubspot_product_ids()
+        batch.load_enrollments(lines)
+        return batch
+
+    @classmethod
+    def for_orders(cls, orders):
+        """
+        Preload the data needed to serialize a list of Orders
+
+        Args:
+            orders (list of Order): Orders
+
+        Returns:
+            HubspotBatchContext: the preloaded data
+        """
+        batch = cls()
+        order_ids = [order.id for order in orders]
+        # Descending, so the lowest id (what .first() would return) is kept
+        for line in (
+            models.Line.objects.filter(order_id__in=order_ids)
+            .select_related("product_version")
+            .order_by("-id")
+        ):
+            batch.order_lines[line.order_id] = line
+        for redemption in (
+            models.DiscountRedemption.objects.filter(redeemed_order_id__in=order_ids)
+            .select_related("redeemed_discount")
+            .order_by("-id")
+        ):
+            batch.order_discounts[redemption.redeemed_order_id] = (
+                redemption.redeemed_discount
+            )
+        batch.load_products(
+            [line.product_version for line in batch.order_lines.values()]
+        )
+        return batch
+
+    def load_products(self, product_versions):
+        """Build the versioned products and load their purchasable objects"""
+        for version in product_versions:
+            if version is not None and version.id not in self.products:
+                self.products[version.id] = product_from_version(version)
+        prefetch_purchasable_objects(list(self.products.values()))
+
+    def load_hubspot_product_ids(self):
+        """Load the hubspot ids that have already been synced for the products"""
+        self.hubspot_product_ids = dict(
+            HubspotObject.objects.filter(
+                content_type=ContentType.objects.get_for_model(Product),
+                object_id__in={product.id for product in self.products.values()},
+            ).values_list("object_id", "hubspot_id")
+        )
+
+    def load_enrollments(self, lines):
+        """Load the course run enrollments for the purchasers of the lines"""
+        course_run_type = ContentType.objects.get_for_model(CourseRun)
+        user_run_ids = {
+            (line.order.purchaser_id, line.purchased_object_id)
+            for line in lines
+            if line.purchased_content_type_id == course_run_type.id
+        }
+        if not user_run_ids:
+            return
+        # Descending, so the lowest id (what .first() would return) is kept
+        for enrollment in CourseRunEnrollment.all_objects.filter(
+            user_id__in={user_id for user_id, _ in user_run_ids},
+            run_id__in={run_id for _, run_id in user_run_ids},
+        ).order_by("-id"):
+            if (enrollment.user_id, enrollment.run_id) in user_run_ids:
+                self.enrollments[(enrollment.user_id, enrollment.run_id)] = enrollment
+
+    def get_product(self, product_version):
+        """Return the Product as of the given version"""
+        return self.products.get(product_version.id)
+
+    def get_hubspot_product_id(self, product):
+        """Return the hubspot id for a product, querying Hubspot only if it is not already known"""
+        if product.id not in self.hubspot_product_ids:
+            self.hubspot_product_ids[product.id] = get_hubspot_id_for_object(product)
+        return self.hubspot_product_ids[product.id]
+
+    def get_enrollment(self, line):
+        """Return the purchaser's enrollment in the run purchased by the line, if any"""
+        return self.enrollments.get((line.order.purchaser_id, line.purchased_object_id))
+
+    def get_order_line(self, order):
+        """Return the first line of an order"""
+        return self.order_lines.get(order.id)
+
+    def get_order_discount(self, order):
+        """Return the first discount redeemed for an order"""
+        return self.order_discounts.get(order.id)
+
+
 class LineSerializer(serializers.ModelSerializer):
     """Line Serializer for Hubspot"""
 
@@ -52,22 +185,22 @@ class LineSerializer(serializers.ModelSerializer):
 
     def _get_product(self, instance):
         """Retrieve the line product just once"""
+        batch = self.context.get("batch")
+        if not self._product and batch:
+            self._product = batch.get_product(instance.product_version)
         if not self._product:
-            version = instance.product_version
-            product = Product.all_objects.filter(id=version.object_id).first()
-            if product:
-                self._product = resolve_product_version(
-                    product, product_version=version
-                )
-            else:
-                self._product = version.object
+            self._product = instance.product
         return self._product
 
     def _get_enrollment(self, instance):
         """Returns the CourseRunEnrollment associated with the Order, if one exists, else None"""
-        self._enrollment = CourseRunEnrollment.all_objects.filter(
-            run=instance.purchased_object, user=instance.order.purchaser
-        ).first()
+        batch = self.context.get("batch")
+        if batch:
+            self._enrollment = batch.get_enrollment(instance)
+        else:
+            self._enrollment = CourseRunEnrollment.all_objects.filter(
+                run=instance.purchased_object, user=instance.order.purchaser
+            ).first()
         return self._enrollment
 
     def get_enrollment_mode(self, instance):
@@ -94,6 +227,9 @@ class LineSerializer(serializers.ModelSerializer):
         """Return the hubspot id for the product"""
         if not instance.product_version:
             return None
+        batch = self.context.get("batch")
+        if batch:
+            return batch.get_hubspot_product_id(self._get_product(instance))
         return get_hubspot_id_for_object(self._get_product(instance))
 
     def get_status(self, instance):
@@ -148,22 +284,24 @@ class OrderToDealSerializer(serializers.ModelSerializer):
 
     def _get_product(self, instance):
         """Retrieve the line product just once"""
+        batch = self.context.get("batch")
+        if not self._product and batch:
+            self._product = batch.get_product(
+                batch.get_order_line(instance).product_version
+            )
         if not self._product:
-            version = instance.lines.first().product_version
-            product = Product.objects.filter(id=version.object_id).first()
-            if product:
-                self._product = resolve_product_version(
-                    product, product_version=version
-                )
-            else:
-                self._product = version.object
+            self._product = product_from_version(instance.lines.first().product_version)
         return self._product
 
     def _get_discount(self, instance):
         """Return the order discount"""
         if self._discount is None and not self._discount_checked:
-            redemption = instance.discounts.first()
             self._discount_checked = True
+            batch = self.context.get("batch")
+            if batch:
+                self._discount = batch.get_order_discount(instance)
+                return self._discount
+            redemption = instance.discounts.first()
             if redemption:
                 self._discount = instance.discounts.first().redeemed_discount
         return self._discount
@@ -283,9 +421,11 @@ class HubspotContactSerializer(UserSerializer):
 
     def get_program_certificates(self, instance):
         """Return a list of program names that the user has a certificate for."""
-        programs_user_has_cert = ProgramCertificate.objects.filter(
-            user=instance, is_revoked=False
-        ).select_related("program")
+        programs_user_has_cert = getattr(instance, "active_program_certificates", None)
+        if programs_user_has_cert is None:
+            programs_user_has_cert = ProgramCertificate.objects.filter(
+                user=instance, is_revoked=False
+            ).select_related("program")
         program_name_array = [
             str(program_cert.program) for program_cert in programs_user_has_cert
         ]
@@ -293,9 +433,13 @@ class HubspotContactSerializer(UserSerializer):
 
     def get_course_run_certificates(self, instance):
         """Return a list of course run names that the user has a certificate for."""
-        course_runs_user_has_cert = CourseRunCertificate.objects.filter(
-            user=instance, is_revoked=False
-        ).select_related("course_run")
+        course_runs_user_has_cert = getattr(
+            instance, "active_course_run_certificates", None
+        )
+        if course_runs_user_has_cert is None:
+            course_runs_user_has_cert = CourseRunCertificate.objects.filter(
+                user=instance, is_revoked=False
+            ).select_related("course_run")
         course_run_name_array = [
             str(course_run_cert.course_run)
             for course_run_cert in course_runs_user_has_cert
@@ -7,10 +7,13 @@ Tests for hubspot_sync serializers
 from decimal import Decimal
 
 import pytest
+import reversion
 from django.contrib.contenttypes.models import ContentType
 from mitol.common.utils import now_in_utc
 from mitol.hubspot_api.api import format_app_id
+from mitol.hubspot_api.factories import HubspotObjectFactory
 from mitol.hubspot_api.models import HubspotObject
+from reversion.models import Version
 
 from courses.factories import (
     CourseRunCertificateFactory,
@@ -18,6 +21,7 @@ from courses.factories import (
     CourseRunFactory,
     ProgramCertificateFactory,
 )
+from courses.models import CourseRun
 from ecommerce.constants import (
     DISCOUNT_TYPE_DOLLARS_OFF,
     DISCOUNT_TYPE_FIXED_PRICE,
@@ -26,11 +30,13 @@ from ecommerce.constants import (
 from ecommerce.factories import (
     DiscountFactory,
     DiscountRedemptionFactory,
+    LineFactory,
     ProductFactory,
 )
-from ecommerce.models import OrderStatus, Product
+from ecommerce.models import Line, OrderStatus, Product
 from hubspot_sync.serializers import (
     ORDER_STATUS_MAPPING,
+    HubspotBatchContext,
     HubspotContactSerializer,
     LineSerializer,
     OrderToDealSerializer,
@@ -194,3 +200,74 @@ def test_serialize_contact(settings, user, mocker):
         serialized_data["course_run_certificates"]
         == f"{course_run_cert_1.course_run!s};{course_run_cert_2.course_run!s}"
     )
+
+
+def test_serialize_line_batch(hubspot_order):
+    """LineSerializer should produce the same data when given a HubspotBatchContext"""
+    line = hubspot_order.lines.first()
+    product = Product.objects.get(id=line.product_version.object_id)
+    CourseRunEnrollmentFactory(
+        run=product.purchasable_object, user=hubspot_order.purchaser
+    )
+    batch = HubspotBatchContext.for_lines([line])
+    assert (
+        LineSerializer(instance=line, context={"batch": batch}).data
+        == LineSerializer(instance=line).data
+    )
+
+
+def test_serialize_order_batch(hubspot_order):
+    """OrderToDealSerializer should produce the same data when given a HubspotBatchContext"""
+    DiscountRedemptionFactory(
+        redeemed_discount=DiscountFactory.create(
+            amount=Decimal(10), discount_type=DISCOUNT_TYPE_DOLLARS_OFF
+        ),
+        redeemed_order=hubspot_order,
+        redeemed_by=hubspot_order.purchaser,
+        redemption_date=now_in_utc(),
+    )
+    batch = HubspotBatchContext.for_orders([hubspot_order])
+    assert (
+        OrderToDealSerializer(instance=hubspot_order, context={"batch": batch}).data
+        == OrderToDealSerializer(instance=hubspot_order).data
+    )
+
+
+def test_serialize_batch_query_count(django_assert_num_queries):
+    """Serializing a batch of lines and orders should run a constant number of queries"""
+    with reversion.create_revision():
+        products = ProductFactory.create_batch(3)
+    for product in products:
+        HubspotObjectFactory.create(
+            content_object=product,
+            content_type=ContentType.objects.get_for_model(Product),
+            object_id=product.id,
+        )
+    for product in products:
+        line = LineFactory.create(
+            product_version=Version.objects.get_for_object(product).first(),
+            purchased_object=product.purchasable_object,
+        )
+        CourseRunEnrollmentFactory(
+            run=product.purchasable_object, user=line.order.purchaser
+        )
+        DiscountRedemptionFactory(
+            redeemed_order=line.order, redeemed_by=line.order.purchaser
+        )
+    lines = list(
+        Line.objects.select_related("order__purchaser", "product_version").order_by(
+            "id"
+        )
+    )
+    orders = [line.order for line in lines]
+
+    # content types are cached, the rest is one query per kind of preloaded data
+    ContentType.objects.get_for_model(CourseRun)
+    with django_assert_num_queries(3):
+        batch = HubspotBatchContext.for_lines(lines)
+        for line in lines:
+            LineSerializer(instance=line, context={"batch": batch}).data  # noqa: B018
+    with django_assert_num_queries(3):
+        batch = HubspotBatchContext.for_orders(orders)
+        for order in orders:
+            OrderToDealSerializer(instance=order, context={"batch": batch}).data  # noqa: B018
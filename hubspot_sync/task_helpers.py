@@ -5,7 +5,7 @@ import logging
 from django.conf import settings
 
 from ecommerce.models import Order, Product
-from hubspot_sync import tasks
+from hubspot_sync import api, tasks
 from users.models import User
 
 # pylint:disable-bare-except
@@ -31,19 +31,28 @@ def sync_hubspot_user(user: User):
 
 def sync_hubspot_deal(order: Order):
     """
-    Trigger celery task to sync an order to Hubspot if it has lines.
-    Use a delay of 10 seconds to make sure state is updated first.
+    Trigger celery task to sync an order to Hubspot.
+    Use a delay to make sure state is updated first, and skip scheduling if a sync
+    for the order is already pending so that repeated calls result in a single sync.
 
     Args:
         order (Order): The order to sync
     """
-    if settings.MITOL_HUBSPOT_API_PRIVATE_TOKEN and order.lines.first() is not None:
+    if settings.MITOL_HUBSPOT_API_PRIVATE_TOKEN:
+        pending = False
         try:
-            tasks.sync_deal_with_hubspot.apply_async(args=(order.id,), countdown=10)
+            pending = api.set_deal_sync_pending(order.id)
+            if pending:
+                tasks.sync_deal_with_hubspot.apply_async(
+                    args=(order.id,), countdown=settings.HUBSPOT_DEAL_SYNC_DELAY
+                )
         except:  # noqa: E722
             log.exception(
                 "Exception calling sync_deal_with_hubspot for order %d", order.id
             )
+            if pending:
+                # The task was not queued, so don't block the next sync of the order
+                api.clear_deal_sync_pending(order.id)
 
 
 def sync_hubspot_line_by_line_id(line_id: int):
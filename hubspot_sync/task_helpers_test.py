@@ -3,6 +3,7 @@
 import pytest
 
 from ecommerce.factories import ProductFactory
+from hubspot_sync import api
 from hubspot_sync.task_helpers import (
     sync_hubspot_deal,
     sync_hubspot_product,
@@ -20,12 +21,16 @@ def mock_exception_log(settings, mocker):
 
 
 @pytest.mark.parametrize("raise_exc", [True, False])
-def test_sync_hubspot_deal(mocker, mock_exception_log, hubspot_order, raise_exc):
+def test_sync_hubspot_deal(
+    settings, mocker, mock_exception_log, hubspot_order, raise_exc
+):
     """sync_hubspot_deal should call tasks.sync_contact_with_hubspot.applY_async and log any exception"""
+    settings.HUBSPOT_DEAL_SYNC_DELAY = 10
     mock_sync = mocker.patch(
         "hubspot_sync.task_helpers.tasks.sync_deal_with_hubspot.apply_async",
         side_effect=(ConnectionError if raise_exc else None),
     )
+    api.clear_deal_sync_pending(hubspot_order.id)
     sync_hubspot_deal(hubspot_order)
     mock_sync.assert_called_once_with(args=(hubspot_order.id,), countdown=10)
     if raise_exc:
@@ -34,6 +39,24 @@ def test_sync_hubspot_deal(mocker, mock_exception_log, hubspot_order, raise_exc)
         )
     else:
         mock_exception_log.assert_not_called()
+    # A failed attempt to queue the task should not block the next sync
+    sync_hubspot_deal(hubspot_order)
+    assert mock_sync.call_count == (2 if raise_exc else 1)
+
+
+def test_sync_hubspot_deal_debounced(mocker, mock_exception_log, hubspot_order):
+    """sync_hubspot_deal should only schedule one task per order until the task runs"""
+    mock_sync = mocker.patch(
+        "hubspot_sync.task_helpers.tasks.sync_deal_with_hubspot.apply_async"
+    )
+    api.clear_deal_sync_pending(hubspot_order.id)
+    for _ in range(3):
+        sync_hubspot_deal(hubspot_order)
+    mock_sync.assert_called_once()
+    api.clear_deal_sync_pending(hubspot_order.id)
+    sync_hubspot_deal(hubspot_order)
+    assert mock_sync.call_count == 2
+    mock_exception_log.assert_not_called()
 
 
 @pytest.mark.parametrize("raise_exc", [True, False])
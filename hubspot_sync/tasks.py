@@ -10,7 +10,6 @@ from typing import List, Tuple  # noqa: UP035
 import celery
 from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
-from django.db.models import F
 from hubspot.crm.associations import BatchInputPublicAssociation, PublicAssociation
 from hubspot.crm.objects import ApiException, BatchInputSimplePublicObjectInput
 from mitol.common.decorators import single_task
@@ -84,6 +83,22 @@ def _batched_chunks(
     return chunks(batch_ids, chunk_size=max_chunk_size)
 
 
+def _payload_key(ct_model_name: str, properties: dict) -> str:
+    """
+    Get the key used to match a batch create input with its Hubspot result
+
+    Args:
+        ct_model_name(str): The model name of the synced objects
+        properties(dict): The Hubspot object properties
+
+    Returns:
+        str: The contact email for users, otherwise the unique app id
+    """
+    if ct_model_name == "user":
+        return (properties.get("email") or "").lower()
+    return properties.get("unique_app_id")
+
+
 def sync_failed_contacts(chunk: List[int]) -> List[int]:  # noqa: UP006
     """
     Consecutively try individual contact syncs for a failed batch sync
@@ -190,9 +205,13 @@ def sync_deal_with_hubspot(order_id: int) -> str:
         order_id(int): The Order ID.
 
     Returns:
-        str: The hubspot id for the deal
+        str: The hubspot id for the deal, or None if the order has no lines
     """
-    return api.sync_deal_with_hubspot(Order.objects.get(id=order_id)).id
+    api.clear_deal_sync_pending(order_id)
+    order = Order.objects.get(id=order_id)
+    if not order.lines.exists():
+        return None
+    return api.sync_deal_with_hubspot(order).id
 
 
 @app.task(
@@ -250,12 +269,18 @@ def batch_create_hubspot_objects_chunked(
     last_error_status = None
     for chunk in chunked_ids:
         try:
+            inputs = api.MODEL_CREATE_FUNCTION_MAPPING[ct_model_name](chunk)
             response = HubspotApi().crm.objects.batch_api.create(
                 hubspot_type,
-                BatchInputSimplePublicObjectInput(
-                    inputs=api.MODEL_CREATE_FUNCTION_MAPPING[ct_model_name](chunk)
-                ),
+                BatchInputSimplePublicObjectInput(inputs=inputs),
             )
+            input_hashes = {
+                _payload_key(ct_model_name, item.properties): api.hash_hubspot_payload(
+                    item.properties
+                )
+                for item in inputs
+            }
+            payload_hashes = {}
             for result in response.results:
                 if ct_model_name == "user":
                     user = User.objects.filter(
@@ -271,7 +296,13 @@ def batch_create_hubspot_objects_chunked(
                     hubspot_id=result.id,
                     object_id=object_id,
                 )
+                payload_hash = input_hashes.get(
+                    _payload_key(ct_model_name, result.properties)
+                )
+                if payload_hash:
+                    payload_hashes[result.id] = payload_hash
                 created_ids.append(result.id)
+            api.save_payload_hashes(content_type, payload_hashes)
         except ApiException as ae:
             last_error_status = ae.status
             still_failed = handle_failed_batch_chunk(chunk, hubspot_type)
@@ -300,7 +331,8 @@ def batch_update_hubspot_objects_chunked(
     object_ids: List[Tuple[int, str]],  # noqa: UP006
 ) -> List[str]:  # noqa: UP006
     """
-    Batch create or update hubspot objects, no associations
+    Batch update hubspot objects, no associations. Objects whose serialized
+    properties have not changed since they were last sent to Hubspot are skipped.
 
     Args:
         hubspot_type(str): The hubspot object type (deal, contact, etc)
@@ -311,11 +343,21 @@ def batch_update_hubspot_objects_chunked(
           list(str): list of processed hubspot ids
     """
     updated_ids = []
+    content_type = ContentType.objects.exclude(app_label="auth").get(
+        model=ct_model_name
+    )
     chunked_ids = _batched_chunks(hubspot_type, object_ids)
     errored_chunks = []
     last_error_status = None
+    processed_count = 0
     for chunk in chunked_ids:
-        inputs = api.MODEL_UPDATE_FUNCTION_MAPPING[ct_model_name](chunk)
+        processed_count += len(chunk)
+        inputs, payload_hashes = api.filter_unchanged_update_inputs(
+            content_type, api.MODEL_UPDATE_FUNCTION_MAPPING[ct_model_name](chunk)
+        )
+        if not inputs:
+            log.info("Skipped unchanged HubSpot ID's %s", [item[1] for item in chunk])
+            continue
         try:
             response = HubspotApi().crm.objects.batch_api.update(
                 hubspot_type, BatchInputSimplePublicObjectInput(inputs=inputs)
@@ -326,9 +368,17 @@ def batch_update_hubspot_objects_chunked(
                     User.objects.filter(
                         email__iexact=result.properties["email"], is_active=True
                     ).update(hubspot_sync_datetime=now_in_utc())
+            api.save_payload_hashes(
+                content_type,
+                {
+                    hubspot_id: payload_hash
+                    for hubspot_id, payload_hash in payload_hashes.items()
+                    if hubspot_id in chunk_updated_ids
+                },
+            )
             updated_ids.extend(chunk_updated_ids)
             log.info("Updated the following HubSpot ID's %s", chunk_updated_ids)
-            percent_complete = (len(updated_ids) / len(object_ids)) * 100
+            percent_complete = (processed_count / len(object_ids)) * 100
             log.info("%i%% complete updating HubSpot ID's", percent_complete)
         except ApiException as ae:
             last_error_status = ae.status
@@ -365,33 +415,51 @@ def batch_upsert_hubspot_objects(  # pylint:disable=too-many-arguments  # noqa:
     app_label: str,
     create: bool = True,  # noqa: FBT001, FBT002
     object_ids: List[int] = None,  # noqa: UP006, RUF013
+    after_id: int = None,  # noqa: RUF013
 ):
     """
     Batch create or update objects in hubspot, no associations (so ideal for contacts and products)
 
+    If no object ids are specified, all unsynced (create) or synced (update) objects are
+    processed one page at a time, ordered by id. Each page is split into chunk tasks, and
+    the next page is only read once those have finished. The id at the start of each page
+    is saved as a checkpoint so that an interrupted sync can be resumed from there.
+
     Args:
         hubspot_type(str): The hubspot object type (deal, contact, etc)
         model_name(str): The corresponding model name
         app_label(str): The model's containing app
         create(bool): Create if true, update if false
         object_ids(list): List of specific object ids to process if any
+        after_id(int): Only process objects with a greater id, if no object ids are specified
     """
     content_type = ContentType.objects.get_by_natural_key(app_label, model_name)
+    next_page = None
     if not object_ids:
-        synced_object_ids = HubspotObject.objects.filter(
-            content_type=content_type
-        ).values_list("object_id", "hubspot_id")
-        unsynced_objects = content_type.model_class().objects.exclude(
-            id__in=[id[0] for id in synced_object_ids]  # noqa: A001
-        )
-        if model_name == "user":
-            unsynced_objects = (
-                unsynced_objects.filter(is_active=True, email__contains="@")
-                .exclude(social_auth__isnull=True)
-                .order_by(F("hubspot_sync_datetime").asc(nulls_first=True))
+        page_size = settings.HUBSPOT_SYNC_PAGE_SIZE
+        if after_id is None:
+            after_id = 0
+            api.clear_sync_checkpoint(content_type, create)
+        else:
+            api.set_sync_checkpoint(content_type, create, after_id)
+        if create:
+            object_ids = api.get_unsynced_object_ids_page(
+                content_type, after_id, page_size
+            )
+            last_id = object_ids[-1] if object_ids else None
+        else:
+            object_ids = api.get_synced_object_ids_page(
+                content_type, after_id, page_size
+            )
+            last_id = object_ids[-1][0] if object_ids else None
+        if len(object_ids) < page_size:
+            api.clear_sync_checkpoint(content_type, create)
+        else:
+            next_page = batch_upsert_hubspot_objects.si(
+                hubspot_type, model_name, app_label, create, after_id=last_id
             )
-        unsynced_object_ids = unsynced_objects.values_list("id", flat=True)
-        object_ids = unsynced_object_ids if create else synced_object_ids
+        if not object_ids:
+            return
     elif not create:
         object_ids = HubspotObject.objects.filter(
             content_type=content_type, object_id__in=object_ids
@@ -407,6 +475,8 @@ def batch_upsert_hubspot_objects(  # pylint:disable=too-many-arguments  # noqa:
         chunk_func.s(hubspot_type, model_name, chunk)
         for chunk in chunks(sorted(object_ids), chunk_size=chunk_size)
     ]
+    if next_page is not None:
+        raise self.replace(celery.chain(celery.group(chunked_tasks), next_page))
     raise self.replace(celery.group(chunked_tasks))
 
 
@@ -20,9 +20,12 @@ from ecommerce.factories import LineFactory, OrderFactory, ProductFactory
 from ecommerce.models import Product
 from hubspot_sync import tasks
 from hubspot_sync.api import (
+    get_sync_checkpoint,
     make_contact_create_message_list_from_user_ids,
     make_contact_update_message_list_from_user_ids,
+    make_product_update_message_list_from_product_ids,
 )
+from hubspot_sync.models import HubspotObjectPayloadHash
 from hubspot_sync.tasks import (
     batch_upsert_associations,
     batch_upsert_associations_chunked,
@@ -69,17 +72,27 @@ def test_task_sync_product_with_hubspot(mocker):
     mock_api_call.assert_called_once_with(mock_object)
 
 
-def test_task_sync_deal_with_hubspot(mocker):
+def test_task_sync_deal_with_hubspot(mocker, hubspot_order):
     """These task functions should call the api function of the same name and return a hubspot id"""
-    mock_object = OrderFactory.create()
     mock_result = SimplePublicObjectFactory()
 
     mock_api_call = mocker.patch(
         "hubspot_sync.tasks.api.sync_deal_with_hubspot", return_value=mock_result
     )
+    mock_clear_pending = mocker.patch("hubspot_sync.tasks.api.clear_deal_sync_pending")
 
-    assert sync_deal_with_hubspot(mock_object.id) == mock_result.id
-    mock_api_call.assert_called_once_with(mock_object)
+    assert sync_deal_with_hubspot(hubspot_order.id) == mock_result.id
+    mock_api_call.assert_called_once_with(hubspot_order)
+    mock_clear_pending.assert_called_once_with(hubspot_order.id)
+
+
+def test_task_sync_deal_with_hubspot_no_lines(mocker):
+    """sync_deal_with_hubspot should not sync an order without lines"""
+    order = OrderFactory.create()
+    mock_api_call = mocker.patch("hubspot_sync.tasks.api.sync_deal_with_hubspot")
+
+    assert sync_deal_with_hubspot(order.id) is None
+    mock_api_call.assert_not_called()
 
 
 @pytest.mark.parametrize("task_func", SYNC_FUNCTIONS)
@@ -87,7 +100,7 @@ def test_task_sync_deal_with_hubspot(mocker):
     "status, expected_error",  # noqa: PT006
     [[429, TooManyRequestsException], [500, ApiException]],  # noqa: PT007
 )
-def test_task_functions_error(mocker, task_func, status, expected_error):
+def test_task_functions_error(mocker, hubspot_order, task_func, status, expected_error):
     """These task functions should return the expected exception class"""
     mocker.patch(
         f"hubspot_sync.tasks.api.{task_func}", side_effect=expected_error(status=status)
@@ -97,7 +110,7 @@ def test_task_functions_error(mocker, task_func, status, expected_error):
     elif task_func == "sync_product_with_hubspot":
         mock_object_id = ProductFactory.create().id
     else:
-        mock_object_id = OrderFactory.create().id
+        mock_object_id = hubspot_order.id
     with pytest.raises(expected_error):
         getattr(tasks, task_func)(mock_object_id)
 
@@ -150,6 +163,71 @@ def test_batch_upsert_hubspot_objects(settings, mocker, mocked_celery, create):
         mock_create.assert_not_called()
 
 
+def test_batch_upsert_hubspot_objects_paged(settings, mocker, mocked_celery):
+    """batch_upsert_hubspot_objects should process one page of unsynced objects at a time and checkpoint"""
+    settings.HUBSPOT_MAX_CONCURRENT_TASKS = 4
+    settings.HUBSPOT_SYNC_PAGE_SIZE = 2
+    mock_create = mocker.patch(
+        "hubspot_sync.tasks.batch_create_hubspot_objects_chunked.s"
+    )
+    mock_next_page = mocker.patch("hubspot_sync.tasks.batch_upsert_hubspot_objects.si")
+    content_type = ContentType.objects.get_for_model(User)
+    unsynced_ids = sorted(
+        social.user.id for social in UserSocialAuthFactory.create_batch(3)
+    )
+    synced_user = UserSocialAuthFactory.create().user
+    HubspotObjectFactory.create(
+        content_type=content_type, object_id=synced_user.id, content_object=synced_user
+    )
+
+    with pytest.raises(TabError):
+        tasks.batch_upsert_hubspot_objects.delay(
+            HubspotObjectType.CONTACTS.value, "user", "users", create=True
+        )
+    mock_create.assert_any_call(
+        HubspotObjectType.CONTACTS.value, "user", [unsynced_ids[0]]
+    )
+    mock_create.assert_any_call(
+        HubspotObjectType.CONTACTS.value, "user", [unsynced_ids[1]]
+    )
+    mock_next_page.assert_called_once_with(
+        HubspotObjectType.CONTACTS.value,
+        "user",
+        "users",
+        True,  # noqa: FBT003
+        after_id=unsynced_ids[1],
+    )
+    mocked_celery.chain.assert_called_once_with(
+        mocked_celery.group.return_value, mock_next_page.return_value
+    )
+    assert get_sync_checkpoint(content_type, True) == 0  # noqa: FBT003
+
+    settings.HUBSPOT_SYNC_PAGE_SIZE = 1
+    with pytest.raises(TabError):
+        tasks.batch_upsert_hubspot_objects.delay(
+            HubspotObjectType.CONTACTS.value,
+            "user",
+            "users",
+            create=True,
+            after_id=unsynced_ids[1],
+        )
+    mock_create.assert_called_with(
+        HubspotObjectType.CONTACTS.value, "user", [unsynced_ids[2]]
+    )
+    assert get_sync_checkpoint(content_type, True) == unsynced_ids[1]  # noqa: FBT003
+
+    # Last page is empty, so the sync is complete and the checkpoint is removed
+    tasks.batch_upsert_hubspot_objects.delay(
+        HubspotObjectType.CONTACTS.value,
+        "user",
+        "users",
+        create=True,
+        after_id=unsynced_ids[2],
+    )
+    assert mock_create.call_count == 3
+    assert get_sync_checkpoint(content_type, True) == 0  # noqa: FBT003
+
+
 def test_batch_update_hubspot_objects_with_ids(settings, mocker, mocked_celery):
     """batch_upsert_hubspot_objects should call batch_upsert_hubspot_objects_chunked w/specified ids"""
     settings.HUBSPOT_MAX_CONCURRENT_TASKS = 2
@@ -246,6 +324,54 @@ def test_batch_update_hubspot_objects_chunked(mocker, id_count):
     )
 
 
+def test_batch_update_hubspot_objects_chunked_skips_unchanged(mocker):
+    """batch_update_hubspot_objects_chunked should only send objects whose payload changed"""
+    products = ProductFactory.create_batch(3)
+    content_type = ContentType.objects.get_for_model(Product)
+    mock_ids = sorted(
+        (
+            product.id,
+            HubspotObjectFactory.create(
+                content_type=content_type, object_id=product.id, content_object=product
+            ).hubspot_id,
+        )
+        for product in products
+    )
+    mock_hubspot_api = mocker.patch("hubspot_sync.tasks.HubspotApi")
+    mock_update = mock_hubspot_api.return_value.crm.objects.batch_api.update
+    mock_update.return_value = mocker.Mock(
+        results=[SimplePublicObjectFactory(id=mock_id[1]) for mock_id in mock_ids]
+    )
+    tasks.batch_update_hubspot_objects_chunked(
+        HubspotObjectType.PRODUCTS.value, "product", mock_ids
+    )
+    assert mock_update.call_count == 1
+    assert HubspotObjectPayloadHash.objects.count() == 3
+
+    # Nothing changed, so nothing should be sent
+    assert (
+        tasks.batch_update_hubspot_objects_chunked(
+            HubspotObjectType.PRODUCTS.value, "product", mock_ids
+        )
+        == []
+    )
+    assert mock_update.call_count == 1
+
+    changed_product = Product.objects.get(id=mock_ids[1][0])
+    changed_product.price = changed_product.price + 1
+    changed_product.save()
+    mock_update.return_value = mocker.Mock(
+        results=[SimplePublicObjectFactory(id=mock_ids[1][1])]
+    )
+    assert tasks.batch_update_hubspot_objects_chunked(
+        HubspotObjectType.PRODUCTS.value, "product", mock_ids
+    ) == [mock_ids[1][1]]
+    assert mock_update.call_count == 2
+    assert mock_update.call_args[0][1] == BatchInputSimplePublicObjectInput(
+        inputs=make_product_update_message_list_from_product_ids([mock_ids[1]])
+    )
+
+
 @pytest.mark.parametrize(
     "status, expected_error",  # noqa: PT006
     [[429, TooManyRequestsException], [500, ApiException]],  # noqa: PT007
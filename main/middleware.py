@@ -15,3 +15,14 @@ class CachelessAPIMiddleware(MiddlewareMixin):
         ):
             response["Cache-Control"] = "private, no-store"
         return response
+
+
+class SurrogateKeyMiddleware(MiddlewareMixin):
+    """Add the Surrogate-Key header that Fastly uses to purge cached responses"""
+
+    def process_response(self, request, response):
+        """Add the surrogate keys that a view set on the request to the response"""
+        surrogate_keys = getattr(request, "surrogate_keys", None)
+        if surrogate_keys and not response.has_header("Surrogate-Key"):
+            response["Surrogate-Key"] = " ".join(sorted(surrogate_keys))
+        return response
@@ -233,6 +233,7 @@ MIDDLEWARE = (
     "django_user_agents.middleware.UserAgentMiddleware",
     "hijack.middleware.HijackUserMiddleware",
     "main.middleware.CachelessAPIMiddleware",
+    "main.middleware.SurrogateKeyMiddleware",
     "wagtail.contrib.redirects.middleware.RedirectMiddleware",
 )
 
@@ -882,6 +883,11 @@ HIJACK_LOGOUT_REDIRECT_URL = "/admin/users/user"
 HIJACK_REGISTER_ADMIN = False
 
 # django cache back-ends
+REDIS_CACHE_KEY_PREFIX = get_string(
+    name="REDIS_CACHE_KEY_PREFIX",
+    default="",
+    description="Prefix for the keys of the redis cache, to keep them apart from other users of the same Redis database",
+)
 CACHES = {
     "default": {
         "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
@@ -891,6 +897,15 @@ CACHES = {
         "BACKEND": "django_redis.cache.RedisCache",
         "LOCATION": CELERY_BROKER_URL,
         "OPTIONS": {"CLIENT_CLASS": "django_redis.client.DefaultClient"},
+        "KEY_PREFIX": REDIS_CACHE_KEY_PREFIX,
+    },
+    # Wagtail looks up image renditions by image and filter spec in this cache
+    "renditions": {
+        "BACKEND": "django_redis.cache.RedisCache",
+        "LOCATION": CELERY_BROKER_URL,
+        "OPTIONS": {"CLIENT_CLASS": "django_redis.client.DefaultClient"},
+        "KEY_PREFIX": "renditions",
+        "TIMEOUT": 60 * 60 * 24 * 7,
     },
     "durable": {
         "BACKEND": "django.core.cache.backends.db.DatabaseCache",
@@ -1125,6 +1140,18 @@ MITX_ONLINE_FASTLY_URL = get_string(
     description="The URL to the Fastly API.",
 )
 
+MITX_ONLINE_FASTLY_SERVICE_ID = get_string(
+    name="FASTLY_SERVICE_ID",
+    default=None,
+    description="The id of the Fastly service, used to purge cached pages by surrogate key.",
+)
+
+MITX_ONLINE_FASTLY_PURGE_DELAY = get_int(
+    name="FASTLY_PURGE_DELAY",
+    default=10,
+    description="Number of seconds to collect surrogate keys before purging them from Fastly in one request",
+)
+
 # Hubspot sync settings
 MITOL_HUBSPOT_API_PRIVATE_TOKEN = get_string(
     name="MITOL_HUBSPOT_API_PRIVATE_TOKEN",
@@ -1156,6 +1183,16 @@ HUBSPOT_TASK_DELAY = get_int(
     default=1000,
     description="Number of milliseconds to wait between consecutive Hubspot calls",
 )
+HUBSPOT_SYNC_PAGE_SIZE = get_int(
+    name="HUBSPOT_SYNC_PAGE_SIZE",
+    default=10000,
+    description="Number of objects to read and dispatch at a time when syncing all objects of a type to Hubspot",
+)
+HUBSPOT_DEAL_SYNC_DELAY = get_int(
+    name="HUBSPOT_DEAL_SYNC_DELAY",
+    default=10,
+    description="Number of seconds to wait before syncing a changed order to Hubspot, repeated changes within this window are synced once",
+)
 
 # PostHog related settings
 POSTHOG_PROJECT_API_KEY = get_string(
@@ -1200,6 +1237,26 @@ HUBSPOT_PORTAL_ID = get_string(
     description="Hubspot Portal ID",
 )
 
+# Ecommerce settings
+
+DISCOUNT_CODE_BATCH_ASYNC_THRESHOLD = get_int(
+    name="DISCOUNT_CODE_BATCH_ASYNC_THRESHOLD",
+    default=1000,
+    description="Batches of discount codes larger than this are generated in the background instead of during the request",
+)
+
+PRODUCT_LIST_CACHE_TIMEOUT = get_int(
+    name="PRODUCT_LIST_CACHE_TIMEOUT",
+    default=300,
+    description="Number of seconds to cache each page of the enrollable product list",
+)
+
+FLEXIBLE_PRICE_CACHE_TIMEOUT = get_int(
+    name="FLEXIBLE_PRICE_CACHE_TIMEOUT",
+    default=60 * 60 * 24,
+    description="Number of seconds to cache the approved flexible prices of a user",
+)
+
 # Unified Ecommerce integration
 
 UNIFIED_ECOMMERCE_URL = get_string(